@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""Bytes read per document by metadata queries, with page bodies inline or in the blob store.
+
+Writes the same synthetic pages to a backend twice, once with CONTENT_BLOBS
+off and once on, then compares the stored size of each document record and
+the time of a stats-style query (domain, trust score, media counts) that
+never needs page text.
+
+    python benchmarks/blob_store_benchmark.py --documents 5000
+    python benchmarks/blob_store_benchmark.py --backend file
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from compression_benchmark import synthetic_documents
+from config.settings import Config
+from database.json_db import JSONDatabase, LATEST_ONLY
+
+STATS_PROJECTION = {'_id': 0, 'domain': 1, 'metadata.trust_score': 1, 'metadata.media_count': 1}
+
+def stored_records(db: JSONDatabase):
+    """Stored form of every document (what a scan has to read and decode)"""
+    if db.backend == 'sqlite':
+        rows = db.sqlite._connection().execute('SELECT body FROM documents')
+        return [db.sqlite._decode(body) for (body,) in rows]
+    return list(db.store.scan())
+
+def run(backend: str, documents, blobs: bool, workdir: str) -> dict:
+    Config.CONTENT_BLOBS = blobs
+    Config.SQLITE_PATH = os.path.join(workdir, 'content.db')
+    Config.SEGMENTS_DIR = os.path.join(workdir, 'segments')
+    Config.DATA_DIR = workdir
+    Config.BLOB_DIR = os.path.join(workdir, 'blobs')
+
+    db = JSONDatabase(backend=backend)
+    try:
+        db.insert_many([json.loads(json.dumps(doc)) for doc in documents])
+        records = stored_records(db)
+        record_bytes = sum(len(json.dumps(record, default=str)) for record in records) / len(records)
+
+        timings = []
+        for _ in range(3):
+            started = time.perf_counter()
+            for document in db.find_documents(LATEST_ONLY, projection=STATS_PROJECTION, batch_size=1000):
+                document.get('metadata', {}).get('trust_score')
+            timings.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        for document in db.find_documents({}, projection={'_id': 0, 'content.text': 1}):
+            document['content'].get('text')
+        body_ms = (time.perf_counter() - started) * 1000
+        return {'record_bytes': record_bytes, 'stats_ms': min(timings) * 1000, 'body_ms': body_ms}
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the content blob store')
+    parser.add_argument('--documents', type=int, default=5000)
+    parser.add_argument('--backend', default='sqlite', choices=['sqlite', 'file'])
+    args = parser.parse_args()
+
+    documents = synthetic_documents(args.documents)
+    results = {}
+    for blobs in (False, True):
+        workdir = tempfile.mkdtemp(prefix='blob-bench-')
+        try:
+            results[blobs] = run(args.backend, documents, blobs, workdir)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    inline, split = results[False], results[True]
+    print(f"📊 {args.documents} documents, {args.backend} backend")
+    print(f"\n{'':34}{'inline':>12}{'blobs':>12}")
+    print(f"{'stored record (bytes/doc)':34}{inline['record_bytes']:>12.0f}{split['record_bytes']:>12.0f}")
+    print(f"{'stats query (ms)':34}{inline['stats_ms']:>12.1f}{split['stats_ms']:>12.1f}")
+    print(f"{'read all page text (ms)':34}{inline['body_ms']:>12.1f}{split['body_ms']:>12.1f}")
+
+if __name__ == "__main__":
+    main()
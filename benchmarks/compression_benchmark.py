@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Bytes per document and read latency with and without field compression.
+
+Uses synthetic scraped pages by default, or real documents with --backend.
+Sizes are measured as stored by the file backend (JSON, base64 payloads) and,
+when pymongo's bson module is available, as BSON documents in MongoDB.
+
+    python benchmarks/compression_benchmark.py --documents 2000
+    python benchmarks/compression_benchmark.py --backend file --codec zstd
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.compression import FieldCompressor
+
+try:
+    import bson
+except ImportError:
+    bson = None
+
+WORDS = (
+    'navy defence ministry procurement tender contract vessel submarine frigate '
+    'report annual budget policy security maritime coastal command training '
+    'exercise operation press release government official notice document '
+    'department strategy capability acquisition program shipyard dockyard'
+).split()
+
+def synthetic_documents(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    documents = []
+    for i in range(count):
+        domain = f'site{rng.randint(1, 200)}.gov.in'
+        text_words = rng.randint(300, 2500)
+        documents.append({
+            'id': f'doc-{i}',
+            'url': f'https://{domain}/page/{i}',
+            'domain': domain,
+            'title': ' '.join(rng.choices(WORDS, k=8)).title(),
+            'meta_description': ' '.join(rng.choices(WORDS, k=25)),
+            'content': {
+                'text': ' '.join(rng.choices(WORDS, k=text_words))[:15000],
+                'headings': [' '.join(rng.choices(WORDS, k=5)) for _ in range(rng.randint(5, 30))],
+                'links': [f'https://{domain}/{rng.choice(WORDS)}/{rng.randint(1, 9999)}'
+                          for _ in range(rng.randint(10, 100))]
+            },
+            'metadata': {'crawl_date': '2024-01-01T00:00:00', 'trust_score': rng.random()},
+            'search_metadata': {'data_type': 'traditional_scraping', 'search_engine': 'google'}
+        })
+    return documents
+
+def load_documents(backend: str, count: int):
+    from database.json_db import JSONDatabase, RECENT_FIRST
+
+    db = JSONDatabase(backend=backend)
+    try:
+        return [json.loads(json.dumps(doc, default=str))
+                for doc in db.find_documents({}, projection={'_id': 0}, sort=RECENT_FIRST, limit=count)]
+    finally:
+        db.close()
+
+def measure_reads(records, compressor, read_text: bool, repeat: int = 3) -> float:
+    """Median microseconds per document to decode a stored JSON record"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for record in records:
+            document = json.loads(record)
+            if compressor:
+                document = compressor.expand_document(document)
+            document['metadata'].get('trust_score')
+            if read_text:
+                document['content'].get('text')
+                document['content'].get('links')
+        timings.append((time.perf_counter() - start) / len(records) * 1e6)
+    return statistics.median(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark transparent field compression')
+    parser.add_argument('--documents', type=int, default=1000, help='Number of documents')
+    parser.add_argument('--backend', help='Read real documents from this backend instead of synthetic ones')
+    parser.add_argument('--codec', default='zlib', choices=['zlib', 'zstd'])
+    parser.add_argument('--min-bytes', type=int, default=1024)
+    parser.add_argument('--train', action='store_true', help='Train a zstd dictionary on the sample first')
+    args = parser.parse_args()
+
+    documents = load_documents(args.backend, args.documents) if args.backend else synthetic_documents(args.documents)
+    if not documents:
+        print("❌ No documents to benchmark")
+        return
+
+    dictionary_dir = os.path.join('data', 'compression-benchmark') if args.train else None
+    json_compressor = FieldCompressor(codec=args.codec, min_bytes=args.min_bytes,
+                                      dictionary_dir=dictionary_dir, binary=False)
+    if args.train:
+        json_compressor.train_dictionary(documents)
+    bson_compressor = FieldCompressor(codec=json_compressor.codec, min_bytes=args.min_bytes,
+                                      dictionary_dir=dictionary_dir, binary=True)
+
+    plain = [json.dumps(doc) for doc in documents]
+    compressed = [json.dumps(json_compressor.compress_document(doc)) for doc in documents]
+
+    print(f"📊 {len(documents)} documents, codec={json_compressor.codec}, min_bytes={args.min_bytes}")
+    print(f"\n{'':28}{'plain':>12}{'compressed':>14}{'ratio':>8}")
+
+    plain_json = sum(map(len, plain)) / len(plain)
+    compressed_json = sum(map(len, compressed)) / len(compressed)
+    print(f"{'JSON bytes/document':28}{plain_json:>12.0f}{compressed_json:>14.0f}{plain_json / compressed_json:>8.2f}")
+
+    if bson is not None:
+        plain_bson = sum(len(bson.encode(doc)) for doc in documents) / len(documents)
+        compressed_bson = sum(len(bson.encode(bson_compressor.compress_document(doc))) for doc in documents) / len(documents)
+        print(f"{'BSON bytes/document':28}{plain_bson:>12.0f}{compressed_bson:>14.0f}{plain_bson / compressed_bson:>8.2f}")
+
+    for label, read_text in (('metadata read (µs/doc)', False), ('full read (µs/doc)', True)):
+        before = measure_reads(plain, None, read_text)
+        after = measure_reads(compressed, json_compressor, read_text)
+        print(f"{label:28}{before:>12.1f}{after:>14.1f}{before / after:>8.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""Per-page CPU time of HTML extraction, before and after the single-pass extractor.
+
+Before: the Google dorker's old path, which parsed each page twice with
+html.parser (basic content, then media) and walked the tree once per
+find_all (links three times, iframes twice). After: HTMLExtractor, one
+parse and one walk. Both run on the same corpus and must give the same
+result for every page.
+
+The corpus is generated (news articles, document listings and media pages
+with figures, embeds and social links), or read from a directory of saved
+.html files with --corpus.
+
+    python benchmarks/extraction_benchmark.py --pages 200
+    python benchmarks/extraction_benchmark.py --corpus ~/saved_pages
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from scrapers.html_extractor import HTMLExtractor
+
+WORDS = ('navy fleet ship coast guard exercise maritime port command officer training '
+         'review defence harbour patrol vessel crew operation naval base sea').split()
+
+def sentence(rng: random.Random, n: int) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(n)).capitalize() + '.'
+
+def fixture_page(rng: random.Random, n: int) -> str:
+    """A synthetic page of 15-50KB, like the pages a keyword sweep scrapes"""
+    parts = [f'<html><head><title>Report {n}</title><meta name="description" content="{sentence(rng, 12)}">',
+             '<style>body { font-family: sans-serif }</style><script>window.dataLayer = [];</script></head><body>',
+             '<nav><ul>' + ''.join(f'<li><a href="/section/{i}">{rng.choice(WORDS)}</a></li>' for i in range(40)) + '</ul></nav>',
+             f'<div class="hero" style="background-image: url(\'/img/hero{n}.jpg\')"></div>']
+    for section in range(rng.randint(6, 14)):
+        parts.append(f'<h2>{sentence(rng, 5)}</h2>')
+        for _ in range(rng.randint(3, 8)):
+            parts.append(f'<p>{" ".join(sentence(rng, rng.randint(8, 20)) for _ in range(4))} '
+                         f'<a href="https://www.example.gov.in/news/{rng.randint(1, 9999)}">{sentence(rng, 3)}</a></p>')
+        if rng.random() < 0.6:
+            parts.append(f'<figure><img src="/img/{n}-{section}.jpg" width="640" height="360" alt="{sentence(rng, 4)}">'
+                         f'<figcaption>{sentence(rng, 8)}</figcaption></figure>')
+        if rng.random() < 0.3:
+            parts.append('<table>' + ''.join(
+                f'<tr><td><a href="/docs/{n}-{i}.pdf">Annual report {i}</a></td><td>({rng.randint(1, 900)} KB)</td></tr>'
+                for i in range(rng.randint(3, 12))) + '</table>')
+        if rng.random() < 0.15:
+            parts.append(f'<iframe src="https://www.youtube.com/embed/v{n}x{section}" title="{sentence(rng, 3)}"></iframe>')
+        if rng.random() < 0.1:
+            parts.append(f'<video controls poster="/img/p{n}.jpg"><source src="/media/{n}.mp4" type="video/mp4"></video>')
+    parts.append('<footer>' + ''.join(f'<a href="https://{site}/indiannavy">{site}</a>' for site in
+                                      ('twitter.com', 'facebook.com', 'youtube.com', 'instagram.com', 'linkedin.com')))
+    parts.append('<img src="/img/logo.png" width="16" height="16"></footer></body></html>')
+    return '\n'.join(parts)
+
+def legacy_extract(extractor: HTMLExtractor, html: str, url: str) -> dict:
+    """The extraction path before HTMLExtractor: two parses, one find_all per element kind"""
+    soup = BeautifulSoup(html, 'html.parser')
+    for script in soup(["script", "style"]):
+        script.decompose()
+    content = {
+        'title': soup.title.string if soup.title else '',
+        'meta_description': '',
+        'headings': [heading.get_text().strip() for heading in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6'])],
+        'text': soup.get_text().strip(),
+        'links': [urljoin(url, link['href']) for link in soup.find_all('a', href=True)],
+        'images': [{'url': urljoin(url, img['src']), 'alt_text': img.get('alt', ''), 'caption': img.get('title', '')}
+                   for img in soup.find_all('img', src=True)]
+    }
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    if meta_desc:
+        content['meta_description'] = meta_desc.get('content', '')
+
+    soup = BeautifulSoup(html, 'html.parser', multi_valued_attributes=None)
+    media = {'images': [], 'videos': [], 'audio': [], 'documents': [], 'social_media': [], 'external_links': []}
+    for img in soup.find_all('img', src=True):
+        if img['src']:
+            img_data = extractor.process_image_element(img, img.attrs, urljoin(url, img['src']))
+            if img_data:
+                media['images'].append(img_data)
+    for element in soup.find_all(style=True):
+        match = re.search(r'background-image:\s*url\(["\']?([^"\')\s]+)["\']?\)', element.get('style', ''))
+        if match:
+            media['images'].append({'url': urljoin(url, match.group(1)), 'type': 'background_image', 'alt_text': '',
+                                    'title': element.get('title', ''), 'source_tag': 'css_background'})
+    for video in soup.find_all(['video', 'source']):
+        if video.get('src'):
+            media['videos'].append(extractor.process_video_element(video.name, video.attrs, urljoin(url, video['src'])))
+    youtube, vimeo = [], []
+    for iframe in soup.find_all('iframe', src=True):
+        extractor._iframe(iframe.attrs, youtube, [])
+    for iframe in soup.find_all('iframe', src=True):
+        extractor._iframe(iframe.attrs, [], vimeo)
+    media['videos'] += youtube + vimeo
+    for link in soup.find_all('a', href=True):
+        extractor._link(link, link.attrs, urljoin(url, link['href']), link.get_text().strip(), media['documents'], [])
+    for audio in soup.find_all(['audio', 'source']):
+        if audio.get('src'):
+            media['audio'].append(extractor.process_audio_element(audio.name, audio.attrs, urljoin(url, audio['src'])))
+    for link in soup.find_all('a', href=True):
+        extractor._link(link, link.attrs, urljoin(url, link['href']), link.get_text().strip(), [], media['social_media'])
+    content['media'] = media
+    return content
+
+def cpu_per_page(extract, pages, repeat: int) -> float:
+    """Best of `repeat` runs over the corpus, in CPU milliseconds per page"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.process_time()
+        for url, html in pages:
+            extract(html, url)
+        best = min(best, time.process_time() - started)
+    return best / len(pages) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark single-pass HTML extraction')
+    parser.add_argument('--pages', type=int, default=100, help='Generated pages (ignored with --corpus)')
+    parser.add_argument('--corpus', help='Directory of saved .html pages to use instead')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.corpus:
+        pages = []
+        for name in sorted(os.listdir(args.corpus)):
+            if name.endswith(('.html', '.htm')):
+                with open(os.path.join(args.corpus, name), encoding='utf-8', errors='replace') as f:
+                    pages.append((f'https://{os.path.splitext(name)[0]}/', f.read()))
+    else:
+        rng = random.Random(23)
+        pages = [(f'https://site{n % 25}.gov.in/news/{n}', fixture_page(rng, n)) for n in range(args.pages)]
+
+    extractor = HTMLExtractor(backend='html.parser')  # The old path's parser
+    mismatches = [url for url, html in pages
+                  if legacy_extract(extractor, html, url) != {k: v for k, v in extractor.extract(html, url).items() if k != 'anchors'}]
+
+    before = cpu_per_page(lambda html, url: legacy_extract(extractor, html, url), pages, args.repeat)
+    after = cpu_per_page(extractor.extract, pages, args.repeat)
+    size = sum(len(html) for _, html in pages) / len(pages) / 1024
+    print(f"📊 {len(pages)} pages, {size:.0f}KB on average")
+    print(f"\n{'':34}{'CPU ms/page':>12}")
+    print(f"{'two parses + find_all per kind':34}{before:>12.2f}")
+    print(f"{'HTMLExtractor (one walk)':34}{after:>12.2f}")
+    print(f"\nspeed-up: {before / after:.2f}x; pages with different results: {len(mismatches)}")
+    for url in mismatches[:5]:
+        print(f"  ⚠️ {url}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Time to fetch one result page set, one URL at a time versus through the fetch engine.
+
+Hosts are simulated in-process (httpx.MockTransport) with a fixed latency each,
+so the numbers show scheduling only: sequential fetching costs the sum of all
+latencies, the engine roughly the slowest host (plus Crawl-delay spacing for
+hosts that get several URLs).
+
+    python benchmarks/fetch_benchmark.py --hosts 10 --urls 15 --latency 0.5
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from scrapers.fetch_engine import FetchEngine
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the async fetch engine')
+    parser.add_argument('--hosts', type=int, default=10)
+    parser.add_argument('--urls', type=int, default=15, help='Result URLs per page set')
+    parser.add_argument('--latency', type=float, default=0.5, help='Mean response time per host (seconds)')
+    parser.add_argument('--host-delay', type=float, default=1.0, help='Minimum spacing between requests to one host')
+    args = parser.parse_args()
+
+    rng = random.Random(14)
+    latency = {f'site{i}.gov.in': rng.uniform(0.5, 1.5) * args.latency for i in range(args.hosts)}
+    urls = [f'https://site{rng.randrange(args.hosts)}.gov.in/page/{n}' for n in range(args.urls)]
+
+    async def handler(request):
+        if request.url.path == '/robots.txt':
+            return httpx.Response(404)
+        await asyncio.sleep(latency[request.url.host])
+        return httpx.Response(200, text='<html></html>', headers={'content-type': 'text/html'})
+
+    sequential = sum(latency[httpx.URL(url).host] for url in urls)
+
+    engine = FetchEngine(min_host_delay=args.host_delay, transport=httpx.MockTransport(handler), cache=None)
+    started = time.perf_counter()
+    pages = engine.fetch_many(urls)
+    concurrent = time.perf_counter() - started
+    engine.close()
+
+    per_host = {}
+    for url in urls:
+        per_host[httpx.URL(url).host] = per_host.get(httpx.URL(url).host, 0) + 1
+    busiest = max(per_host.values())
+
+    print(f"📊 {len(urls)} URLs on {len(per_host)} hosts (busiest host: {busiest} URLs), {sum(p.ok for p in pages)} fetched")
+    print(f"{'one at a time (sum of latencies)':40}{sequential:>8.2f}s")
+    print(f"{'fetch engine':40}{concurrent:>8.2f}s")
+    print(f"{'slowest host alone':40}{max(latency.values()):>8.2f}s")
+
+if __name__ == "__main__":
+    main()
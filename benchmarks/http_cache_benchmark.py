@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Cost of repeating a keyword sweep with and without the HTTP cache.
+
+Simulated hosts (httpx.MockTransport) serve pages with an ETag; a share of
+them also send Cache-Control max-age, and --changed of the pages change
+between sweeps. The sweep runs twice and the benchmark reports network
+requests, body bytes downloaded and pages that had to be parsed again on
+the second run.
+
+    python benchmarks/http_cache_benchmark.py --urls 200 --changed 0.1
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from scrapers.fetch_engine import FetchEngine
+from scrapers.http_cache import HTTPCache
+
+def sweep(engine: FetchEngine, urls):
+    before = dict(engine.stats)
+    started = time.perf_counter()
+    pages = engine.fetch_many(urls)
+    return {
+        'seconds': time.perf_counter() - started,
+        'requests': engine.stats['requests'] - before['requests'],
+        'bytes': engine.stats['bytes'] - before['bytes'],
+        'parsed': sum(not page.unchanged for page in pages)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the HTTP cache on a repeated sweep')
+    parser.add_argument('--urls', type=int, default=200)
+    parser.add_argument('--page-kb', type=int, default=80)
+    parser.add_argument('--changed', type=float, default=0.1, help='Share of pages that change between sweeps')
+    parser.add_argument('--max-age-share', type=float, default=0.3, help='Share of pages sent with max-age')
+    parser.add_argument('--latency', type=float, default=0.05)
+    args = parser.parse_args()
+
+    rng = random.Random(15)
+    urls = [f'https://site{n % 20}.gov.in/report/{n}' for n in range(args.urls)]
+    version = {url: 1 for url in urls}
+    max_age = {url: rng.random() < args.max_age_share for url in urls}
+    body = b'x' * (args.page_kb * 1024)
+
+    async def handler(request):
+        if request.url.path == '/robots.txt':
+            return httpx.Response(404)
+        await asyncio.sleep(args.latency)
+        url = str(request.url)
+        headers = {'content-type': 'text/html', 'etag': f'"v{version[url]}"'}
+        if max_age[url]:
+            headers['cache-control'] = 'max-age=3600'
+        if request.headers.get('if-none-match') == headers['etag']:
+            return httpx.Response(304, headers=headers)
+        return httpx.Response(200, content=body, headers=headers)
+
+    workdir = tempfile.mkdtemp(prefix='http-cache-bench-')
+    results = {}
+    try:
+        for cached in (False, True):
+            for url in urls:
+                version[url] = 1
+            cache = HTTPCache(os.path.join(workdir, f'cache-{cached}.db')) if cached else None
+            engine = FetchEngine(min_host_delay=0, transport=httpx.MockTransport(handler), cache=cache)
+            sweep(engine, urls)
+            for url in rng.sample(urls, int(len(urls) * args.changed)):
+                version[url] += 1
+            results[cached] = sweep(engine, urls)
+            results[cached]['stats'] = engine.cache_stats()
+            engine.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    plain, cached = results[False], results[True]
+    print(f"📊 second sweep over {args.urls} URLs ({args.changed:.0%} changed, {args.max_age_share:.0%} with max-age)")
+    print(f"\n{'':30}{'no cache':>12}{'cache':>12}")
+    print(f"{'network requests':30}{plain['requests']:>12}{cached['requests']:>12}")
+    print(f"{'body bytes downloaded':30}{plain['bytes']:>12}{cached['bytes']:>12}")
+    print(f"{'pages parsed again':30}{plain['parsed']:>12}{cached['parsed']:>12}")
+    print(f"{'time (s)':30}{plain['seconds']:>12.2f}{cached['seconds']:>12.2f}")
+    print(f"\ncache hit rate (both sweeps): {cached['stats']['hit_rate']}")
+
+if __name__ == "__main__":
+    main()
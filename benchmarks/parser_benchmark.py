@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Extraction throughput per HTML parser backend, in pages per second per core.
+
+Runs HTMLExtractor with each installed backend (scrapers/html_parsers.py) in
+this single process and counts CPU time only, so the figure is what one
+worker core sustains. Results are compared with html.parser's for every page.
+
+The corpus is the extraction benchmark's generated pages, or a directory of
+saved .html files with --corpus.
+
+    python benchmarks/parser_benchmark.py --pages 200
+    python benchmarks/parser_benchmark.py --backends selectolax lxml --corpus ~/saved_pages
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.extraction_benchmark import fixture_page
+from scrapers.html_extractor import HTMLExtractor
+from scrapers.html_parsers import available_backends
+
+def load_corpus(directory: str):
+    pages = []
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(('.html', '.htm')):
+            with open(os.path.join(directory, name), encoding='utf-8', errors='replace') as f:
+                pages.append((f'https://{os.path.splitext(name)[0]}/', f.read()))
+    return pages
+
+def pages_per_second(extractor: HTMLExtractor, pages, repeat: int) -> float:
+    """Best of `repeat` runs over the corpus, in pages per CPU second"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.process_time()
+        for url, html in pages:
+            extractor.extract(html, url)
+        best = min(best, time.process_time() - started)
+    return len(pages) / best
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark HTML parser backends')
+    parser.add_argument('--pages', type=int, default=100, help='Generated pages (ignored with --corpus)')
+    parser.add_argument('--corpus', help='Directory of saved .html pages to use instead')
+    parser.add_argument('--backends', nargs='+', default=available_backends(), help='Backends to compare')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if args.corpus:
+        pages = load_corpus(args.corpus)
+    else:
+        rng = random.Random(23)
+        pages = [(f'https://site{n % 25}.gov.in/news/{n}', fixture_page(rng, n)) for n in range(args.pages)]
+
+    missing = [name for name in args.backends if name not in available_backends()]
+    if missing:
+        print(f"⚠️ Not installed: {', '.join(missing)}")
+    backends = [name for name in args.backends if name in available_backends()]
+
+    reference = HTMLExtractor(backend='html.parser')
+    expected = [reference.extract(html, url) for url, html in pages]
+    size = sum(len(html) for _, html in pages) / len(pages) / 1024
+    print(f"📊 {len(pages)} pages, {size:.0f}KB on average")
+    print(f"\n{'backend':14}{'pages/s/core':>14}{'ms/page':>10}{'vs html.parser':>16}{'differ':>8}")
+
+    baseline = None
+    for name in ['html.parser'] + [b for b in backends if b != 'html.parser']:
+        extractor = reference if name == 'html.parser' else HTMLExtractor(backend=name)
+        rate = pages_per_second(extractor, pages, args.repeat)
+        baseline = baseline or rate
+        differ = sum(extractor.extract(html, url) != result for (url, html), result in zip(pages, expected))
+        print(f"{name:14}{rate:>14.1f}{1000 / rate:>10.2f}{rate / baseline:>15.2f}x{differ:>8}")
+
+if __name__ == "__main__":
+    main()
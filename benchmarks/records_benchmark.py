@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""Memory per document and media-gallery normalization cost, before and after typed records.
+
+Builds synthetic documents in the shapes the scrapers produce (google_dorker
+media dicts, OSINT 'alt' images and {'url', 'text'} document links, bare URL
+strings for videos) and compares:
+  - memory held per document: raw scraper dicts, canonical stored dicts and
+    slotted WebContentRecord objects (tracemalloc)
+  - the /api/media-data loop: the old per-item shape checks on raw documents
+    against the new loop on canonical documents
+
+    python benchmarks/records_benchmark.py --documents 2000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database.models import WebContentRecord, canonical_media, normalize_document
+
+def raw_document(i: int, rng: random.Random) -> dict:
+    domain = f'site{i % 50}.gov.in'
+    osint_shape = rng.random() < 0.3
+    images = [
+        ({'url': f'https://{domain}/img/{n}.jpg', 'alt': 'ship', 'title': ''} if osint_shape else
+         {'url': f'https://{domain}/img/{n}.jpg', 'type': 'image', 'alt_text': 'ship', 'title': '',
+          'width': '640', 'height': '480', 'caption': '', 'filename': f'{n}.jpg', 'source_tag': 'img',
+          'class': 'gallery-item wide', 'lazy_loading': True})
+        for n in range(rng.randint(0, 25))
+    ]
+    videos = [
+        (f'https://{domain}/v/{n}.mp4' if osint_shape else
+         {'url': f'https://www.youtube.com/embed/{n}', 'type': 'youtube_embed', 'video_id': str(n),
+          'title': 'Exercise', 'platform': 'youtube', 'thumbnail': f'https://img.youtube.com/vi/{n}/0.jpg'})
+        for n in range(rng.randint(0, 4))
+    ]
+    documents = [
+        ({'url': f'https://{domain}/d/{n}.pdf', 'text': 'Annual report'} if osint_shape else
+         {'url': f'https://{domain}/d/{n}.pdf', 'filename': f'{n}.pdf', 'type': 'pdf', 'link_text': 'Report',
+          'file_size': '', 'description': 'Annual report'})
+        for n in range(rng.randint(0, 6))
+    ]
+    return {
+        'url': f'https://{domain}/page/{i}',
+        'domain': domain,
+        'title': f'Page {i}',
+        'meta_description': 'Navy news',
+        'content': {'text': 'text ' * 200, 'headings': ['News'] * 5, 'links': [f'https://{domain}/{n}' for n in range(30)]},
+        'media': {'images': images, 'videos': videos, 'audio': [], 'documents': documents,
+                  'social_media': [], 'external_links': []},
+        'metadata': {'trust_score': 8.0, 'content_type': 'text/html'},
+        'search_metadata': {'search_engine': 'google_dork', 'data_type': 'traditional_scraping'}
+    }
+
+def held_bytes(build) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return after - before
+
+def old_media_loop(docs):
+    """The /api/media-data loop before canonical records (per-item shape checks and fallbacks)"""
+    items = {'images': [], 'videos': [], 'documents': []}
+    for doc in docs:
+        media = doc.get('media', {})
+        for img in media.get('images', []):
+            items['images'].append({
+                'url': img.get('url', ''), 'alt': img.get('alt_text', img.get('alt', '')),
+                'title': img.get('title', ''), 'source_url': doc.get('url', ''),
+                'source_title': doc.get('title', 'Unknown'), 'domain': doc.get('domain', 'unknown'),
+                'discovery_date': doc.get('inserted_at', ''),
+                'search_engine': doc.get('search_metadata', {}).get('search_engine', 'unknown')
+            })
+        for video in media.get('videos', []):
+            if isinstance(video, dict):
+                items['videos'].append({
+                    'url': video.get('url', ''), 'title': video.get('title', ''), 'type': video.get('type', 'video'),
+                    'platform': video.get('platform', 'unknown'), 'thumbnail': video.get('thumbnail', ''),
+                    'source_url': doc.get('url', ''), 'source_title': doc.get('title', 'Unknown'),
+                    'domain': doc.get('domain', 'unknown'), 'discovery_date': doc.get('inserted_at', ''),
+                    'search_engine': doc.get('search_metadata', {}).get('search_engine', 'unknown')
+                })
+            else:
+                items['videos'].append({
+                    'url': video, 'title': 'Video', 'type': 'video', 'platform': 'unknown',
+                    'source_url': doc.get('url', ''), 'source_title': doc.get('title', 'Unknown'),
+                    'domain': doc.get('domain', 'unknown'), 'discovery_date': doc.get('inserted_at', ''),
+                    'search_engine': doc.get('search_metadata', {}).get('search_engine', 'unknown')
+                })
+        for document in media.get('documents', []):
+            if isinstance(document, dict):
+                items['documents'].append({
+                    'url': document.get('url', ''), 'filename': document.get('filename', document.get('text', 'Document')),
+                    'type': document.get('type', 'pdf'), 'file_size': document.get('file_size', ''),
+                    'source_url': doc.get('url', ''), 'source_title': doc.get('title', 'Unknown'),
+                    'domain': doc.get('domain', 'unknown'), 'discovery_date': doc.get('inserted_at', ''),
+                    'search_engine': doc.get('search_metadata', {}).get('search_engine', 'unknown')
+                })
+    return items
+
+def new_media_loop(docs):
+    """The /api/media-data loop on canonical documents"""
+    items = {'images': [], 'videos': [], 'documents': []}
+    for doc in docs:
+        media = canonical_media(doc)
+        source = {
+            'source_url': doc.get('url', ''), 'source_title': doc.get('title', 'Unknown'),
+            'domain': doc.get('domain', 'unknown'), 'discovery_date': doc.get('inserted_at', ''),
+            'search_engine': doc.get('search_metadata', {}).get('search_engine', 'unknown')
+        }
+        for img in media['images']:
+            items['images'].append({'url': img['url'], 'alt': img['alt_text'], 'title': img['title'], **source})
+        for video in media['videos']:
+            items['videos'].append({'url': video['url'], 'title': video['title'] or 'Video', 'type': video['type'],
+                                    'platform': video['platform'], 'thumbnail': video['thumbnail'], **source})
+        for document in media['documents']:
+            items['documents'].append({'url': document['url'], 'filename': document['filename'] or 'Document',
+                                       'type': document['type'], 'file_size': document['file_size'], **source})
+    return items
+
+def timed(function, docs, repeat: int = 5) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(docs)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark typed document records')
+    parser.add_argument('--documents', type=int, default=2000)
+    args = parser.parse_args()
+
+    rng = random.Random(11)
+    raw = [raw_document(i, rng) for i in range(args.documents)]
+    canonical = [normalize_document(raw_document(i, random.Random(i))) for i in range(args.documents)]
+
+    count = args.documents
+    raw_bytes = held_bytes(lambda: [raw_document(i, random.Random(i)) for i in range(count)])
+    canonical_bytes = held_bytes(lambda: [normalize_document(raw_document(i, random.Random(i))) for i in range(count)])
+    record_bytes = held_bytes(lambda: [WebContentRecord.from_document(raw_document(i, random.Random(i))) for i in range(count)])
+
+    print(f"📊 {count} documents")
+    print(f"\n{'memory per document':36}{'bytes':>10}")
+    print(f"{'  raw scraper dicts':36}{raw_bytes / count:>10.0f}")
+    print(f"{'  canonical stored dicts':36}{canonical_bytes / count:>10.0f}")
+    print(f"{'  slotted WebContentRecord':36}{record_bytes / count:>10.0f}")
+
+    started = time.perf_counter()
+    for i in range(count):
+        normalize_document(raw_document(i, random.Random(i)))
+    build_ms = (time.perf_counter() - started) * 1000
+
+    old_ms = timed(old_media_loop, raw)
+    new_ms = timed(new_media_loop, canonical)
+    print(f"\n{'media gallery loop':36}{'ms':>10}")
+    print(f"{'  before (shape checks per item)':36}{old_ms:>10.1f}")
+    print(f"{'  after (canonical documents)':36}{new_ms:>10.1f}")
+    print(f"{'  one-time normalization at write':36}{build_ms:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Dashboard query cost with and without a hot-window retention policy.
+
+Loads synthetic documents spread over a year into the SQLite backend, then
+times a dashboard-style aggregate (documents, media and trust per domain over
+the latest versions) on the full store, archives everything older than
+--hot-days and times the same aggregate on the hot store. Also reports the
+archive time, archive size and store size before and after.
+
+    python benchmarks/retention_benchmark.py                    # 1,000,000 documents
+    python benchmarks/retention_benchmark.py --documents 50000
+"""
+
+import argparse
+import os
+import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Config
+from database.json_db import JSONDatabase, LATEST_ONLY
+from database.retention import RetentionManager, RollupStore
+
+QUERY_PROJECTION = {'_id': 0, 'domain': 1, 'metadata.trust_score': 1, 'metadata.media_count': 1}
+
+def synthetic_document(i: int, now: datetime, days: int, rng: random.Random) -> dict:
+    domain = f'site{rng.randint(0, 499)}.gov.in'
+    crawl_date = now - timedelta(days=rng.random() * days)
+    return {
+        'id': str(uuid.uuid4()),
+        'url': f'https://{domain}/page/{i}',
+        'canonical_url': f'https://{domain}/page/{i}',
+        'domain': domain,
+        'title': f'Page {i}',
+        'content': {'text': 'naval exercise report ' * rng.randint(10, 60), 'headings': ['News'], 'links': []},
+        'metadata': {
+            'crawl_date': crawl_date.isoformat(),
+            'trust_score': round(rng.uniform(3, 10), 1),
+            'media_count': {'images': rng.randint(0, 12), 'videos': rng.randint(0, 2), 'documents': rng.randint(0, 3)}
+        },
+        'search_metadata': {'data_type': rng.choice(['traditional_scraping', 'osint_intelligence'])},
+        'content_analysis': {'content_hash': str(i)},
+        'version': 1, 'is_latest': True, 'last_seen': crawl_date.isoformat(), 'schema_version': 2
+    }
+
+def dashboard_aggregate(db: JSONDatabase) -> float:
+    """Per-domain documents, images and trust over latest versions; returns ms"""
+    started = time.perf_counter()
+    documents, images, trust = Counter(), Counter(), Counter()
+    for document in db.find_documents(LATEST_ONLY, projection=QUERY_PROJECTION, batch_size=2000):
+        domain = document.get('domain')
+        metadata = document.get('metadata', {})
+        documents[domain] += 1
+        images[domain] += metadata.get('media_count', {}).get('images', 0)
+        trust[domain] += metadata.get('trust_score', 0)
+    return (time.perf_counter() - started) * 1000
+
+def directory_bytes(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark hot-window retention')
+    parser.add_argument('--documents', type=int, default=1_000_000)
+    parser.add_argument('--days', type=int, default=365, help='Crawl dates are spread over this many days')
+    parser.add_argument('--hot-days', type=int, default=30)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='retention-bench-')
+    Config.SQLITE_PATH = os.path.join(workdir, 'content.db')
+    Config.BLOB_DIR = os.path.join(workdir, 'blobs')
+    db = JSONDatabase(backend='sqlite')
+    try:
+        rng = random.Random(12)
+        now = datetime.now()
+        started = time.perf_counter()
+        batch = []
+        for i in range(args.documents):
+            batch.append(synthetic_document(i, now, args.days, rng))
+            if len(batch) == 5000:
+                db.sqlite.put_many(batch)
+                batch = []
+        db.sqlite.put_many(batch)
+        print(f"📊 Loaded {args.documents} documents over {args.days} days in {time.perf_counter() - started:.1f}s")
+
+        store_before = os.path.getsize(Config.SQLITE_PATH)
+        before_ms = dashboard_aggregate(db)
+
+        manager = RetentionManager(db, hot_days=args.hot_days, archive_dir=os.path.join(workdir, 'archive'),
+                                   batch_size=5000, rollups=RollupStore(db, os.path.join(workdir, 'rollups.json')))
+        started = time.perf_counter()
+        result = manager.archive(now)
+        archive_s = time.perf_counter() - started
+
+        # SQLite keeps freed pages until VACUUM
+        with sqlite3.connect(Config.SQLITE_PATH) as connection:
+            connection.execute('VACUUM')
+        store_after = os.path.getsize(Config.SQLITE_PATH)
+        after_ms = dashboard_aggregate(db)
+
+        print(f"\n{'':34}{'before':>14}{'after':>14}")
+        print(f"{'hot documents':34}{args.documents:>14}{args.documents - result['archived']:>14}")
+        print(f"{'dashboard aggregate (ms)':34}{before_ms:>14.0f}{after_ms:>14.0f}")
+        print(f"{'hot store (MB)':34}{store_before / 2 ** 20:>14.1f}{store_after / 2 ** 20:>14.1f}")
+        print(f"\n🗄️ Archived {result['archived']} documents into {len(result['months'])} monthly files "
+              f"({directory_bytes(manager.archive_dir) / 2 ** 20:.1f} MB) in {archive_s:.1f}s; "
+              f"{result['rollup_days']} days rolled up")
+    finally:
+        db.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
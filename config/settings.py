@@ -8,10 +8,119 @@ class Config:
     # Database settings
     MONGODB_URL = os.getenv('MONGODB_URL', 'mongodb://localhost:27017/')
     DATABASE_NAME = os.getenv('DATABASE_NAME', 'web_scraper_db')
+    AUTO_CREATE_INDEXES = os.getenv('AUTO_CREATE_INDEXES', 'true').lower() == 'true'
+    
+    # MongoDB connection pool (one shared client per URL, see database/connection.py)
+    MONGODB_MAX_POOL_SIZE = int(os.getenv('MONGODB_MAX_POOL_SIZE', 50))
+    MONGODB_MIN_POOL_SIZE = int(os.getenv('MONGODB_MIN_POOL_SIZE', 5))  # Kept open even when idle
+    MONGODB_MAX_IDLE_TIME_MS = int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', 300000))
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv('MONGODB_WAIT_QUEUE_TIMEOUT_MS', 10000))  # Max wait for a free connection
+    MONGODB_CONNECT_TIMEOUT_MS = int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', 5000))
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGODB_SOCKET_TIMEOUT_MS = int(os.getenv('MONGODB_SOCKET_TIMEOUT_MS', 0))  # 0 = no timeout
+    MONGODB_COMPRESSORS = os.getenv('MONGODB_COMPRESSORS', 'zstd,snappy,zlib')  # Wire compression, in preference order
+    MONGODB_WARM_POOL = os.getenv('MONGODB_WARM_POOL', 'true').lower() == 'true'
+    
+    # Storage backend for the CLI and dashboard: mongodb, file or sqlite
+    DATABASE_BACKEND = os.getenv('DATABASE_BACKEND', 'mongodb')
+    SQLITE_PATH = os.getenv('SQLITE_PATH', 'data/scraped_content.db')
+    
+    # File storage settings (append-only segments)
+    SEGMENTS_DIR = os.getenv('SEGMENTS_DIR', 'data/segments')
+    SEGMENT_MAX_BYTES = int(os.getenv('SEGMENT_MAX_BYTES', 64 * 1024 * 1024))
+    SEGMENT_COMPACTION_RATIO = 0.5  # Compact once half of the bytes are dead
+    
+    # Transparent compression of large fields (content.text, headings, links)
+    COMPRESS_LARGE_FIELDS = os.getenv('COMPRESS_LARGE_FIELDS', 'true').lower() == 'true'
+    COMPRESSION_CODEC = os.getenv('COMPRESSION_CODEC', 'zlib')  # zlib, or zstd (needs zstandard)
+    COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', 1024))  # Smaller values stay plain
+    COMPRESSION_DICT_DIR = 'data/compression'  # Trained zstd dictionaries
+    
+    # Page bodies (content.text, headings, links) live in a content-addressed blob store (database/blob_store.py)
+    CONTENT_BLOBS = os.getenv('CONTENT_BLOBS', 'true').lower() == 'true'
+    BLOB_STORE = os.getenv('BLOB_STORE', 'auto')  # auto: GridFS with MongoDB, a local directory otherwise; local
+    BLOB_DIR = 'data/blobs'
+    BLOB_MIN_BYTES = int(os.getenv('BLOB_MIN_BYTES', 512))  # Smaller bodies stay in the document, uncompressed
+    
+    # Parquet metadata export for analytics (database/parquet_export.py)
+    PARQUET_DIR = 'data/parquet'
+    PARQUET_EXPORT_BATCH_SIZE = 10000  # Rows per written file (per crawl day)
+    PARQUET_EXPORT_LAG = 300  # Seconds behind the mark re-scanned each run (writes stamped before a concurrent export)
+    PARQUET_EXPORT_INTERVAL = 300  # Seconds between background exports in the dashboard
+    
+    # Retention: documents older than the hot window move to monthly gzip archives (database/retention.py)
+    HOT_RETENTION_DAYS = int(os.getenv('HOT_RETENTION_DAYS', 90))  # 0 keeps everything hot
+    ARCHIVE_DIR = 'data/archive'
+    ROLLUPS_FILE = 'data/rollups.json'  # Per-domain daily roll-ups for the file and sqlite backends
+    RETENTION_BATCH_SIZE = 1000  # Documents archived per round trip
+    RETENTION_INTERVAL = 24 * 3600  # Seconds between background retention runs
+    
+    # Write-behind buffer settings
+    WRITE_BUFFER_MAX_SIZE = int(os.getenv('WRITE_BUFFER_MAX_SIZE', 50))  # Flush after this many documents
+    WRITE_BUFFER_MAX_AGE = float(os.getenv('WRITE_BUFFER_MAX_AGE', 5.0))  # ...or after this many seconds
+    
+    # Async writer (dashboard): bounded queue in front of the database
+    ASYNC_WRITER_QUEUE_SIZE = int(os.getenv('ASYNC_WRITER_QUEUE_SIZE', 1000))  # Producers block when full
+    ASYNC_WRITER_CONCURRENCY = int(os.getenv('ASYNC_WRITER_CONCURRENCY', 2))  # Batches written in parallel
+    ASYNC_WRITER_MAX_RETRY_DELAY = 30.0  # Backoff cap while the database is unreachable
+    
+    # Shared async fetch engine used by every scraper's scrape_url/scrape_urls (scrapers/fetch_engine.py)
+    FETCH_MAX_CONCURRENCY = int(os.getenv('FETCH_MAX_CONCURRENCY', 16))  # Requests in flight overall
+    FETCH_PER_HOST_CONCURRENCY = int(os.getenv('FETCH_PER_HOST_CONCURRENCY', 2))  # ...and per host
+    FETCH_MIN_HOST_DELAY = float(os.getenv('FETCH_MIN_HOST_DELAY', 1.0))  # Seconds between requests to one host
+    HOST_BURST = int(os.getenv('HOST_BURST', 1))  # Requests a host may get back to back (token bucket size)
+    FETCH_RESPECT_CRAWL_DELAY = True  # Use a longer robots.txt Crawl-delay when a host sets one
+    FETCH_MAX_CRAWL_DELAY = 60.0  # Upper bound on a host's Crawl-delay
+    FETCH_TIMEOUT = 20.0
+    FETCH_MAX_HTML_BYTES = int(os.getenv('FETCH_MAX_HTML_BYTES', 2 * 1024 * 1024))  # HTML/text bodies are cut off here
+    FETCH_MAX_BINARY_BYTES = int(os.getenv('FETCH_MAX_BINARY_BYTES', 64 * 1024))  # PDFs, images...: size from Content-Length
+    FETCH_RETRY_ATTEMPTS = int(os.getenv('FETCH_RETRY_ATTEMPTS', 3))  # Tries per URL, including the first
+    FETCH_RETRY_BASE_DELAY = 1.0  # Backoff before retry n: random 0..base * 2^(n-1) seconds
+    FETCH_RETRY_MAX_DELAY = 30.0  # Cap on backoff and on a server's Retry-After
+    FETCH_RETRY_STATUSES = (429, 500, 502, 503, 504)
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv('BREAKER_FAILURE_THRESHOLD', 5))  # Consecutive failures/timeouts to open
+    BREAKER_COOLDOWN = float(os.getenv('BREAKER_COOLDOWN', 120))  # Seconds a host fails fast before a probe
+
+    # On-disk HTTP cache below the fetch engine: fresh hits skip the network, stale ones revalidate (scrapers/http_cache.py)
+    HTTP_CACHE_ENABLED = os.getenv('HTTP_CACHE_ENABLED', 'true').lower() == 'true'
+    HTTP_CACHE_PATH = 'data/http_cache.db'
+    HTTP_CACHE_MAX_BYTES = int(os.getenv('HTTP_CACHE_MAX_BYTES', 512 * 1024 * 1024))  # LRU eviction above this
+    HTTP_CACHE_HEURISTIC_MAX = 86400  # Cap on Last-Modified heuristic freshness (seconds)
+
+    # Shared headless browser pool for JavaScript rendering (scrapers/browser_pool.py)
+    BROWSER_POOL_SIZE = int(os.getenv('BROWSER_POOL_SIZE', min(8, os.cpu_count() or 2)))  # Warm contexts = pages rendered at once
+    BROWSER_CONTEXT_MAX_PAGES = int(os.getenv('BROWSER_CONTEXT_MAX_PAGES', 50))  # Recycle a context after this many pages
+    BROWSER_CONTEXT_MAX_HEAP_MB = 256  # ...or once its JS heap grows past this
+    BROWSER_LEASE_TIMEOUT = 60.0  # Seconds to wait for a free context
+    BROWSER_PAGE_TIMEOUT = 30.0  # Navigation timeout per page
+    BROWSER_BLOCKED_RESOURCES = ('image', 'font', 'stylesheet', 'media')  # Aborted by request interception; () loads everything
+
+    # Static-first rendering: fetch HTML over HTTP, use the browser only for JavaScript shells (scrapers/render_decision.py)
+    RENDER_STATIC_FIRST = os.getenv('RENDER_STATIC_FIRST', 'true').lower() == 'true'
+    RENDER_MIN_TEXT_CHARS = 200  # Less visible text than this (plus framework/script signs) means a shell
+    RENDER_WAIT_UNTIL = 'networkidle'  # Escalated pages: wait for network idle after DOM ready...
+    RENDER_IDLE_TIMEOUT = 5.0  # ...but no longer than this (pages that keep polling)
+
+    # HTML parser for content extraction (scrapers/html_parsers.py): 'selectolax', 'lxml', 'html.parser', or 'auto' for the fastest installed
+    HTML_PARSER = os.getenv('HTML_PARSER', 'auto')
+
+    # Crawl frontier: canonical URLs fetched within the freshness window are not fetched again (scrapers/frontier.py)
+    FRONTIER_DIR = 'data/frontier'
+    FRONTIER_FRESHNESS_HOURS = float(os.getenv('FRONTIER_FRESHNESS_HOURS', 24))
+    FRONTIER_ERROR_RATE = float(os.getenv('FRONTIER_ERROR_RATE', 0.001))  # Bloom filter false positives (pages wrongly skipped)
+    FRONTIER_INITIAL_CAPACITY = 100000  # URLs per filter before it grows
+    FRONTIER_GENERATIONS = 4  # Filters covering the window; one expires at a time
+    FRONTIER_BATCH_SIZE = 15  # Results scraped per engine and sweep
+    FRONTIER_SOURCE_WEIGHTS = {'google_dork': 0.5, 'duckduckgo': 0.3, 'twitter_dork': 0.0, 'youtube_dork': 0.0}
     
     # Scraping settings (enhanced for dorking)
     MIN_REQUEST_DELAY = 15  # Minimum delay in seconds
     MAX_REQUEST_DELAY = 30  # Maximum delay in seconds
+    # (min, max) seconds between queries to a search engine; all of its domains share one bucket (scrapers/rate_limiter.py)
+    SEARCH_ENGINE_PACING = {
+        'google': (MIN_REQUEST_DELAY + 3, MAX_REQUEST_DELAY + 7),
+        'duckduckgo': (5.0, 11.0)
+    }
     CONCURRENT_REQUESTS = 1  # Only 1 request at a time
     MAX_REQUESTS_PER_SESSION = 3  # Rotate session frequently
     ROTATE_USER_AGENTS = True
@@ -0,0 +1,293 @@
+import asyncio
+import atexit
+import concurrent.futures
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, List, Optional
+from pymongo.errors import BulkWriteError, ConnectionFailure, ExecutionTimeout, WTimeoutError
+from config.settings import Config
+
+# Errors worth retrying: the server is unreachable or slow
+TRANSIENT_ERRORS = (ConnectionFailure, ExecutionTimeout, WTimeoutError)
+
+# SQLite OperationalErrors that clear up on their own; a missing table, a full disk or a
+# read-only file would fail forever
+SQLITE_TRANSIENT_MESSAGES = ('database is locked', 'busy')
+
+DUPLICATE_KEY = 11000
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, sqlite3.OperationalError):
+        message = str(error).lower()
+        return any(text in message for text in SQLITE_TRANSIENT_MESSAGES)
+    return isinstance(error, TRANSIENT_ERRORS)
+
+def already_written(write_error: Dict) -> bool:
+    """A duplicate key on id_unique: an earlier attempt at this batch wrote the document.
+
+    Duplicates on other unique indexes (canonical_url_latest: another writer
+    stored a new version of the page first) are real failures.
+    """
+    return write_error.get('code') == DUPLICATE_KEY and (
+        write_error.get('keyPattern') == {'id': 1} or 'id_unique' in write_error.get('errmsg', ''))
+
+def only_duplicates(error: Exception) -> bool:
+    """A bulk write whose only errors are duplicate ids, i.e. a retried batch that had already landed"""
+    if not isinstance(error, BulkWriteError):
+        return False
+    details = error.details or {}
+    write_errors = details.get('writeErrors', [])
+    return bool(write_errors) and not details.get('writeConcernErrors') and all(map(already_written, write_errors))
+
+def failed_documents(error: Exception, batch: List[Dict]) -> List[Dict]:
+    """The documents of a batch that a write error is about.
+
+    For an unordered BulkWriteError these are the documents whose insert is
+    named in writeErrors, other than ids an earlier attempt already wrote;
+    the rest of the batch was written. Any other error, or one naming no
+    document of the batch (the step that retires old versions failed before
+    anything was inserted), covers the whole batch.
+    """
+    if not isinstance(error, BulkWriteError) or (error.details or {}).get('writeConcernErrors'):
+        return batch
+    write_errors = [e for e in (error.details or {}).get('writeErrors', []) if not already_written(e)]
+    if not write_errors:
+        return []
+    named = {(e.get('op') or {}).get('id') for e in write_errors}
+    return [doc for doc in batch if doc.get('id') in named] or batch
+
+class AsyncDocumentWriter:
+    """Asyncio writer service with a bounded queue between producers and the database.
+
+    An event loop in a background thread runs `concurrency` workers. Each
+    worker takes up to `batch_size` documents from the queue (waiting at most
+    `max_age` seconds to fill a batch) and writes them with db.insert_many in
+    a thread pool, so the blocking driver never runs on the loop. When the
+    queue is full, `add` blocks the calling thread until there is room, so a
+    stalled database slows producers down instead of growing memory: at most
+    queue_size + concurrency * batch_size documents are held at any time.
+
+    Batches failing with a transient error (connection loss, timeouts, a
+    locked or busy SQLite file) are retried with exponential backoff until they are
+    written or the writer is closed; other errors go to
+    `on_error(exception, documents)`.
+    """
+
+    LATENCY_WINDOW = 500  # Batches kept for latency percentiles
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, db, queue_size: int = None, batch_size: int = None, max_age: float = None,
+                 concurrency: int = None, max_retry_delay: float = None,
+                 on_error: Optional[Callable[[Exception, List[Dict]], None]] = None):
+        self.db = db
+        self.queue_size = queue_size or Config.ASYNC_WRITER_QUEUE_SIZE
+        self.batch_size = batch_size or Config.WRITE_BUFFER_MAX_SIZE
+        self.max_age = max_age or Config.WRITE_BUFFER_MAX_AGE
+        self.concurrency = concurrency or Config.ASYNC_WRITER_CONCURRENCY
+        self.max_retry_delay = max_retry_delay or Config.ASYNC_WRITER_MAX_RETRY_DELAY
+        self.on_error = on_error or self._print_error
+
+        self._closed = False
+        self._flushing = 0
+        self._in_flight: Dict[int, List[Dict]] = {}
+        self._latencies = deque(maxlen=self.LATENCY_WINDOW)
+        self._stats_lock = threading.Lock()
+        self._counters = {
+            'enqueued': 0, 'written': 0, 'failed': 0, 'dropped': 0, 'batches': 0, 'retries': 0,
+            'producer_waits': 0, 'producer_wait_seconds': 0.0
+        }
+
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=self.concurrency, thread_name_prefix='db-writer'
+        )
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        atexit.register(self.close)
+
+    # -------------------------------------------------------------- producers
+
+    def add(self, document: Dict, timeout: Optional[float] = None) -> str:
+        """Queue a document and return its id; blocks while the queue is full.
+
+        The id is the one the document is stored under if it is new or a new
+        version; a page already stored with the same content keeps the stored
+        version's id (see JSONDatabase.upsert_many). Raises TimeoutError if
+        there is still no room after `timeout` seconds.
+        """
+        if self._closed:
+            raise RuntimeError("AsyncDocumentWriter is closed")
+        self.db.prepare_document(document)
+
+        started = time.monotonic()
+        future = asyncio.run_coroutine_threadsafe(self._queue.put(document), self._loop)
+        try:
+            future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            # The put may have completed just as the wait timed out
+            if future.cancel():
+                raise TimeoutError(f"Write queue full ({self.queue_size} documents) for {timeout}s")
+
+        waited = time.monotonic() - started
+        with self._stats_lock:
+            self._counters['enqueued'] += 1
+            if waited > self.POLL_INTERVAL:
+                self._counters['producer_waits'] += 1
+                self._counters['producer_wait_seconds'] += waited
+
+        return document['id']
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Write everything queued so far; False if it did not finish within timeout"""
+        if self._closed:
+            return not self._pending_documents()
+
+        with self._stats_lock:
+            self._flushing += 1
+        try:
+            future = asyncio.run_coroutine_threadsafe(self._queue.join(), self._loop)
+            try:
+                future.result(timeout)
+                return True
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                return False
+        finally:
+            with self._stats_lock:
+                self._flushing -= 1
+
+    # ------------------------------------------------------------------ loop
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self._loop)
+        # Created inside the loop thread so the queue binds to this loop
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [self._loop.create_task(self._worker(n)) for n in range(self.concurrency)]
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _worker(self, worker_no: int):
+        while True:
+            batch = [await self._queue.get()]
+            self._in_flight[worker_no] = batch
+            try:
+                await self._fill_batch(batch)
+                await self._write(batch)
+            finally:
+                self._in_flight.pop(worker_no, None)
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _fill_batch(self, batch: List[Dict]):
+        """Top a batch up to batch_size, waiting at most max_age (less when flushing)"""
+        deadline = self._loop.time() + self.max_age
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+
+            if self._flushing or self._closed or self._loop.time() >= deadline:
+                return
+            # Polling rather than wait_for(get()) so a timed-out get can never swallow a document
+            await asyncio.sleep(self.POLL_INTERVAL)
+
+    async def _write(self, batch: List[Dict]):
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                await self._loop.run_in_executor(self._executor, self.db.insert_many, batch, True)
+            except Exception as e:
+                if only_duplicates(e):
+                    pass
+                elif is_transient(e) and not self._closed:
+                    attempt += 1
+                    delay = min(self.max_retry_delay, 0.5 * 2 ** (attempt - 1))
+                    with self._stats_lock:
+                        self._counters['retries'] += 1
+                    print(f"⚠️ Storage unavailable ({e}); retrying {len(batch)} documents in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+                    continue
+                else:
+                    failed = failed_documents(e, batch)
+                    with self._stats_lock:
+                        self._counters['failed'] += len(failed)
+                        self._counters['written'] += len(batch) - len(failed)
+                    if failed:
+                        await self._loop.run_in_executor(self._executor, self.on_error, e, failed)
+                    return
+
+            with self._stats_lock:
+                self._latencies.append(time.monotonic() - started)
+                self._counters['written'] += len(batch)
+                self._counters['batches'] += 1
+            return
+
+    # --------------------------------------------------------------- metrics
+
+    def _pending_documents(self) -> int:
+        return self._queue.qsize() + sum(len(batch) for batch in list(self._in_flight.values()))
+
+    @property
+    def stats(self) -> Dict:
+        """Queue depth, throughput counters and write latency (ms) over recent batches"""
+        with self._stats_lock:
+            stats = dict(self._counters)
+            latencies = sorted(self._latencies)
+
+        stats['producer_wait_seconds'] = round(stats['producer_wait_seconds'], 3)
+        stats['queue_depth'] = self._queue.qsize()
+        stats['queue_capacity'] = self.queue_size
+        stats['in_flight'] = sum(len(batch) for batch in list(self._in_flight.values()))
+        stats['concurrency'] = self.concurrency
+
+        if latencies:
+            stats['write_latency_ms'] = {
+                'p50': round(latencies[len(latencies) // 2] * 1000, 1),
+                'p95': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))] * 1000, 1),
+                'max': round(latencies[-1] * 1000, 1)
+            }
+        else:
+            stats['write_latency_ms'] = {'p50': None, 'p95': None, 'max': None}
+        return stats
+
+    # -------------------------------------------------------------- shutdown
+
+    def close(self, timeout: float = 30.0):
+        """Drain the queue (waiting at most timeout seconds) and stop the loop.
+
+        Documents still queued or being retried after the timeout are handed to
+        on_error so they are at least reported.
+        """
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+
+        async def stop():
+            leftover = [doc for batch in self._in_flight.values() for doc in batch]
+            for worker in self._workers:
+                worker.cancel()
+            await asyncio.gather(*self._workers, return_exceptions=True)
+            while not self._queue.empty():
+                leftover.append(self._queue.get_nowait())
+            return leftover
+
+        leftover = asyncio.run_coroutine_threadsafe(stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False)
+
+        if leftover:
+            with self._stats_lock:
+                self._counters['dropped'] += len(leftover)
+            self.on_error(TimeoutError(f"Writer closed with {len(leftover)} unwritten documents"), leftover)
+
+    def _print_error(self, error: Exception, documents: List[Dict]):
+        print(f"❌ Failed to write {len(documents)} queued documents: {error}")
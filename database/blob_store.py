@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+
+import argparse
+import hashlib
+import json
+import os
+import time
+import zlib
+from typing import Dict, Iterator, Optional, Tuple
+from config.settings import Config
+
+# Stored documents reference their page body as {'sha256': key, 'bytes': size}
+BLOB_REF = 'content_blob'
+
+class LocalBlobStore:
+    """Content-addressed blobs in a directory: <dir>/ab/cd/<sha256>"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key[2:4], key)
+
+    def put(self, key: str, data: bytes):
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def keys(self) -> Iterator[Tuple[str, float]]:
+        """(key, creation time) of every stored blob"""
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith('.tmp'):
+                    yield name, os.path.getmtime(os.path.join(root, name))
+
+class GridFSBlobStore:
+    """Content-addressed blobs in GridFS (bucket content_blobs), keyed by _id"""
+
+    def __init__(self, database, bucket: str = 'content_blobs'):
+        import gridfs
+        self.fs = gridfs.GridFS(database, collection=bucket)
+        self.files = database[f'{bucket}.files']
+
+    def put(self, key: str, data: bytes):
+        from gridfs.errors import FileExists
+        if self.fs.exists(key):
+            return
+        try:
+            self.fs.put(data, _id=key)
+        except FileExists:
+            pass  # Written concurrently by another writer; same key, same bytes
+
+    def get(self, key: str) -> Optional[bytes]:
+        from gridfs.errors import NoFile
+        try:
+            return self.fs.get(key).read()
+        except NoFile:
+            return None
+
+    def delete(self, key: str):
+        self.fs.delete(key)
+
+    def keys(self) -> Iterator[Tuple[str, float]]:
+        for item in self.files.find({}, {'_id': 1, 'uploadDate': 1}):
+            yield item['_id'], item['uploadDate'].timestamp()
+
+class ContentBlobs:
+    """Keeps page bodies (the `content` subdocument) out of the stored documents.
+
+    On write, a document's content is serialized, compressed and saved under
+    its sha256, and the document keeps only a small reference (BLOB_REF), so
+    metadata queries never read page text, headings or links. Identical
+    bodies (unchanged recrawls, mirrored pages) share one blob. On read the
+    body is fetched only when the caller asks for content fields.
+    """
+
+    def __init__(self, store, min_bytes: int = 0, level: int = 6):
+        self.store = store
+        self.min_bytes = min_bytes
+        self.level = level
+
+    @classmethod
+    def from_config(cls, database=None) -> Optional['ContentBlobs']:
+        """Blob store for a backend: GridFS next to a MongoDB database, else a directory"""
+        if not Config.CONTENT_BLOBS:
+            return None
+        if database is not None and Config.BLOB_STORE != 'local':
+            store = GridFSBlobStore(database)
+        else:
+            store = LocalBlobStore(Config.BLOB_DIR)
+        return cls(store, Config.BLOB_MIN_BYTES)
+
+    @staticmethod
+    def _serialize(content: Dict) -> bytes:
+        return json.dumps(dict(content.items()), separators=(',', ':'), ensure_ascii=False,
+                          sort_keys=True, default=str).encode('utf-8')
+
+    def split_document(self, document: Dict) -> Dict:
+        """Copy of a document with its content moved to the blob store (input unchanged)"""
+        content = document.get('content')
+        if not isinstance(content, dict) or not content:
+            return document
+
+        raw = self._serialize(content)
+        if len(raw) < self.min_bytes:
+            return document
+
+        key = hashlib.sha256(raw).hexdigest()
+        self.store.put(key, zlib.compress(raw, self.level))
+
+        stored = {k: v for k, v in document.items() if k != 'content'}
+        stored[BLOB_REF] = {'sha256': key, 'bytes': len(raw)}
+        return stored
+
+    def load(self, ref: Dict) -> Dict:
+        data = self.store.get(ref['sha256'])
+        if data is None:
+            print(f"⚠️ Content blob {ref['sha256']} is missing")
+            return {}
+        return json.loads(zlib.decompress(data))
+
+    def attach(self, document: Optional[Dict], projection: Optional[Dict] = None) -> Optional[Dict]:
+        """Replace the blob reference of a read document with the content fields the projection asks for"""
+        if not document:
+            return document
+
+        ref = document.get(BLOB_REF) if projection and projection.get(BLOB_REF) else document.pop(BLOB_REF, None)
+        if not ref or not wants_content(projection):
+            return document
+
+        content = self.load(ref)
+        fields = content_fields(projection)
+        if fields is not None:
+            content = {k: v for k, v in content.items() if k in fields}
+        inline = document.get('content')
+        document['content'] = {**inline, **content} if isinstance(inline, dict) else content
+        return document
+
+    def collect_garbage(self, live_keys: set, grace_seconds: float = 3600) -> int:
+        """Delete blobs no document references; recent blobs are kept for in-flight writes"""
+        cutoff = time.time() - grace_seconds
+        removed = 0
+        for key, created in list(self.store.keys()):
+            if key not in live_keys and created < cutoff:
+                self.store.delete(key)
+                removed += 1
+        return removed
+
+def _is_inclusion(projection: Dict) -> bool:
+    return any(value for key, value in projection.items() if key != '_id')
+
+def wants_content(projection: Optional[Dict]) -> bool:
+    """Whether a PyMongo-style projection returns any content field"""
+    if not projection:
+        return True
+    paths = [key for key, value in projection.items() if value and key != '_id']
+    if paths:
+        return any(key == 'content' or key.startswith('content.') for key in paths)
+    return projection.get('content', 1) != 0
+
+def content_fields(projection: Optional[Dict]) -> Optional[set]:
+    """Content fields named by an inclusion projection (None means all of them)"""
+    if not projection or not _is_inclusion(projection) or projection.get('content'):
+        return None
+    return {key.split('.', 1)[1].split('.', 1)[0] for key, value in projection.items()
+            if value and key.startswith('content.')}
+
+def with_blob_ref(projection: Optional[Dict]) -> Optional[Dict]:
+    """Projection to send to the backend so the blob reference comes back with content fields"""
+    if not projection or not _is_inclusion(projection) or not wants_content(projection):
+        return projection
+    return {**projection, BLOB_REF: 1}
+
+def main():
+    parser = argparse.ArgumentParser(description='Content blob store maintenance')
+    parser.add_argument('command', choices=['migrate', 'gc'],
+                        help='migrate: move inline page bodies to blobs; gc: delete unreferenced blobs')
+    parser.add_argument('--backend', default=Config.DATABASE_BACKEND)
+    args = parser.parse_args()
+
+    from database.json_db import JSONDatabase
+
+    db = JSONDatabase(backend=args.backend)
+    try:
+        if db.blobs is None:
+            parser.error('CONTENT_BLOBS is disabled')
+        if args.command == 'migrate':
+            print(f"✅ Moved {db.move_content_to_blobs()} page bodies to the blob store")
+        else:
+            print(f"✅ Deleted {db.collect_unreferenced_blobs()} unreferenced blobs")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+
+import argparse
+import base64
+import json
+import os
+import re
+import threading
+import zlib
+from typing import Any, Dict, Iterable, Optional
+from config.settings import Config
+from database.query import get_field
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Bulky fields that are never filtered on; everything else stays queryable
+COMPRESSED_FIELDS = ('content.text', 'content.headings', 'content.links')
+
+# A compressed value is stored as {'_z': codec, 'b': payload[, 'd': dictionary id]}
+MARKER = '_z'
+
+def is_compressed(value: Any) -> bool:
+    return isinstance(value, dict) and MARKER in value and 'b' in value
+
+class LazyFields(dict):
+    """Subdocument whose compressed values are only decompressed when read.
+
+    Values are decoded on first access through [], get(), items() or values()
+    and cached in place, so metadata-only reads never pay for decompression.
+    """
+
+    def __init__(self, data: Dict, compressor: 'FieldCompressor'):
+        super().__init__(data)
+        self._compressor = compressor
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if is_compressed(value):
+            value = self._compressor.decompress(value)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def copy(self) -> Dict:
+        return dict(self.items())
+
+    def raw_items(self):
+        """Items without decompressing anything"""
+        return dict.items(self)
+
+class FieldCompressor:
+    """Compresses COMPRESSED_FIELDS at the storage boundary.
+
+    zlib is always available. With codec='zstd' (needs the zstandard package)
+    values are compressed with the newest dictionary trained by
+    train_dictionary, if any; older dictionaries stay on disk so documents
+    written with them remain readable. binary=False base64-encodes payloads for
+    JSON storage.
+    """
+
+    DICTIONARY_PATTERN = re.compile(r'^zstd-(\d+)\.dict$')
+
+    def __init__(self, codec: str = 'zlib', min_bytes: int = 1024, enabled: bool = True,
+                 dictionary_dir: Optional[str] = None, binary: bool = True, level: int = 6):
+        if codec == 'zstd' and zstandard is None:
+            print("⚠️ zstandard is not installed; falling back to zlib compression")
+            codec = 'zlib'
+        if codec not in ('zlib', 'zstd'):
+            raise ValueError(f"Unknown compression codec: {codec}")
+
+        self.codec = codec
+        self.min_bytes = min_bytes
+        self.enabled = enabled
+        self.dictionary_dir = dictionary_dir
+        self.binary = binary
+        self.level = level
+
+        self._dictionaries = {}
+        # ZstdCompressor instances must not be shared between threads
+        self._lock = threading.Lock()
+        self._compressor = None
+        self._dictionary_id = None
+        if self.codec == 'zstd':
+            self._load_latest_dictionary()
+
+    @classmethod
+    def from_config(cls, binary: bool = True) -> 'FieldCompressor':
+        return cls(
+            codec=Config.COMPRESSION_CODEC,
+            min_bytes=Config.COMPRESSION_MIN_BYTES,
+            enabled=Config.COMPRESS_LARGE_FIELDS,
+            dictionary_dir=Config.COMPRESSION_DICT_DIR,
+            binary=binary
+        )
+
+    # ------------------------------------------------------------ dictionaries
+
+    def _dictionary_path(self, dictionary_id: int) -> str:
+        return os.path.join(self.dictionary_dir, f'zstd-{dictionary_id}.dict')
+
+    def _get_dictionary(self, dictionary_id: int):
+        dictionary = self._dictionaries.get(dictionary_id)
+        if dictionary is None:
+            with open(self._dictionary_path(dictionary_id), 'rb') as f:
+                dictionary = zstandard.ZstdCompressionDict(f.read())
+            self._dictionaries[dictionary_id] = dictionary
+        return dictionary
+
+    def _load_latest_dictionary(self):
+        """Compress with the most recently trained dictionary, if there is one"""
+        latest = None
+        if self.dictionary_dir and os.path.isdir(self.dictionary_dir):
+            candidates = []
+            for name in os.listdir(self.dictionary_dir):
+                if self.DICTIONARY_PATTERN.match(name):
+                    path = os.path.join(self.dictionary_dir, name)
+                    candidates.append((os.path.getmtime(path), int(self.DICTIONARY_PATTERN.match(name).group(1))))
+            if candidates:
+                latest = max(candidates)[1]
+
+        if latest is None:
+            self._dictionary_id = None
+            self._compressor = zstandard.ZstdCompressor(level=self.level)
+        else:
+            self._dictionary_id = latest
+            self._compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self._get_dictionary(latest))
+
+    def train_dictionary(self, documents: Iterable[Dict], size: int = 112640) -> int:
+        """Train a zstd dictionary on the compressed fields of sample documents"""
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to train a dictionary")
+
+        samples = []
+        for document in documents:
+            for path in COMPRESSED_FIELDS:
+                value = get_field(document, path)
+                if value:
+                    samples.append(self._serialize(value))
+
+        dictionary = zstandard.train_dictionary(size, samples)
+        os.makedirs(self.dictionary_dir, exist_ok=True)
+        with open(self._dictionary_path(dictionary.dict_id()), 'wb') as f:
+            f.write(dictionary.as_bytes())
+
+        if self.codec == 'zstd':
+            self._load_latest_dictionary()
+        return dictionary.dict_id()
+
+    # -------------------------------------------------------------- encoding
+
+    @staticmethod
+    def _serialize(value: Any) -> bytes:
+        return json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def compress_value(self, value: Any) -> Any:
+        """Compressed marker for a value, or the value itself if it is small"""
+        if value is None or is_compressed(value):
+            return value
+
+        raw = self._serialize(value)
+        if len(raw) < self.min_bytes:
+            return value
+
+        marker = {MARKER: self.codec}
+        if self.codec == 'zstd':
+            with self._lock:
+                payload = self._compressor.compress(raw)
+            if self._dictionary_id is not None:
+                marker['d'] = self._dictionary_id
+        else:
+            payload = zlib.compress(raw, self.level)
+
+        if len(payload) >= len(raw):
+            return value
+
+        marker['b'] = payload if self.binary else base64.b64encode(payload).decode('ascii')
+        return marker
+
+    def decompress(self, marker: Dict) -> Any:
+        payload = marker['b']
+        if isinstance(payload, str):
+            payload = base64.b64decode(payload)
+
+        if marker[MARKER] == 'zstd':
+            if zstandard is None:
+                raise RuntimeError("zstandard is required to read zstd-compressed fields")
+            dictionary_id = marker.get('d')
+            if dictionary_id is not None:
+                decompressor = zstandard.ZstdDecompressor(dict_data=self._get_dictionary(dictionary_id))
+            else:
+                decompressor = zstandard.ZstdDecompressor()
+            raw = decompressor.decompress(payload)
+        else:
+            raw = zlib.decompress(payload)
+
+        return json.loads(raw)
+
+    # ------------------------------------------------------------- documents
+
+    def compress_document(self, document: Dict) -> Dict:
+        """Copy of a document (or $set update) with large fields compressed.
+
+        The input is not modified. Dotted keys such as 'content.text' are
+        handled as well, for update documents.
+        """
+        if not self.enabled:
+            return document
+
+        stored = dict(document)
+        copied = {}
+        for path in COMPRESSED_FIELDS:
+            if path in stored:
+                stored[path] = self.compress_value(stored[path])
+                continue
+
+            parent_key, field = path.split('.', 1)
+            parent = stored.get(parent_key)
+            if not isinstance(parent, dict) or field not in parent:
+                continue
+            if parent_key not in copied:
+                raw = parent.raw_items() if isinstance(parent, LazyFields) else parent.items()
+                copied[parent_key] = stored[parent_key] = dict(raw)
+            copied[parent_key][field] = self.compress_value(copied[parent_key][field])
+        return stored
+
+    def expand_document(self, document: Optional[Dict]) -> Optional[Dict]:
+        """Wrap subdocuments holding compressed fields so they decompress on read"""
+        if not document:
+            return document
+
+        for parent_key in {path.split('.', 1)[0] for path in COMPRESSED_FIELDS}:
+            parent = document.get(parent_key)
+            if isinstance(parent, dict) and not isinstance(parent, LazyFields):
+                if any(is_compressed(value) for value in parent.values()):
+                    document[parent_key] = LazyFields(parent, self)
+        return document
+
+def main():
+    parser = argparse.ArgumentParser(description='Train a zstd dictionary for field compression')
+    parser.add_argument('--backend', default=Config.DATABASE_BACKEND, help='Backend to sample documents from')
+    parser.add_argument('--samples', type=int, default=2000, help='Number of recent documents to sample')
+    parser.add_argument('--size', type=int, default=112640, help='Dictionary size in bytes')
+    args = parser.parse_args()
+
+    from database.json_db import JSONDatabase, RECENT_FIRST
+
+    db = JSONDatabase(backend=args.backend)
+    try:
+        documents = list(db.find_documents(
+            {}, projection={'_id': 0, 'content': 1}, sort=RECENT_FIRST, limit=args.samples
+        ))
+    finally:
+        db.close()
+
+    compressor = FieldCompressor(codec='zstd', dictionary_dir=Config.COMPRESSION_DICT_DIR)
+    dictionary_id = compressor.train_dictionary(documents, args.size)
+    print(f"✅ Trained dictionary {dictionary_id} on {len(documents)} documents")
+    print("   Set COMPRESSION_CODEC=zstd to compress new documents with it")
+
+if __name__ == "__main__":
+    main()
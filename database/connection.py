@@ -0,0 +1,166 @@
+import atexit
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+from pymongo import MongoClient
+from pymongo.monitoring import ConnectionPoolListener
+from config.settings import Config
+
+class PoolMetrics(ConnectionPoolListener):
+    """Connection pool listener recording checkout wait times and pool size.
+
+    Check-out events are published on the thread that requested the
+    connection, so the wait is measured from a thread-local start time.
+    """
+
+    WINDOW = 1000  # Checkouts kept for wait-time percentiles
+
+    def __init__(self):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=self.WINDOW)
+        self.counters = {
+            'connections_created': 0, 'connections_closed': 0, 'checkouts': 0,
+            'checkout_failures': 0, 'checked_out': 0, 'pool_clears': 0
+        }
+
+    def _count(self, name: str, delta: int = 1):
+        with self._lock:
+            self.counters[name] += delta
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._count('pool_clears')
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._count('connections_created')
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._count('connections_closed')
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+
+    def connection_check_out_failed(self, event):
+        self._local.started = None
+        self._count('checkout_failures')
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, 'started', None)
+        self._local.started = None
+        with self._lock:
+            self.counters['checkouts'] += 1
+            self.counters['checked_out'] += 1
+            if started is not None:
+                self._waits.append(time.perf_counter() - started)
+
+    def connection_checked_in(self, event):
+        self._count('checked_out', -1)
+
+    def snapshot(self) -> Dict:
+        """Counters plus checkout wait percentiles (ms) over recent checkouts"""
+        with self._lock:
+            stats = dict(self.counters)
+            waits = sorted(self._waits)
+
+        stats['open_connections'] = stats['connections_created'] - stats['connections_closed']
+        if waits:
+            stats['checkout_wait_ms'] = {
+                'p50': round(waits[len(waits) // 2] * 1000, 3),
+                'p95': round(waits[min(len(waits) - 1, int(len(waits) * 0.95))] * 1000, 3),
+                'max': round(waits[-1] * 1000, 3)
+            }
+        else:
+            stats['checkout_wait_ms'] = {'p50': None, 'p95': None, 'max': None}
+        return stats
+
+_clients: Dict[str, MongoClient] = {}
+_metrics: Dict[str, PoolMetrics] = {}
+_lock = threading.Lock()
+
+def client_options() -> Dict:
+    """MongoClient pool, timeout and compression options from Config"""
+    options = {
+        'maxPoolSize': Config.MONGODB_MAX_POOL_SIZE,
+        'minPoolSize': Config.MONGODB_MIN_POOL_SIZE,
+        'maxIdleTimeMS': Config.MONGODB_MAX_IDLE_TIME_MS,
+        'waitQueueTimeoutMS': Config.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        'connectTimeoutMS': Config.MONGODB_CONNECT_TIMEOUT_MS,
+        'serverSelectionTimeoutMS': Config.MONGODB_SERVER_SELECTION_TIMEOUT_MS
+    }
+    if Config.MONGODB_SOCKET_TIMEOUT_MS:
+        options['socketTimeoutMS'] = Config.MONGODB_SOCKET_TIMEOUT_MS
+    if Config.MONGODB_COMPRESSORS:
+        # PyMongo skips (with a warning) compressors whose library is not installed
+        options['compressors'] = Config.MONGODB_COMPRESSORS
+    return options
+
+def get_client(url: Optional[str] = None) -> MongoClient:
+    """The process-wide pooled client for a MongoDB URL, created and warmed on first use"""
+    url = url or Config.MONGODB_URL
+
+    with _lock:
+        client = _clients.get(url)
+        if client is not None:
+            return client
+
+        metrics = PoolMetrics()
+        client = MongoClient(url, event_listeners=[metrics], **client_options())
+        _clients[url] = client
+        _metrics[url] = metrics
+
+    if Config.MONGODB_WARM_POOL:
+        warm_up(client)
+    return client
+
+def warm_up(client: MongoClient) -> bool:
+    """Select a server and open the first connection so requests do not pay for it.
+
+    minPoolSize connections are then opened by the driver's background thread.
+    """
+    try:
+        client.admin.command('ping')
+        return True
+    except Exception as e:
+        print(f"⚠️ MongoDB pool warm-up failed: {e}")
+        return False
+
+def pool_stats() -> Dict[str, Dict]:
+    """Pool metrics per client URL (credentials removed)"""
+    with _lock:
+        items = list(_metrics.items())
+
+    stats = {}
+    for url, metrics in items:
+        stats[_redact(url)] = metrics.snapshot()
+    return stats
+
+def _redact(url: str) -> str:
+    scheme, sep, rest = url.partition('://')
+    if '@' in rest:
+        rest = rest.split('@', 1)[1]
+    return f'{scheme}{sep}{rest}'
+
+def close_clients():
+    """Close every registered client (at interpreter exit)"""
+    with _lock:
+        clients = list(_clients.values())
+        _clients.clear()
+        _metrics.clear()
+
+    for client in clients:
+        client.close()
+
+atexit.register(close_clients)
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+
+import argparse
+from typing import Dict, List
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+from config.settings import Config
+from database.connection import get_client
+
+# Declarative index manifest for the web_content collection.
+# Each entry is applied with create_indexes, which is a no-op when an index with
+# the same name and options already exists.
+INDEX_MANIFEST = [
+    {
+        'name': 'id_unique',
+        'keys': [('id', ASCENDING)],
+        'unique': True,
+        'partialFilterExpression': {'id': {'$type': 'string'}}
+    },
+    {
+        # One latest version per page; older versions keep the same canonical_url.
+        # OSINT and subdomain documents have no url and are not covered.
+        'name': 'canonical_url_latest',
+        'keys': [('canonical_url', ASCENDING)],
+        'unique': True,
+        'partialFilterExpression': {'canonical_url': {'$type': 'string'}, 'is_latest': True}
+    },
+    {
+        'name': 'url',
+        'keys': [('url', ASCENDING)]
+    },
+    {
+        # Also serves plain data_type filters through its prefix
+        'name': 'data_type_recent',
+        'keys': [('search_metadata.data_type', ASCENDING), ('metadata.crawl_date', DESCENDING)]
+    },
+    {
+        'name': 'search_id',
+        'keys': [('search_metadata.search_id', ASCENDING)]
+    },
+    {
+        'name': 'domain',
+        'keys': [('domain', ASCENDING)]
+    },
+    {
+        'name': 'crawl_date_recent',
+        'keys': [('metadata.crawl_date', DESCENDING)]
+    },
+    {
+        # Incremental Parquet export follows write order
+        'name': 'inserted_at',
+        'keys': [('inserted_at', ASCENDING)]
+    },
+    {
+        'name': 'content_hash',
+        'keys': [('content_analysis.content_hash', ASCENDING)]
+    }
+]
+
+# Indexes from earlier manifests that conflict with the current one
+RETIRED_INDEXES = ['url_unique']
+
+# The reads issued by the dashboard API endpoints, for query-plan checks
+DASHBOARD_QUERIES = {
+    '/api/graph-data': {
+        'filter': {'is_latest': {'$ne': False}}, 'sort': [('metadata.crawl_date', DESCENDING)], 'limit': 50
+    },
+    '/api/enhanced-graph-data': {
+        'filter': {'is_latest': {'$ne': False}}, 'sort': [('metadata.crawl_date', DESCENDING)], 'limit': 100
+    },
+    '/api/osint-intelligence-data': {
+        'filter': {'search_metadata.data_type': 'osint_intelligence'},
+        'sort': [('metadata.crawl_date', DESCENDING)], 'limit': 50
+    },
+    'search results by search_id': {
+        'filter': {'search_metadata.search_id': '<search_id>'}, 'sort': None, 'limit': 0
+    },
+    'documents by domain': {
+        'filter': {'domain': 'example.gov'}, 'sort': None, 'limit': 0
+    }
+}
+
+def _index_models() -> List[IndexModel]:
+    models = []
+    for spec in INDEX_MANIFEST:
+        options = {k: v for k, v in spec.items() if k != 'keys'}
+        models.append(IndexModel(spec['keys'], **options))
+    return models
+
+def ensure_indexes(collection) -> List[str]:
+    """Create every manifest index that is missing; safe to call on every startup"""
+    existing = collection.index_information()
+    for name in RETIRED_INDEXES:
+        if name in existing:
+            collection.drop_index(name)
+
+    try:
+        return collection.create_indexes(_index_models())
+    except OperationFailure as e:
+        # Typically an existing index with the same keys but different options,
+        # or duplicate urls blocking the unique index. Fall back to one at a time
+        # so one bad index does not prevent the others.
+        print(f"⚠️ Bulk index creation failed ({e}); retrying individually")
+
+    created = []
+    for model in _index_models():
+        try:
+            created.extend(collection.create_indexes([model]))
+        except OperationFailure as e:
+            print(f"⚠️ Could not create index {model.document['name']}: {e}")
+    return created
+
+def find_missing_indexes(collection) -> List[str]:
+    """Manifest indexes that do not exist on the collection"""
+    existing = collection.index_information()
+    existing_keys = {tuple(info['key']) for info in existing.values()}
+
+    missing = []
+    for spec in INDEX_MANIFEST:
+        if spec['name'] not in existing and tuple(spec['keys']) not in existing_keys:
+            missing.append(spec['name'])
+    return missing
+
+def index_usage(collection) -> Dict[str, int]:
+    """Operations served by each index since the server started ($indexStats)"""
+    usage = {}
+    for stat in collection.aggregate([{'$indexStats': {}}]):
+        usage[stat['name']] = stat['accesses']['ops']
+    return usage
+
+def _describe_plan(stage: Dict, depth: int = 0) -> List[str]:
+    """Flatten a winning plan into indented 'STAGE (index)' lines"""
+    label = stage.get('stage', '?')
+    if stage.get('indexName'):
+        label += f" ({stage['indexName']})"
+    lines = ['  ' * depth + label]
+
+    children = stage.get('inputStages') or ([stage['inputStage']] if 'inputStage' in stage else [])
+    for child in children:
+        lines.extend(_describe_plan(child, depth + 1))
+    return lines
+
+def explain_dashboard_queries(collection) -> Dict[str, Dict]:
+    """Winning plan and documents examined for each dashboard query"""
+    plans = {}
+    for endpoint, spec in DASHBOARD_QUERIES.items():
+        cursor = collection.find(spec['filter'], {'_id': 1})
+        if spec['sort']:
+            cursor = cursor.sort(spec['sort'])
+        if spec['limit']:
+            cursor = cursor.limit(spec['limit'])
+
+        explain = cursor.explain()
+        winning = explain.get('queryPlanner', {}).get('winningPlan', {})
+        # Newer servers wrap the classic plan in queryPlan
+        winning = winning.get('queryPlan', winning)
+        stats = explain.get('executionStats', {})
+
+        plans[endpoint] = {
+            'plan': _describe_plan(winning),
+            'docs_examined': stats.get('totalDocsExamined'),
+            'keys_examined': stats.get('totalKeysExamined'),
+            'returned': stats.get('nReturned'),
+            'collection_scan': 'COLLSCAN' in str(winning)
+        }
+    return plans
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage MongoDB indexes for the web_content collection')
+    parser.add_argument('command', choices=['apply', 'check'],
+                        help='apply: create missing indexes; check: report missing/unused indexes and query plans')
+    args = parser.parse_args()
+
+    client = get_client(Config.MONGODB_URL)
+    collection = client[Config.DATABASE_NAME].web_content
+
+    if args.command == 'apply':
+        created = ensure_indexes(collection)
+        print(f"✅ Indexes in place: {', '.join(created) if created else 'none'}")
+        return
+
+    missing = find_missing_indexes(collection)
+    print("📋 MISSING INDEXES")
+    for name in missing:
+        print(f"  • {name}")
+    if not missing:
+        print("  none")
+
+    print("\n📉 UNUSED INDEXES (no operations since server start)")
+    unused = [name for name, ops in index_usage(collection).items() if ops == 0 and name != '_id_']
+    for name in unused:
+        print(f"  • {name}")
+    if not unused:
+        print("  none")
+
+    print("\n🔍 DASHBOARD QUERY PLANS")
+    for endpoint, info in explain_dashboard_queries(collection).items():
+        marker = '⚠️ COLLSCAN' if info['collection_scan'] else '✅'
+        print(f"\n{endpoint} {marker}")
+        print(f"  docs examined: {info['docs_examined']}, keys examined: {info['keys_examined']}, returned: {info['returned']}")
+        for line in info['plan']:
+            print(f"    {line}")
+
+if __name__ == "__main__":
+    main()
@@ -1,80 +1,558 @@
-import json
+import hashlib
+import heapq
+import itertools
 import os
+import re
+import threading
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional
-from pymongo import MongoClient
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from pymongo import InsertOne, UpdateOne
 from config.settings import Config
+from database.blob_store import BLOB_REF, ContentBlobs, with_blob_ref
+from database.compression import FieldCompressor
+from database.connection import get_client
+from database.indexes import ensure_indexes
+from database.models import normalize_document
+from database.query import apply_projection, get_field, matches, sort_key
+from database.segment_store import SegmentStore
+from database.sqlite_store import SQLiteStore
+from utils.url_canonicalizer import canonicalize_url
+
+# Sort key meaning "insertion order", understood by MongoDB and the file backend
+NATURAL_ORDER = '$natural'
+
+# Newest documents first. crawl_date is stamped at insertion, so the file backend
+# serves this from insertion order while MongoDB uses the crawl_date indexes.
+RECENT_FIRST = [('metadata.crawl_date', -1)]
+INSERTION_ORDERED_FIELDS = {NATURAL_ORDER, 'metadata.crawl_date'}
+
+# Excludes versions that have been superseded by a newer crawl of the same page
+LATEST_ONLY = {'is_latest': {'$ne': False}}
+
+BACKENDS = ('mongodb', 'file', 'sqlite')
 
 class JSONDatabase:
-    def __init__(self, use_mongodb=True):
-        self.use_mongodb = use_mongodb
-        if use_mongodb:
-            self.client = MongoClient(Config.MONGODB_URL)
+    def __init__(self, use_mongodb=True, backend: Optional[str] = None):
+        # backend overrides use_mongodb: 'mongodb', 'file' (JSONL segments) or 'sqlite'
+        self.backend = backend or ('mongodb' if use_mongodb else 'file')
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown database backend: {self.backend}")
+
+        self.use_mongodb = self.backend == 'mongodb'
+        self._upsert_lock = threading.Lock()
+        self._url_index = None
+        # Large text fields are compressed on write and decompressed lazily on read.
+        # SQLite already compresses the whole document body.
+        self.compressor = FieldCompressor.from_config(binary=self.use_mongodb)
+        if self.use_mongodb:
+            # Shared, pooled client; every JSONDatabase in the process reuses it
+            self.client = get_client(Config.MONGODB_URL)
             self.db = self.client[Config.DATABASE_NAME]
             self.collection = self.db.web_content
-        else:
+            if Config.AUTO_CREATE_INDEXES:
+                self._bootstrap_indexes()
+        # Page bodies go to a content-addressed blob store; documents keep a reference
+        self.blobs = ContentBlobs.from_config(self.db if self.use_mongodb else None)
+        if self.blobs:
+            # Bodies of BLOB_MIN_BYTES or more are compressed as blobs, and smaller ones are under
+            # COMPRESSION_MIN_BYTES, so content.* is no longer compressed in place. Documents
+            # written before blobs were turned on are still expanded on read.
+            self.compressor.enabled = False
+        if self.backend == 'sqlite':
+            self.sqlite = SQLiteStore(Config.SQLITE_PATH, body_filter=self.blobs.split_document if self.blobs else None)
+        elif self.backend == 'file':
+            # Append-only segments; the legacy single JSON file is migrated on first open
             self.file_path = os.path.join(Config.DATA_DIR, 'scraped_content.json')
-            self._ensure_file_exists()
-    
-    def _ensure_file_exists(self):
-        """Create JSON file if it doesn't exist"""
-        if not os.path.exists(self.file_path):
-            with open(self.file_path, 'w') as f:
-                json.dump([], f)
-    
-    def insert_document(self, document: Dict) -> str:
-        """Insert a new document"""
+            self.store = SegmentStore(
+                Config.SEGMENTS_DIR,
+                max_segment_bytes=Config.SEGMENT_MAX_BYTES,
+                compaction_ratio=Config.SEGMENT_COMPACTION_RATIO,
+                legacy_file=self.file_path
+            )
+
+    def _bootstrap_indexes(self):
+        """Apply the index manifest; a failure here must not stop the application"""
+        try:
+            ensure_indexes(self.collection)
+        except Exception as e:
+            print(f"⚠️ Index bootstrap skipped: {e}")
+
+    def prepare_document(self, document: Dict) -> Dict:
+        """Normalize a document to the canonical schema and assign its id and crawl date"""
+        normalize_document(document)
         document['id'] = str(uuid.uuid4())
-        document['metadata']['crawl_date'] = datetime.now().isoformat()
-        
+        document.setdefault('metadata', {})['crawl_date'] = datetime.now().isoformat()
+        return document
+
+    def insert_document(self, document: Dict) -> str:
+        """Insert a new document (a page already stored under its URL is upserted)"""
+        return self.insert_many([document])[0]
+
+    def insert_many(self, documents: List[Dict], prepared: bool = False) -> List[str]:
+        """Insert several documents in one round-trip and return their ids.
+
+        Documents with a url are upserted by canonical URL (see upsert_many), so
+        the id returned for an unchanged page is that of the stored version.
+        """
+        if not documents:
+            return []
+
+        if not prepared:
+            for document in documents:
+                self.prepare_document(document)
+
+        return [doc_id for doc_id, _ in self.upsert_many(documents)]
+
+    def upsert_many(self, documents: List[Dict]) -> List[Tuple[str, str]]:
+        """Store prepared documents with upsert-by-canonical-URL semantics.
+
+        For each document with a url, the latest stored version of the same
+        canonical URL is looked up and its content hash compared:
+          - no stored version: the document is inserted ('inserted')
+          - same content: only last_seen/seen_count of the stored version are
+            bumped ('unchanged')
+          - different content: the document is stored as a new version linked
+            through previous_version_id, and the old one gets is_latest=False
+            and superseded_by ('updated')
+        Returns (id, status) per document.
+        """
+        now = datetime.now().isoformat()
+        for document in documents:
+            self._stamp_version_fields(document, now)
+
+        urls = {doc['canonical_url'] for doc in documents if doc.get('canonical_url')}
+        with self._upsert_lock:
+            latest = self._latest_versions(urls) if urls else {}
+
+            results = []
+            new_documents = []
+            batch_ids = set()
+            touched = {}
+            superseded = {}
+
+            for document in documents:
+                canonical_url = document.get('canonical_url')
+                current = latest.get(canonical_url) if canonical_url else None
+
+                if current is None:
+                    results.append((document['id'], 'inserted'))
+                elif self._content_hash(current) == self._content_hash(document):
+                    if current['id'] in batch_ids:
+                        current['last_seen'] = now
+                        current['seen_count'] = current.get('seen_count', 1) + 1
+                    else:
+                        # Which crawl touched it, so a retried batch does not count the visit twice
+                        current['last_touch'] = document['id']
+                        touched[current['id']] = current
+                    results.append((current['id'], 'unchanged'))
+                    continue
+                else:
+                    document['version'] = current.get('version', 1) + 1
+                    document['previous_version_id'] = current['id']
+                    document['first_seen'] = current.get('first_seen') or document['first_seen']
+                    if current['id'] in batch_ids:
+                        current['is_latest'] = False
+                        current['superseded_by'] = document['id']
+                    else:
+                        touched.pop(current['id'], None)
+                        superseded[current['id']] = (current, document['id'])
+                    results.append((document['id'], 'updated'))
+
+                new_documents.append(document)
+                batch_ids.add(document['id'])
+                if canonical_url:
+                    latest[canonical_url] = document
+
+            self._write_versions(new_documents, touched, superseded, now)
+        return results
+
+    def touch_unchanged(self, body_hashes: Dict[str, str]) -> Set[str]:
+        """Of {url: body hash}, the URLs whose latest stored version has that body.
+
+        Those versions get last_seen/seen_count bumped as if the page had been
+        stored again unchanged, so a caller can skip parsing it. Versions
+        stored without metadata.body_hash never match.
+        """
+        canonical = {url: canonicalize_url(url) for url in body_hashes}
+        now = datetime.now().isoformat()
+        with self._upsert_lock:
+            latest = self._latest_versions(set(canonical.values())) if canonical else {}
+            matched, touched = set(), {}
+            for url, body_hash in body_hashes.items():
+                current = latest.get(canonical[url])
+                if current is not None and get_field(current, 'metadata.body_hash') == body_hash:
+                    matched.add(url)
+                    touched[current['id']] = current
+            self._write_versions([], touched, {}, now)
+        return matched
+
+    def restore_documents(self, documents: List[Dict]) -> int:
+        """Write previously stored (e.g. archived) documents back as they are.
+
+        Only one version per canonical URL may be the latest: a restored page
+        whose URL has been crawled again since is written as superseded.
+        """
+        if not documents:
+            return 0
+
+        urls = {doc['canonical_url'] for doc in documents if doc.get('canonical_url')}
+        with self._upsert_lock:
+            latest = self._latest_versions(urls) if urls else {}
+            for document in documents:
+                current = latest.get(document.get('canonical_url'))
+                if current and current['id'] != document.get('id') and document.get('is_latest', True):
+                    document['is_latest'] = False
+                    document['superseded_by'] = current['id']
+            self._write_versions(documents, {}, {}, datetime.now().isoformat())
+        return len(documents)
+
+    def _stamp_version_fields(self, document: Dict, now: str):
+        """Add canonical URL, content hash and version bookkeeping to a document"""
+        if not document.get('url'):
+            return
+
+        document['canonical_url'] = canonicalize_url(document['url'])
+        document.setdefault('content_analysis', {})
+        if not document['content_analysis'].get('content_hash'):
+            document['content_analysis']['content_hash'] = self._fingerprint(document)
+
+        document.setdefault('version', 1)
+        document['is_latest'] = True
+        document['first_seen'] = now
+        document['last_seen'] = now
+        document['seen_count'] = 1
+
+    @staticmethod
+    def _fingerprint(document: Dict) -> str:
+        """Hash of the page text (or, for binary files, of title and size)"""
+        content = document.get('content')
+        text = content.get('text', '') if isinstance(content, dict) else str(content or '')
+        if not text.strip():
+            text = f"{document.get('title', '')}|{document.get('metadata', {}).get('content_length', '')}"
+        normalized = ' '.join(text.lower().split())
+        return hashlib.md5(normalized.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _content_hash(document: Dict) -> Optional[str]:
+        return get_field(document, 'content_analysis.content_hash')
+
+    def _latest_versions(self, canonical_urls) -> Dict[str, Dict]:
+        """Latest stored version per canonical URL"""
         if self.use_mongodb:
-            result = self.collection.insert_one(document)
-            return str(result.inserted_id)
+            cursor = self.collection.find(
+                {'canonical_url': {'$in': list(canonical_urls)}, 'is_latest': True},
+                {'_id': 0, 'id': 1, 'canonical_url': 1, 'version': 1, 'first_seen': 1,
+                 'seen_count': 1, 'content_analysis.content_hash': 1, 'metadata.body_hash': 1}
+            )
+            return {doc['canonical_url']: doc for doc in cursor}
+        elif self.backend == 'sqlite':
+            docs = self.sqlite.find({'canonical_url': {'$in': list(canonical_urls)}, 'is_latest': True})
+            return {doc['canonical_url']: doc for doc in docs}
+
+        url_index = self._file_url_index()
+        latest = {}
+        for canonical_url in canonical_urls:
+            doc_id = url_index.get(canonical_url)
+            doc = self.store.get(doc_id) if doc_id else None
+            if doc is not None:
+                latest[canonical_url] = doc
+        return latest
+
+    def _file_url_index(self) -> Dict[str, str]:
+        """canonical_url -> id of the latest version, built on first use (file backend)"""
+        if self._url_index is None:
+            self._url_index = {}
+            for doc in self.store.scan():
+                if doc.get('canonical_url') and doc.get('is_latest', True):
+                    self._url_index[doc['canonical_url']] = doc['id']
+        return self._url_index
+
+    def _write_versions(self, new_documents: List[Dict], touched: Dict[str, Dict],
+                        superseded: Dict[str, Tuple[Dict, str]], now: str):
+        """Persist new documents and the bookkeeping changes to stored versions"""
+        # Write-time stamp (crawl_date is set when a document is queued): incremental readers
+        # such as the Parquet export follow it, so late writes from a queue are not missed
+        inserted_at = datetime.now().isoformat()
+        for doc in new_documents:
+            doc.setdefault('inserted_at', inserted_at)
+
+        if self.use_mongodb:
+            # Retire old versions first so the unique latest-version index never sees two
+            if superseded:
+                self.collection.bulk_write([
+                    UpdateOne({'id': old_id}, {'$set': {'is_latest': False, 'superseded_by': new_id}})
+                    for old_id, (_, new_id) in superseded.items()
+                ], ordered=False)
+
+            operations = [InsertOne(self._to_stored(doc)) for doc in new_documents]
+            operations += [self._touch_operation(doc_id, doc, now) for doc_id, doc in touched.items()]
+            if operations:
+                try:
+                    # Unordered so one bad document does not stop the rest of the batch
+                    self.collection.bulk_write(operations, ordered=False)
+                except Exception:
+                    self._restore_superseded(superseded)
+                    raise
+            return
+
+        changed = []
+        for doc in touched.values():
+            doc['last_seen'] = now
+            doc['seen_count'] = doc.get('seen_count', 1) + 1
+            changed.append(doc)
+        for doc, new_id in superseded.values():
+            doc['is_latest'] = False
+            doc['superseded_by'] = new_id
+            changed.append(doc)
+        changed.extend(new_documents)
+
+        if self.backend == 'sqlite':
+            self.sqlite.put_many(changed)
         else:
-            # File-based storage
-            with open(self.file_path, 'r') as f:
-                data = json.load(f)
-            
-            data.append(document)
-            
-            with open(self.file_path, 'w') as f:
-                json.dump(data, f, indent=2)
-            
-            return document['id']
-    
-    def find_documents(self, query: Dict) -> List[Dict]:
-        """Find documents matching query"""
+            # One append for the whole batch
+            self.store.put_many([(doc['id'], self._to_stored(doc)) for doc in changed])
+            url_index = self._file_url_index()
+            for doc in new_documents:
+                if doc.get('canonical_url') and doc.get('is_latest', True):
+                    url_index[doc['canonical_url']] = doc['id']
+
+    @staticmethod
+    def _touch_operation(doc_id: str, doc: Dict, now: str) -> UpdateOne:
+        """Bump last_seen/seen_count once per touching crawl (a retry of the same batch matches nothing)"""
+        query = {'id': doc_id}
+        update = {'$set': {'last_seen': now}, '$inc': {'seen_count': 1}}
+        if doc.get('last_touch'):
+            query['last_touch'] = {'$ne': doc['last_touch']}
+            update['$set']['last_touch'] = doc['last_touch']
+        return UpdateOne(query, update)
+
+    def _restore_superseded(self, superseded: Dict[str, Tuple[Dict, str]]):
+        """Make old versions latest again where the new version was not inserted (MongoDB, best effort).
+
+        Without this a failed insert leaves the page with no latest version and
+        superseded_by pointing at a document that does not exist.
+        """
+        if not superseded:
+            return
+        try:
+            new_ids = [new_id for _, new_id in superseded.values()]
+            inserted = {doc['id'] for doc in self.collection.find({'id': {'$in': new_ids}}, {'_id': 0, 'id': 1})}
+            restore = [
+                UpdateOne({'id': old_id, 'superseded_by': new_id},
+                          {'$set': {'is_latest': True}, '$unset': {'superseded_by': ''}})
+                for old_id, (_, new_id) in superseded.items() if new_id not in inserted
+            ]
+            if restore:
+                self.collection.bulk_write(restore, ordered=False)
+        except Exception as e:
+            print(f"⚠️ Could not restore latest versions after a failed write: {e}")
+
+    def _to_stored(self, document: Dict) -> Dict:
+        """Stored form of a document: body in the blob store, remaining large fields compressed"""
+        if self.blobs:
+            document = self.blobs.split_document(document)
+        return self.compressor.compress_document(document)
+
+    def _from_stored(self, document: Optional[Dict], projection: Optional[Dict] = None) -> Optional[Dict]:
+        """Read form of a stored document; the body is fetched only if the projection asks for it"""
+        document = self.compressor.expand_document(document)
+        return self.blobs.attach(document, projection) if self.blobs else document
+
+    def get_document(self, doc_id: str) -> Optional[Dict]:
+        """Fetch a single document by its id"""
         if self.use_mongodb:
-            return list(self.collection.find(query))
+            return self._from_stored(self.collection.find_one({'id': doc_id}))
+        elif self.backend == 'sqlite':
+            return self._from_stored(self.sqlite.get(doc_id))
         else:
-            # Simple file-based search
-            with open(self.file_path, 'r') as f:
-                data = json.load(f)
-            
-            results = []
-            for doc in data:
-                if all(doc.get(k) == v for k, v in query.items()):
-                    results.append(doc)
-            return results
-    
+            return self._from_stored(self.store.get(doc_id))
+
+    def find_documents(self, query: Optional[Dict] = None, projection: Optional[Dict] = None,
+                       sort: Optional[List[Tuple[str, int]]] = None, limit: int = 0,
+                       skip: int = 0, batch_size: Optional[int] = None) -> Iterator[Dict]:
+        """Lazily iterate over documents matching query.
+
+        projection, sort, skip and limit follow PyMongo semantics and are pushed
+        down to the backend. In the file backend, sorting on NATURAL_ORDER or
+        on crawl_date (see RECENT_FIRST) walks insertion order without sorting
+        anything, so "last N documents" reads only N documents.
+
+        Page bodies in the blob store are fetched only for projections that
+        include content fields (or for no projection).
+        """
+        query = query or {}
+        stored_projection = with_blob_ref(projection) if self.blobs else projection
+
+        def from_stored(document):
+            return self._from_stored(document, projection)
+
+        if self.use_mongodb:
+            cursor = self.collection.find(query, stored_projection)
+            if sort:
+                cursor = cursor.sort(sort)
+            if skip:
+                cursor = cursor.skip(skip)
+            if limit:
+                cursor = cursor.limit(limit)
+            if batch_size:
+                cursor = cursor.batch_size(batch_size)
+            return map(from_stored, cursor)
+        elif self.backend == 'sqlite':
+            return map(from_stored, self.sqlite.find(query, stored_projection, sort, limit, skip, batch_size or 500))
+
+        return map(from_stored, self._find_in_store(query, stored_projection, sort, limit, skip))
+
+    def _find_in_store(self, query: Dict, projection: Optional[Dict],
+                       sort: Optional[List[Tuple[str, int]]], limit: int, skip: int) -> Iterator[Dict]:
+        """File-backend find; streams documents unless a field sort is requested"""
+        expand = self.compressor.expand_document
+
+        # Id lookups go straight to the offset index
+        if set(query) == {'id'} and not isinstance(query['id'], dict):
+            doc = expand(self.store.get(query['id']))
+            candidates = iter([doc] if doc else [])
+        elif sort and len(sort) == 1 and sort[0][0] in INSERTION_ORDERED_FIELDS:
+            candidates = (doc for doc in map(expand, self.store.scan(reverse=sort[0][1] < 0)) if matches(doc, query))
+        else:
+            candidates = (doc for doc in map(expand, self.store.scan()) if matches(doc, query))
+            if sort:
+                key = sort_key(sort)
+                if limit:
+                    candidates = iter(heapq.nsmallest(skip + limit, candidates, key=key))
+                else:
+                    candidates = iter(sorted(candidates, key=key))
+
+        stop = skip + limit if limit else None
+        for doc in itertools.islice(candidates, skip, stop):
+            yield apply_projection(doc, projection)
+
     def update_document(self, doc_id: str, updates: Dict) -> bool:
         """Update an existing document"""
         if self.use_mongodb:
-            result = self.collection.update_one(
-                {'_id': doc_id}, 
-                {'$set': updates}
-            )
+            operation = {'$set': self._to_stored(updates)}
+            if 'content' in updates and 'content' not in operation['$set']:
+                # The new body went to the blob store; drop any inline copy
+                operation['$unset'] = {'content': ''}
+            result = self.collection.update_one({'id': doc_id}, operation)
             return result.modified_count > 0
+        elif self.backend == 'sqlite':
+            doc = self.sqlite.get(doc_id)
+            if doc is None:
+                return False
+
+            doc.update(updates)
+            self.sqlite.put(doc)
+            return True
         else:
-            with open(self.file_path, 'r') as f:
-                data = json.load(f)
-            
-            for doc in data:
-                if doc.get('id') == doc_id:
-                    doc.update(updates)
-                    break
-            
-            with open(self.file_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            doc = self.store.get(doc_id)
+            if doc is None:
+                return False
+
+            # Append the new version; the old record becomes dead space for compaction
+            doc.update(updates)
+            self.store.put(doc_id, self._to_stored(doc))
             return True
+
+    def delete_document(self, doc_id: str) -> bool:
+        """Delete a document"""
+        return self.delete_many([doc_id]) > 0
+
+    def delete_many(self, doc_ids: List[str]) -> int:
+        """Delete documents by id in one round-trip; returns how many were deleted"""
+        if not doc_ids:
+            return 0
+
+        if self.use_mongodb:
+            result = self.collection.delete_many({'id': {'$in': list(doc_ids)}})
+            return result.deleted_count
+        elif self.backend == 'sqlite':
+            return self.sqlite.delete_many(doc_ids)
+        else:
+            if self._url_index:
+                removed = set(doc_ids)
+                for canonical_url, latest_id in list(self._url_index.items()):
+                    if latest_id in removed:
+                        del self._url_index[canonical_url]
+            return self.store.delete_many(doc_ids)
+
+    def move_content_to_blobs(self, batch_size: int = 500) -> int:
+        """Move page bodies still stored inline (documents written before blobs) to the blob store"""
+        if not self.blobs:
+            return 0
+
+        query = {'content': {'$exists': True}}
+        moved = 0
+        if self.use_mongodb:
+            batch = []
+            for doc in self.collection.find(query, {'_id': 1, 'content': 1}):
+                stored = self._to_stored({'content': self.compressor.expand_document(doc)['content']})
+                if 'content' in stored:
+                    continue  # Below BLOB_MIN_BYTES
+                batch.append(UpdateOne({'_id': doc['_id']}, {'$set': stored, '$unset': {'content': ''}}))
+                if len(batch) >= batch_size:
+                    moved += self.collection.bulk_write(batch, ordered=False).modified_count
+                    batch = []
+            if batch:
+                moved += self.collection.bulk_write(batch, ordered=False).modified_count
+            return moved
+
+        # Ids first: the stores must not be rewritten while they are being scanned
+        doc_ids = [doc['id'] for doc in self.find_documents(query, projection={'_id': 0, 'id': 1})]
+        get = self.sqlite.get if self.backend == 'sqlite' else self.store.get
+        for start in range(0, len(doc_ids), batch_size):
+            batch = [self.compressor.expand_document(get(doc_id)) for doc_id in doc_ids[start:start + batch_size]]
+            moved += self._rewrite_stored([doc for doc in batch if doc])
+        return moved
+
+    def collect_unreferenced_blobs(self, grace_seconds: float = 3600) -> int:
+        """Delete page bodies no stored document refers to any more (deleted or archived documents)"""
+        if not self.blobs:
+            return 0
+        live = {doc[BLOB_REF]['sha256'] for doc in self.find_documents(
+            {BLOB_REF: {'$exists': True}}, projection={'_id': 0, BLOB_REF: 1}
+        ) if doc.get(BLOB_REF)}
+        return self.blobs.collect_garbage(live, grace_seconds)
+
+    def _rewrite_stored(self, documents: List[Dict]) -> int:
+        """Write documents back through the storage boundary (file and sqlite backends)"""
+        if self.backend == 'sqlite':
+            self.sqlite.put_many(documents)
+        else:
+            self.store.put_many([(doc['id'], self._to_stored(doc)) for doc in documents])
+        return len(documents)
+
+    def search_text(self, text: str, limit: int = 20, query: Optional[Dict] = None) -> List[Dict]:
+        """Full-text search over title, meta description and page text.
+
+        The SQLite backend ranks results with FTS5/bm25; the other backends fall
+        back to a case-insensitive substring match in insertion order. In
+        MongoDB, page text stored compressed or in the blob store is not matched.
+        """
+        if self.backend == 'sqlite':
+            expression = self.sqlite.to_match_expression(text)
+            return [self._from_stored(doc) for doc in self.sqlite.search(expression, limit, query)] if expression else []
+
+        fields = ['title', 'meta_description', 'content.text']
+        if self.use_mongodb:
+            pattern = {'$regex': re.escape(text), '$options': 'i'}
+            mongo_query = {'$and': [query or {}, {'$or': [{field: pattern} for field in fields]}]}
+            cursor = self.collection.find(mongo_query, {'_id': 0}).limit(limit)
+            return [self._from_stored(doc) for doc in cursor]
+
+        needle = text.lower()
+        results = []
+        for doc in self.find_documents(query or {}):
+            if any(needle in str(get_field(doc, field) or '').lower() for field in fields):
+                results.append(doc)
+                if len(results) >= limit:
+                    break
+        return results
+
+    def close(self):
+        """Release database resources"""
+        # The shared MongoDB client stays open for other users and is closed at exit
+        if self.backend == 'sqlite':
+            self.sqlite.close()
+        elif self.backend == 'file':
+            self.store.close()
@@ -1,40 +1,327 @@
+import json
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Any, Dict, List, Optional, Union
+from urllib.parse import urlparse
+
+# Stored with every normalized document; readers can skip re-normalizing those
+SCHEMA_VERSION = 2
+
+def _str(value: Any) -> str:
+    return value if isinstance(value, str) else ('' if value is None else str(value))
+
+def _str_list(values: Any, key: str = 'url') -> List[str]:
+    """Strings from a list of strings or of dicts holding `key`"""
+    if not isinstance(values, list):
+        return []
+    items = []
+    for value in values:
+        if isinstance(value, dict):
+            value = value.get(key)
+        if value:
+            items.append(_str(value))
+    return items
+
+def _size(value: Any) -> Any:
+    """A file size as given: bytes stay a number, '2.5 MB'-style text stays text"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    return _str(value)
+
+def _extra(value: Dict, slots, consumed=()) -> Dict:
+    """Keys of a scraped item without a typed slot, kept as they are"""
+    return {k: v for k, v in value.items() if k not in slots and k not in consumed}
+
+def _serialize(value: Any) -> Any:
+    if isinstance(value, Record):
+        return value.to_dict()
+    if isinstance(value, list):
+        return [_serialize(item) for item in value]
+    return value
+
+class Record:
+    """Base for typed, slotted document records.
+
+    Subclasses list their fields in __slots__ and build instances through
+    from_value, which validates and normalizes whatever shape a scraper
+    produced. to_dict is the canonical serializer: its output contains only
+    BSON-compatible types and is what gets stored. Records with an `extra`
+    slot keep the fields they have no slot for there, and to_dict merges
+    them back, so normalizing never loses what a scraper wrote.
+    """
+    __slots__ = ()
+
+    def to_dict(self) -> Dict:
+        document = dict(self.extra) if 'extra' in self.__slots__ else {}
+        for name in self.__slots__:
+            if name != 'extra':
+                document[name] = _serialize(getattr(self, name))
+        return document
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and all(
+            getattr(self, name) == getattr(other, name) for name in self.__slots__
+        )
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+class ImageRecord(Record):
+    __slots__ = ('url', 'alt_text', 'title', 'caption', 'type', 'width', 'height', 'filename', 'extra')
+
+    def __init__(self, url: str, alt_text: str = '', title: str = '', caption: str = '',
+                 type: str = 'image', width: str = '', height: str = '', filename: str = '',
+                 extra: Dict = None):
+        self.url = url
+        self.alt_text = alt_text
+        self.title = title
+        self.caption = caption
+        self.type = type
+        self.width = width
+        self.height = height
+        self.filename = filename
+        self.extra = extra or {}  # source_tag, class, lazy_loading, ...
+
+    @classmethod
+    def from_value(cls, value: Any) -> Optional['ImageRecord']:
+        if isinstance(value, str):
+            return cls(value) if value else None
+        if not isinstance(value, dict) or not value.get('url'):
+            return None
+        get = value.get
+        return cls(
+            _str(get('url')),
+            # OSINT scrapers write 'alt', the page scrapers 'alt_text'
+            _str(get('alt_text') if get('alt_text') is not None else get('alt')),
+            _str(get('title')), _str(get('caption')), _str(get('type')) or 'image',
+            _str(get('width')), _str(get('height')), _str(get('filename')),
+            _extra(value, cls.__slots__, ('alt',))
+        )
+
+class VideoRecord(Record):
+    __slots__ = ('url', 'title', 'type', 'platform', 'thumbnail', 'video_id', 'filename', 'extra')
+
+    def __init__(self, url: str, title: str = '', type: str = 'video', platform: str = 'unknown',
+                 thumbnail: str = '', video_id: str = '', filename: str = '', extra: Dict = None):
+        self.url = url
+        self.title = title
+        self.type = type
+        self.platform = platform
+        self.thumbnail = thumbnail
+        self.video_id = video_id
+        self.filename = filename
+        self.extra = extra or {}  # source_tag, controls, autoplay, poster, ...
+
+    @classmethod
+    def from_value(cls, value: Any) -> Optional['VideoRecord']:
+        # Older documents store videos as bare URL strings
+        if isinstance(value, str):
+            return cls(value) if value else None
+        if not isinstance(value, dict) or not value.get('url'):
+            return None
+        get = value.get
+        return cls(
+            _str(get('url')), _str(get('title')), _str(get('type')) or 'video',
+            _str(get('platform')) or 'unknown', _str(get('thumbnail') or get('poster')),
+            _str(get('video_id')), _str(get('filename')), _extra(value, cls.__slots__)
+        )
+
+class AudioRecord(Record):
+    __slots__ = ('url', 'title', 'type', 'filename', 'extra')
+
+    def __init__(self, url: str, title: str = '', type: str = 'audio', filename: str = '', extra: Dict = None):
+        self.url = url
+        self.title = title
+        self.type = type
+        self.filename = filename
+        self.extra = extra or {}  # source_tag, controls, autoplay, ...
+
+    @classmethod
+    def from_value(cls, value: Any) -> Optional['AudioRecord']:
+        if isinstance(value, str):
+            return cls(value) if value else None
+        if not isinstance(value, dict) or not value.get('url'):
+            return None
+        get = value.get
+        return cls(_str(get('url')), _str(get('title')), _str(get('type')) or 'audio', _str(get('filename')),
+                   _extra(value, cls.__slots__))
+
+class DocumentLinkRecord(Record):
+    __slots__ = ('url', 'filename', 'type', 'file_size', 'link_text', 'description', 'extra')
+
+    def __init__(self, url: str, filename: str = '', type: str = 'document', file_size: Union[int, float, str] = '',
+                 link_text: str = '', description: str = '', extra: Dict = None):
+        self.url = url
+        self.filename = filename
+        self.type = type
+        self.file_size = file_size
+        self.link_text = link_text
+        self.description = description
+        self.extra = extra or {}  # is_direct_download, ...
+
+    @classmethod
+    def from_value(cls, value: Any) -> Optional['DocumentLinkRecord']:
+        if isinstance(value, str):
+            return cls(value) if value else None
+        if not isinstance(value, dict) or not value.get('url'):
+            return None
+        get = value.get
+        # OSINT scrapers store document links as {'url', 'text'}
+        link_text = _str(get('link_text') or get('text'))
+        return cls(
+            _str(get('url')), _str(get('filename')) or link_text, _str(get('type')) or 'document',
+            _size(get('file_size')), link_text, _str(get('description')), _extra(value, cls.__slots__, ('text',))
+        )
+
+class SocialLinkRecord(Record):
+    __slots__ = ('url', 'platform', 'link_text', 'title', 'extra')
+
+    def __init__(self, url: str, platform: str = 'unknown', link_text: str = '', title: str = '', extra: Dict = None):
+        self.url = url
+        self.platform = platform
+        self.link_text = link_text
+        self.title = title
+        self.extra = extra or {}
+
+    @classmethod
+    def from_value(cls, value: Any) -> Optional['SocialLinkRecord']:
+        if isinstance(value, str):
+            return cls(value) if value else None
+        if not isinstance(value, dict) or not value.get('url'):
+            return None
+        get = value.get
+        return cls(_str(get('url')), _str(get('platform')) or 'unknown', _str(get('link_text')), _str(get('title')),
+                   _extra(value, cls.__slots__))
+
+class MediaRecord(Record):
+    __slots__ = ('images', 'videos', 'audio', 'documents', 'social_media', 'extra')
+
+    ITEM_TYPES = {
+        'images': ImageRecord,
+        'videos': VideoRecord,
+        'audio': AudioRecord,
+        'documents': DocumentLinkRecord,
+        'social_media': SocialLinkRecord
+    }
+
+    def __init__(self, images=None, videos=None, audio=None, documents=None, social_media=None, extra=None):
+        self.images: List[ImageRecord] = images or []
+        self.videos: List[VideoRecord] = videos or []
+        self.audio: List[AudioRecord] = audio or []
+        self.documents: List[DocumentLinkRecord] = documents or []
+        self.social_media: List[SocialLinkRecord] = social_media or []
+        self.extra: Dict = extra or {}  # Untyped lists such as external_links
+
+    @classmethod
+    def from_value(cls, value: Any) -> 'MediaRecord':
+        """Normalize a media block; items without a url are dropped, untyped keys kept"""
+        if not isinstance(value, dict):
+            return cls()
+        lists = {'extra': _extra(value, cls.ITEM_TYPES)}
+        for name, item_type in cls.ITEM_TYPES.items():
+            items = value.get(name)
+            if items:
+                lists[name] = [record for record in map(item_type.from_value, items) if record is not None]
+        return cls(**lists)
+
+    def counts(self) -> Dict[str, int]:
+        return {name: len(getattr(self, name)) for name in self.ITEM_TYPES}
+
+class ContentRecord(Record):
+    __slots__ = ('text', 'headings', 'links')
+
+    def __init__(self, text: str = '', headings: List[str] = None, links: List[str] = None):
+        self.text = text
+        self.headings = headings or []
+        self.links = links or []
+
+    @classmethod
+    def from_value(cls, value: Any) -> 'ContentRecord':
+        if isinstance(value, str):
+            return cls(value)
+        if not isinstance(value, dict):
+            return cls()
+        return cls(_str(value.get('text')), _str_list(value.get('headings'), 'text'), _str_list(value.get('links')))
+
+class WebContentRecord(Record):
+    """A scraped page: validated core fields plus the remaining document fields.
+
+    Fields without a typed slot (metadata, search_metadata, content_analysis,
+    version bookkeeping, ...) are kept as-is in `extra` and merged back by
+    to_dict.
+    """
+    __slots__ = ('url', 'domain', 'title', 'meta_description', 'keywords', 'content', 'media', 'extra')
+
+    def __init__(self, url: str, domain: str = '', title: str = '', meta_description: str = '',
+                 keywords: List[str] = None, content: ContentRecord = None, media: MediaRecord = None,
+                 extra: Dict = None):
+        if not isinstance(url, str) or not url:
+            raise ValueError("A web content record needs a url")
+        self.url = url
+        self.domain = domain or (urlparse(url).hostname or '')
+        self.title = title
+        self.meta_description = meta_description
+        self.keywords = keywords or []
+        self.content = content or ContentRecord()
+        self.media = media or MediaRecord()
+        self.extra = extra or {}
+
+    @classmethod
+    def from_document(cls, document: Dict) -> 'WebContentRecord':
+        extra = {k: v for k, v in document.items() if k not in cls.__slots__}
+        trust_score = extra.get('metadata', {}).get('trust_score') if isinstance(extra.get('metadata'), dict) else None
+        if trust_score is not None and (isinstance(trust_score, bool) or not isinstance(trust_score, (int, float))):
+            raise ValueError(f"trust_score must be a number, got {trust_score!r}")
+
+        return cls(
+            document.get('url'),
+            _str(document.get('domain')),
+            _str(document.get('title')),
+            _str(document.get('meta_description')),
+            _str_list(document.get('keywords')),
+            ContentRecord.from_value(document.get('content')),
+            MediaRecord.from_value(document.get('media')),
+            extra
+        )
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), default=_json_default)
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def normalize_document(document: Dict) -> Dict:
+    """Bring a document to the canonical stored shape, in place.
+
+    Scraped pages (a url and a content dict) go through WebContentRecord;
+    other documents (OSINT items, subdomain lists) only get their media
+    block normalized. Raises ValueError for invalid documents.
+    """
+    if document.get('url') and isinstance(document.get('content'), dict):
+        canonical = WebContentRecord.from_document(document).to_dict()
+        document.clear()
+        document.update(canonical)
+    elif isinstance(document.get('media'), dict):
+        document['media'] = MediaRecord.from_value(document['media']).to_dict()
+    document['schema_version'] = SCHEMA_VERSION
+    return document
+
+def canonical_media(document: Dict) -> Dict:
+    """The document's media block in canonical form (normalizing older documents on the fly)"""
+    media = document.get('media')
+    if document.get('schema_version') == SCHEMA_VERSION and isinstance(media, dict):
+        return media
+    return MediaRecord.from_value(media).to_dict()
 
 class WebContentModel:
-    def __init__(self):
-        self.schema = {
-            "id": str,
-            "url": str,
-            "domain": str,
-            "title": str,
-            "meta_description": str,
-            "keywords": List[str],
-            "content": {
-                "text": str,
-                "headings": List[str],
-                "links": List[str]
-            },
-            "media": {
-                "images": List[Dict],
-                "videos": List[str],
-                "audio": List[str]
-            },
-            "metadata": {
-                "crawl_date": datetime,
-                "last_modified": datetime,
-                "content_type": str,
-                "language": str,
-                "trust_score": float
-            },
-            "social_signals": {
-                "twitter_mentions": int,
-                "shares": int,
-                "likes": int
-            }
-        }
-    
+    """Document validation; the schema is defined by the record classes above"""
+
     def validate_document(self, document: Dict) -> bool:
         """Validate document structure"""
-        required_fields = ["url", "domain", "content"]
-        return all(field in document for field in required_fields)
+        try:
+            WebContentRecord.from_document(document)
+        except (TypeError, ValueError):
+            return False
+        return 'content' in document
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from config.settings import Config
+from database.query import get_field
+
+# Parquet column -> (document field path, Arrow type). Only metadata and
+# content_analysis fields are exported; page text, links and media lists stay
+# in the database.
+COLUMNS = {
+    'id': ('id', pa.string()),
+    'url': ('url', pa.string()),
+    'canonical_url': ('canonical_url', pa.string()),
+    'domain': ('domain', pa.string()),
+    'title': ('title', pa.string()),
+    'crawl_date': ('metadata.crawl_date', pa.string()),
+    'data_type': ('search_metadata.data_type', pa.string()),
+    'search_engine': ('search_metadata.search_engine', pa.string()),
+    'search_id': ('search_metadata.search_id', pa.string()),
+    'keywords': ('search_metadata.keywords', pa.list_(pa.string())),
+    'content_type': ('metadata.content_type', pa.string()),
+    'content_length': ('metadata.content_length', pa.int64()),
+    'language': ('metadata.language', pa.string()),
+    'scraped_via': ('metadata.scraped_via', pa.string()),
+    'trust_score': ('metadata.trust_score', pa.float64()),
+    'images': ('metadata.media_count.images', pa.int64()),
+    'videos': ('metadata.media_count.videos', pa.int64()),
+    'documents': ('metadata.media_count.documents', pa.int64()),
+    'audio': ('metadata.media_count.audio', pa.int64()),
+    'social_media': ('metadata.media_count.social_media', pa.int64()),
+    'is_media_rich': ('metadata.is_media_rich', pa.bool_()),
+    'content_hash': ('content_analysis.content_hash', pa.string()),
+    'readability_score': ('content_analysis.readability_score', pa.float64()),
+    'quality_score': ('content_analysis.quality_assessment.overall_score', pa.float64()),
+    'is_spam': ('content_analysis.is_spam', pa.bool_()),
+    'extracted_keywords': ('content_analysis.extracted_keywords', pa.list_(pa.string())),
+    'version': ('version', pa.int64()),
+    'previous_version_id': ('previous_version_id', pa.string())
+}
+
+MEDIA_COLUMNS = ['images', 'videos', 'documents', 'audio', 'social_media']
+PARTITION_COLUMN = 'crawl_day'
+STATE_FILE = '_export_state.json'
+
+# An explicit schema keeps every file compatible, even when a batch has no values for a column
+SCHEMA = pa.schema([(column, arrow_type) for column, (_, arrow_type) in COLUMNS.items()] +
+                   [(PARTITION_COLUMN, pa.string())])
+
+def _coerce(value, arrow_type):
+    """Convert a document value to the column type, or None if it does not fit"""
+    if value is None:
+        return None
+    if pa.types.is_list(arrow_type):
+        items = value if isinstance(value, list) else [value]
+        return [str(item) for item in items]
+    if pa.types.is_boolean(arrow_type):
+        return value if isinstance(value, bool) else None
+    if pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            return None
+        return int(value) if pa.types.is_integer(arrow_type) else float(value)
+    return str(value)
+
+def document_row(document: Dict) -> Dict:
+    """Flatten one document into a Parquet row"""
+    row = {column: _coerce(get_field(document, path), arrow_type)
+           for column, (path, arrow_type) in COLUMNS.items()}
+    row[PARTITION_COLUMN] = (row['crawl_date'] or '')[:10] or 'unknown'
+    return row
+
+class ParquetExporter:
+    """Incremental export of document metadata to a Parquet dataset.
+
+    Files are partitioned by crawl day (crawl_day=YYYY-MM-DD/...parquet).
+    Each run appends the documents stored after the high-water mark saved
+    by the previous run, so re-running is cheap and never rewrites old files.
+    The mark is the inserted_at stamp the database puts on a document when
+    it is written (crawl_date is stamped when it is queued, and queued
+    documents from several writers land out of order). Every run also
+    re-scans the last `lag` seconds before the mark, for writes stamped
+    just before a concurrent export ran; ids exported in that window are
+    skipped. Versions superseded by a later crawl stay in the dataset;
+    load_metadata drops them by default.
+    """
+
+    def __init__(self, db, directory: str = None, batch_size: int = None, lag: float = None):
+        self.db = db
+        self.directory = directory or Config.PARQUET_DIR
+        self.batch_size = batch_size or Config.PARQUET_EXPORT_BATCH_SIZE
+        self.lag = Config.PARQUET_EXPORT_LAG if lag is None else lag
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    @property
+    def state_path(self) -> str:
+        return os.path.join(self.directory, STATE_FILE)
+
+    def load_state(self) -> Dict:
+        """High-water mark: the last exported inserted_at and the ids exported within the lag window"""
+        if not os.path.exists(self.state_path):
+            return {'crawl_date': None, 'ids_at_mark': [], 'exported': 0}  # Documents without inserted_at first
+        with open(self.state_path, 'r') as f:
+            return json.load(f)
+
+    def _save_state(self, state: Dict):
+        temp_path = self.state_path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_path, self.state_path)
+
+    def _window_start(self, mark: str) -> str:
+        return (datetime.fromisoformat(mark) - timedelta(seconds=self.lag)).isoformat() if mark else ''
+
+    def export(self) -> int:
+        """Append documents stored since the last export; returns the number of rows written"""
+        with self._lock:
+            state = self.load_state()
+            written = 0
+            if 'inserted_at' not in state:
+                written += self._export_legacy(state)
+
+            query = {'inserted_at': {'$exists': True}}
+            if state['inserted_at']:
+                query = {'inserted_at': {'$gte': self._window_start(state['inserted_at'])}}
+            for rows, stamps in self._batches(query, 'inserted_at', set(state['recent'])):
+                self._write_rows(rows)
+                state['recent'].update(stamps)
+                state['inserted_at'] = max([state['inserted_at']] + list(stamps.values()))
+                window_start = self._window_start(state['inserted_at'])
+                state['recent'] = {doc_id: stamp for doc_id, stamp in state['recent'].items() if stamp >= window_start}
+                state['exported'] += len(rows)
+                self._save_state(state)
+                written += len(rows)
+            return written
+
+    def _export_legacy(self, state: Dict) -> int:
+        """Documents stored before inserted_at existed, from the crawl_date mark of earlier exports"""
+        query = {'inserted_at': {'$exists': False}, 'metadata.crawl_date': {'$exists': True}}
+        if state.get('crawl_date'):
+            query['metadata.crawl_date'] = {'$gte': state['crawl_date']}
+
+        written = 0
+        for rows, _ in self._batches(query, 'metadata.crawl_date', set(state.get('ids_at_mark', []))):
+            self._write_rows(rows)
+            mark = rows[-1]['crawl_date']
+            ids_at_mark = [row['id'] for row in rows if row['crawl_date'] == mark]
+            if mark == state.get('crawl_date'):
+                ids_at_mark = state['ids_at_mark'] + ids_at_mark
+            state.update({'crawl_date': mark, 'ids_at_mark': ids_at_mark,
+                          'exported': state.get('exported', 0) + len(rows)})
+            self._save_state(state)
+            written += len(rows)
+
+        state.update({'inserted_at': '', 'recent': {}, 'exported': state.get('exported', 0)})
+        state.pop('crawl_date', None)
+        state.pop('ids_at_mark', None)
+        self._save_state(state)
+        return written
+
+    def _batches(self, query: Dict, order_field: str, skip_ids: set):
+        """(rows, {id: inserted_at}) per batch of matching documents not in skip_ids, in order_field order"""
+        projection = {'_id': 0, 'inserted_at': 1}
+        projection.update({path: 1 for path, _ in COLUMNS.values()})
+        documents = self.db.find_documents(query, projection=projection, sort=[(order_field, 1)], batch_size=1000)
+
+        rows: List[Dict] = []
+        stamps: Dict[str, str] = {}
+        for document in documents:
+            if document.get('id') in skip_ids:
+                continue
+            rows.append(document_row(document))
+            if document.get('inserted_at'):
+                stamps[document.get('id')] = document['inserted_at']
+            if len(rows) >= self.batch_size:
+                yield rows, stamps
+                rows, stamps = [], {}
+        if rows:
+            yield rows, stamps
+
+    def _write_rows(self, rows: List[Dict]):
+        table = pa.Table.from_pylist(rows, schema=SCHEMA)
+        pq.write_to_dataset(table, self.directory, partition_cols=[PARTITION_COLUMN])
+
+    def start_background(self, interval: float = None) -> threading.Thread:
+        """Export in a daemon thread, so readers of the dataset never wait for an export"""
+        interval = interval or Config.PARQUET_EXPORT_INTERVAL
+
+        def loop():
+            while True:
+                try:
+                    self.export()
+                except Exception as e:
+                    print(f"❌ Parquet export failed: {e}")
+                time.sleep(interval)
+
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        return thread
+
+def load_metadata(directory: str = None, columns: Optional[List[str]] = None,
+                  since: Optional[str] = None, latest_only: bool = True) -> pd.DataFrame:
+    """Load exported metadata as a DataFrame.
+
+    since ('YYYY-MM-DD') only reads partitions from that crawl day on.
+    latest_only keeps the newest version of each canonical URL.
+    """
+    directory = directory or Config.PARQUET_DIR
+    if not os.path.isdir(directory) or not any(
+            name.startswith(PARTITION_COLUMN + '=') for name in os.listdir(directory)):
+        return pd.DataFrame(columns=list(COLUMNS) + [PARTITION_COLUMN])
+
+    read_columns = None
+    if columns is not None:
+        read_columns = list(dict.fromkeys(columns + ['id'] + (['canonical_url', 'crawl_date'] if latest_only else [])))
+    filters = [(PARTITION_COLUMN, '>=', since)] if since else None
+
+    frame = pd.read_parquet(directory, columns=read_columns, filters=filters)
+    if PARTITION_COLUMN in frame:
+        frame[PARTITION_COLUMN] = frame[PARTITION_COLUMN].astype(str)
+
+    # A run interrupted between writing files and saving its mark may have re-exported rows
+    if 'id' in frame:
+        frame = frame.drop_duplicates('id', keep='last')
+
+    if latest_only and 'canonical_url' in frame and len(frame):
+        frame = frame.sort_values('crawl_date')
+        has_url = frame['canonical_url'].notna()
+        frame = pd.concat([
+            frame[has_url].drop_duplicates('canonical_url', keep='last'),
+            frame[~has_url]
+        ]).sort_values('crawl_date')
+
+    if columns is not None:
+        frame = frame[columns]
+    return frame.reset_index(drop=True)
+
+def summarize(frame: pd.DataFrame, top: int = 20) -> Dict:
+    """Domain distribution, media totals and trust scores with vectorized group-bys"""
+    if frame.empty:
+        return {'documents': 0, 'by_data_type': {}, 'top_domains': {}, 'media_totals': {},
+                'trust_by_data_type': {}, 'documents_per_day': {}}
+
+    media = frame[MEDIA_COLUMNS].fillna(0)
+    trust = frame.groupby('data_type', dropna=False)['trust_score'].agg(['count', 'mean', 'min', 'max'])
+
+    return {
+        'documents': int(len(frame)),
+        'by_data_type': frame['data_type'].fillna('unknown').value_counts().to_dict(),
+        'top_domains': frame['domain'].dropna().value_counts().head(top).to_dict(),
+        'media_totals': {column: int(total) for column, total in media.sum().items()},
+        'trust_by_data_type': {
+            str(data_type): {k: (None if pd.isna(v) else round(float(v), 2)) for k, v in row.items()}
+            for data_type, row in trust.iterrows()
+        },
+        'documents_per_day': frame[PARTITION_COLUMN].value_counts().sort_index().to_dict()
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Export document metadata to Parquet for analytics')
+    parser.add_argument('command', choices=['export', 'summary'],
+                        help='export: append new documents; summary: export, then print aggregates')
+    parser.add_argument('--backend', default=Config.DATABASE_BACKEND, help='Backend to export from')
+    parser.add_argument('--since', help='Only summarize crawl days from this date (YYYY-MM-DD)')
+    args = parser.parse_args()
+
+    from database.json_db import JSONDatabase
+
+    db = JSONDatabase(backend=args.backend)
+    try:
+        written = ParquetExporter(db).export()
+        print(f"✅ Exported {written} new documents to {Config.PARQUET_DIR}")
+    finally:
+        db.close()
+
+    if args.command == 'summary':
+        print(json.dumps(summarize(load_metadata(since=args.since)), indent=2, default=str))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""MongoDB-style query helpers for the file-based backends.
+
+Supports dotted field paths, equality (including membership in array
+fields), the comparison operators $eq, $ne, $gt, $gte, $lt, $lte, $in, $nin
+and $exists, and inclusion or exclusion projections.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+_MISSING = object()
+
+def get_field(document: Dict, path: str, default: Any = None) -> Any:
+    """Resolve a dotted field path such as 'metadata.crawl_date'"""
+    value = document
+    for part in path.split('.'):
+        if isinstance(value, dict) and part in value:
+            value = value[part]
+        else:
+            return default
+    return value
+
+def _compare(value: Any, operator: str, operand: Any) -> bool:
+    if operator == '$eq':
+        return _equals(value, operand)
+    if operator == '$ne':
+        return not _equals(value, operand)
+    if operator == '$in':
+        return any(_equals(value, item) for item in operand)
+    if operator == '$nin':
+        return not any(_equals(value, item) for item in operand)
+    if operator == '$exists':
+        return (value is not _MISSING) == bool(operand)
+
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if operator == '$gt':
+            return value > operand
+        if operator == '$gte':
+            return value >= operand
+        if operator == '$lt':
+            return value < operand
+        if operator == '$lte':
+            return value <= operand
+    except TypeError:
+        return False
+
+    raise ValueError(f"Unsupported query operator: {operator}")
+
+def _equals(value: Any, expected: Any) -> bool:
+    if value is _MISSING:
+        return expected is None
+    if isinstance(value, list) and not isinstance(expected, list):
+        return expected in value
+    return value == expected
+
+def matches(document: Dict, query: Optional[Dict]) -> bool:
+    """Check whether a document satisfies a query"""
+    if not query:
+        return True
+
+    for path, condition in query.items():
+        value = get_field(document, path, _MISSING)
+
+        if isinstance(condition, dict) and condition and all(k.startswith('$') for k in condition):
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        elif not _equals(value, condition):
+            return False
+
+    return True
+
+def apply_projection(document: Dict, projection: Optional[Dict]) -> Dict:
+    """Apply an inclusion ({'a.b': 1}) or exclusion ({'a.b': 0}) projection"""
+    if not projection:
+        return document
+
+    fields = {path: flag for path, flag in projection.items() if path != '_id'}
+    if not fields:
+        return document
+
+    if any(fields.values()):
+        projected = {}
+        for path in fields:
+            value = get_field(document, path, _MISSING)
+            if value is _MISSING:
+                continue
+            target = projected
+            parts = path.split('.')
+            for part in parts[:-1]:
+                target = target.setdefault(part, {})
+            target[parts[-1]] = value
+        return projected
+
+    projected = _copy_tree(document)
+    for path in fields:
+        target = projected
+        parts = path.split('.')
+        for part in parts[:-1]:
+            target = target.get(part) if isinstance(target, dict) else None
+            if target is None:
+                break
+        if isinstance(target, dict):
+            target.pop(parts[-1], None)
+    return projected
+
+def _copy_tree(document: Dict) -> Dict:
+    """Copy nested dicts so exclusions do not touch the original"""
+    return {k: _copy_tree(v) if isinstance(v, dict) else v for k, v in document.items()}
+
+def sort_key(sort: List[Tuple[str, int]]):
+    """Build a key function for a (field, direction) sort specification"""
+    def key(document: Dict):
+        parts = []
+        for path, direction in sort:
+            value = get_field(document, path)
+            # None sorts first, like MongoDB, then numbers, then everything else by its string form
+            is_number = isinstance(value, (int, float))
+            item = (value is not None, not is_number, value if is_number else str(value or ''))
+            parts.append(_Reversed(item) if direction < 0 else item)
+        return tuple(parts)
+    return key
+
+class _Reversed:
+    """Wrapper that inverts ordering for descending sort fields"""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __eq__(self, other):
+        return self.value == other.value
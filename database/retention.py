@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+
+import argparse
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+from config.settings import Config
+from database.json_db import LATEST_ONLY
+from database.query import get_field
+
+# Slim projection for roll-ups
+ROLLUP_PROJECTION = {
+    '_id': 0, 'domain': 1, 'metadata.crawl_date': 1, 'metadata.media_count': 1,
+    'metadata.trust_score': 1, 'search_metadata.data_type': 1
+}
+MEDIA_KEYS = ('images', 'videos', 'audio', 'documents')
+
+def _day(crawl_date) -> str:
+    return str(crawl_date or '')[:10] or 'unknown'
+
+def _empty_rollup(day: str, domain: str) -> Dict:
+    return {
+        'day': day, 'domain': domain, 'documents': 0,
+        'images': 0, 'videos': 0, 'audio': 0, 'media_documents': 0,
+        'trust_sum': 0.0, 'trust_count': 0, 'avg_trust': None,
+        'data_types': {}, 'final': False
+    }
+
+def add_to_rollup(rollup: Dict, document: Dict):
+    """Count one document into a (day, domain) roll-up"""
+    rollup['documents'] += 1
+
+    media_count = get_field(document, 'metadata.media_count') or {}
+    if isinstance(media_count, dict):
+        for key in MEDIA_KEYS:
+            value = media_count.get(key, 0)
+            if isinstance(value, int):
+                rollup['media_documents' if key == 'documents' else key] += value
+
+    trust = get_field(document, 'metadata.trust_score')
+    if isinstance(trust, (int, float)) and not isinstance(trust, bool):
+        rollup['trust_sum'] += trust
+        rollup['trust_count'] += 1
+        rollup['avg_trust'] = round(rollup['trust_sum'] / rollup['trust_count'], 3)
+
+    data_type = get_field(document, 'search_metadata.data_type') or 'unknown'
+    rollup['data_types'][data_type] = rollup['data_types'].get(data_type, 0) + 1
+
+class RollupStore:
+    """Per-domain, per-day summaries that stay hot after documents are archived.
+
+    Stored in the domain_daily_rollups collection on MongoDB, otherwise in a
+    JSON file (there are only days x domains entries).
+    """
+
+    def __init__(self, db, path: str = None):
+        self.db = db
+        self.path = path or Config.ROLLUPS_FILE
+        self._lock = threading.Lock()
+
+        if db.use_mongodb:
+            self.collection = db.db.domain_daily_rollups
+            try:
+                self.collection.create_index([('day', 1), ('domain', 1)], unique=True, name='day_domain')
+            except Exception as e:
+                print(f"⚠️ Could not create roll-up index: {e}")
+
+    def _load_file(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, 'r') as f:
+            return json.load(f)
+
+    def _save_file(self, rollups: Dict[str, Dict]):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = self.path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(rollups, f)
+        os.replace(temp_path, self.path)
+
+    def replace_days(self, rollups: List[Dict]):
+        """Replace all roll-ups of the days present in `rollups`"""
+        days = {rollup['day'] for rollup in rollups}
+        if not days:
+            return
+
+        if self.db.use_mongodb:
+            from pymongo import ReplaceOne
+            self.collection.delete_many({'day': {'$in': list(days)}})
+            self.collection.bulk_write([
+                ReplaceOne({'day': r['day'], 'domain': r['domain']}, r, upsert=True) for r in rollups
+            ], ordered=False)
+            return
+
+        with self._lock:
+            stored = {key: r for key, r in self._load_file().items() if r['day'] not in days}
+            for rollup in rollups:
+                stored[f"{rollup['day']}|{rollup['domain']}"] = rollup
+            self._save_file(stored)
+
+    def final_days(self) -> set:
+        """Days whose roll-ups were computed from their complete set of documents"""
+        if self.db.use_mongodb:
+            return set(self.collection.distinct('day', {'final': True}))
+        with self._lock:
+            return {r['day'] for r in self._load_file().values() if r.get('final')}
+
+    def query(self, since: Optional[str] = None, until: Optional[str] = None,
+              domain: Optional[str] = None) -> List[Dict]:
+        """Roll-ups between two days (inclusive, 'YYYY-MM-DD'), oldest first"""
+        conditions = {}
+        if since or until:
+            conditions['day'] = {}
+            if since:
+                conditions['day']['$gte'] = since
+            if until:
+                conditions['day']['$lte'] = until
+        if domain:
+            conditions['domain'] = domain
+
+        if self.db.use_mongodb:
+            cursor = self.collection.find(conditions, {'_id': 0}).sort([('day', 1), ('domain', 1)])
+            return list(cursor)
+
+        from database.query import matches
+        with self._lock:
+            rollups = [r for r in self._load_file().values() if matches(r, conditions)]
+        return sorted(rollups, key=lambda r: (r['day'], r['domain']))
+
+class RetentionManager:
+    """Moves documents older than the hot window to a compressed cold archive.
+
+    The hot store (the web_content collection, SQLite file or segments)
+    keeps only the last `hot_days` days, so dashboard queries never touch
+    older data. The latest version of a page stays hot for as long as
+    recrawls keep seeing it (last_seen). Archived documents are appended to monthly gzip-compressed
+    JSONL partitions (archive/YYYY-MM.jsonl.gz) keyed by crawl date, and
+    their per-domain daily roll-ups are finalized first so charts keep the
+    full history.
+    """
+
+    ARCHIVE_PATTERN = re.compile(r'^(\d{4}-\d{2})\.jsonl\.gz$')
+
+    def __init__(self, db, hot_days: int = None, archive_dir: str = None,
+                 batch_size: int = None, rollups: RollupStore = None, exporter=None):
+        self.db = db
+        self.hot_days = Config.HOT_RETENTION_DAYS if hot_days is None else hot_days
+        self.archive_dir = archive_dir or Config.ARCHIVE_DIR
+        self.batch_size = batch_size or Config.RETENTION_BATCH_SIZE
+        self.rollups = rollups or RollupStore(db)
+        self.exporter = exporter  # ParquetExporter brought up to date before anything is archived
+        self._lock = threading.Lock()
+
+    def cutoff(self, now: Optional[datetime] = None) -> str:
+        """crawl_date before which documents leave the hot store (start of that day)"""
+        now = now or datetime.now()
+        return (now - timedelta(days=self.hot_days)).strftime('%Y-%m-%dT00:00:00')
+
+    # ---------------------------------------------------------------- roll-ups
+
+    def roll_up(self, since: Optional[str] = None, until: Optional[str] = None, final: bool = False) -> int:
+        """Recompute roll-ups of hot documents crawled in [since, until); returns days updated"""
+        query = {'metadata.crawl_date': {}}
+        if since:
+            query['metadata.crawl_date']['$gte'] = since
+        if until:
+            query['metadata.crawl_date']['$lt'] = until
+        if not query['metadata.crawl_date']:
+            query = {}
+        # One document per page: superseded versions are not extra pages of their day
+        query.update(LATEST_ONLY)
+
+        # Final days were rolled up from all their documents before these were archived
+        skip_days = self.rollups.final_days()
+        per_key: Dict[tuple, Dict] = {}
+        for document in self.db.find_documents(query, projection=ROLLUP_PROJECTION, batch_size=2000):
+            day = _day(get_field(document, 'metadata.crawl_date'))
+            if day in skip_days:
+                continue
+            domain = document.get('domain') or 'unknown'
+            rollup = per_key.get((day, domain))
+            if rollup is None:
+                rollup = per_key[(day, domain)] = _empty_rollup(day, domain)
+            add_to_rollup(rollup, document)
+
+        for rollup in per_key.values():
+            rollup['final'] = final
+        self.rollups.replace_days(list(per_key.values()))
+        return len({day for day, _ in per_key})
+
+    # ---------------------------------------------------------------- archive
+
+    def _archive_path(self, month: str) -> str:
+        return os.path.join(self.archive_dir, f'{month}.jsonl.gz')
+
+    def archive(self, now: Optional[datetime] = None) -> Dict:
+        """Finalize roll-ups for, then archive and delete, documents older than the hot window"""
+        if self.hot_days <= 0:
+            return {'archived': 0, 'months': [], 'rollup_days': 0}
+
+        with self._lock:
+            cutoff = self.cutoff(now)
+
+            if self.exporter is not None:
+                self.exporter.export()
+
+            # Roll-ups first, from the complete set of documents of each day
+            rollup_days = self.roll_up(until=cutoff, final=True)
+
+            os.makedirs(self.archive_dir, exist_ok=True)
+            archived = 0
+            months = set()
+            for query in self.archive_queries(cutoff):
+                archived += self._archive_matching(query, months)
+
+            return {'archived': archived, 'months': sorted(months), 'rollup_days': rollup_days}
+
+    @staticmethod
+    def archive_queries(cutoff: str) -> List[Dict]:
+        """What leaves the hot store: superseded versions by crawl date, latest ones once no
+        recrawl has seen them within the window (an unchanged page only bumps last_seen)"""
+        return [
+            {'is_latest': False, 'metadata.crawl_date': {'$lt': cutoff}},
+            {'is_latest': True, 'last_seen': {'$lt': cutoff}},
+            # Documents without version bookkeeping (no URL, or stored before versions existed)
+            {'last_seen': {'$exists': False}, 'metadata.crawl_date': {'$lt': cutoff}}
+        ]
+
+    def _archive_matching(self, query: Dict, months: set) -> int:
+        """Append matching documents to their monthly partitions, then delete them from the hot store"""
+        archived = 0
+        while True:
+            batch = list(self.db.find_documents(
+                query, projection={'_id': 0}, sort=[('metadata.crawl_date', 1)], limit=self.batch_size
+            ))
+            if not batch:
+                return archived
+
+            by_month = defaultdict(list)
+            for document in batch:
+                by_month[_day(get_field(document, 'metadata.crawl_date'))[:7]].append(document)
+
+            # Data is on disk before it is deleted from the hot store
+            for month, documents in by_month.items():
+                with gzip.open(self._archive_path(month), 'at', encoding='utf-8') as f:
+                    for document in documents:
+                        f.write(json.dumps(document, default=str) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                months.add(month)
+
+            deleted = self.db.delete_many([document['id'] for document in batch if document.get('id')])
+            archived += len(batch)
+            if deleted == 0:
+                # Documents without ids cannot be deleted; stop instead of looping forever
+                print(f"⚠️ Archived {len(batch)} documents that could not be removed from hot storage")
+                return archived
+
+    def archived_months(self) -> List[str]:
+        if not os.path.isdir(self.archive_dir):
+            return []
+        return sorted(m.group(1) for m in map(self.ARCHIVE_PATTERN.match, os.listdir(self.archive_dir)) if m)
+
+    def iter_archive(self, month: str) -> Iterator[Dict]:
+        """Stream the archived documents of one month ('YYYY-MM')"""
+        path = self._archive_path(month)
+        if not os.path.exists(path):
+            return
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    def restore(self, month: str) -> int:
+        """Copy one archived month back into the hot store (it is archived again on the next run)"""
+        restored = 0
+        batch = []
+        for document in self.iter_archive(month):
+            batch.append(document)
+            if len(batch) >= self.batch_size:
+                restored += self.db.restore_documents(batch)
+                batch = []
+        return restored + self.db.restore_documents(batch)
+
+    def run(self, now: Optional[datetime] = None) -> Dict:
+        """Daily job: archive what left the hot window and refresh today's and yesterday's roll-ups"""
+        result = self.archive(now)
+        if result['archived']:
+            # Page bodies of archived documents are in the archive files now
+            result['blobs_removed'] = self.db.collect_unreferenced_blobs()
+        now = now or datetime.now()
+        since = (now - timedelta(days=1)).strftime('%Y-%m-%dT00:00:00')
+        result['rollup_days'] += self.roll_up(since=since)
+        return result
+
+    def start_background(self, interval: float = None) -> threading.Thread:
+        """Run the daily job in a daemon thread"""
+        interval = interval or Config.RETENTION_INTERVAL
+
+        def loop():
+            while True:
+                try:
+                    result = self.run()
+                    if result['archived']:
+                        print(f"🗄️ Archived {result['archived']} documents ({', '.join(result['months'])})")
+                except Exception as e:
+                    print(f"❌ Retention run failed: {e}")
+                time.sleep(interval)
+
+        thread = threading.Thread(target=loop, daemon=True)
+        thread.start()
+        return thread
+
+def main():
+    parser = argparse.ArgumentParser(description='Hot-window retention, cold archive and daily roll-ups')
+    parser.add_argument('command', choices=['run', 'rollup', 'restore', 'list'],
+                        help='run: archive and roll up; rollup: recompute roll-ups; '
+                             'restore: copy a month back to hot storage; list: archived months')
+    parser.add_argument('--backend', default=Config.DATABASE_BACKEND)
+    parser.add_argument('--hot-days', type=int, default=Config.HOT_RETENTION_DAYS)
+    parser.add_argument('--month', help='Month to restore (YYYY-MM)')
+    args = parser.parse_args()
+
+    from database.json_db import JSONDatabase
+
+    db = JSONDatabase(backend=args.backend)
+    try:
+        manager = RetentionManager(db, hot_days=args.hot_days)
+        if args.command == 'run':
+            result = manager.run()
+            print(f"✅ Archived {result['archived']} documents; roll-ups updated for {result['rollup_days']} days")
+        elif args.command == 'rollup':
+            print(f"✅ Roll-ups updated for {manager.roll_up()} days")
+        elif args.command == 'restore':
+            if not args.month:
+                parser.error('restore needs --month')
+            print(f"✅ Restored {manager.restore(args.month)} documents from {args.month}")
+        else:
+            for month in manager.archived_months():
+                print(f"  • {month}")
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
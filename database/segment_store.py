@@ -0,0 +1,313 @@
+import json
+import os
+import re
+import threading
+from typing import Dict, Iterator, List, Optional, Tuple
+
+class SegmentStore:
+    """Append-only JSONL segment storage with an in-memory offset index.
+
+    Every write appends one line to the active segment. A put record holds the
+    full document; a newer put for the same id supersedes the older one, and a
+    delete appends a tombstone. The index maps each live id to the
+    (segment, offset, length) of its latest record, so a lookup is one seek.
+    Superseded records and tombstones are reclaimed by compaction, which
+    rewrites the sealed segments in the background.
+    """
+
+    SEGMENT_PATTERN = re.compile(r'^segment-(\d{6})\.jsonl$')
+    MIGRATION_MARKER = 'MIGRATED'
+
+    def __init__(self, directory: str, max_segment_bytes: int = 64 * 1024 * 1024,
+                 compaction_ratio: float = 0.5, compaction_min_bytes: int = 8 * 1024 * 1024,
+                 legacy_file: Optional[str] = None):
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.compaction_ratio = compaction_ratio
+        self.compaction_min_bytes = compaction_min_bytes
+
+        self._lock = threading.RLock()
+        self._index: Dict[str, Tuple[int, int, int]] = {}
+        self._readers = {}
+        self._segment_bytes: Dict[int, int] = {}
+        self._dead_bytes = 0
+        self._compaction_thread = None
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_segments()
+
+        if legacy_file:
+            self._migrate_legacy_file(legacy_file)
+
+    # ------------------------------------------------------------------ setup
+
+    def _segment_path(self, segment_no: int) -> str:
+        return os.path.join(self.directory, f'segment-{segment_no:06d}.jsonl')
+
+    def _list_segments(self) -> List[int]:
+        segments = []
+        for name in os.listdir(self.directory):
+            match = self.SEGMENT_PATTERN.match(name)
+            if match:
+                segments.append(int(match.group(1)))
+        return sorted(segments)
+
+    def _load_segments(self):
+        """Replay all segments in order to rebuild the index"""
+        segments = self._list_segments()
+
+        for segment_no in segments:
+            offset = 0
+            with open(self._segment_path(segment_no), 'rb') as f:
+                for line in f:
+                    length = len(line)
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn write at the tail of a segment; ignore it
+                        self._dead_bytes += length
+                        offset += length
+                        continue
+
+                    self._apply_record(record, (segment_no, offset, length))
+                    offset += length
+            self._segment_bytes[segment_no] = offset
+
+        self._active_segment = segments[-1] if segments else 1
+        self._segment_bytes.setdefault(self._active_segment, 0)
+        self._writer = open(self._segment_path(self._active_segment), 'ab')
+
+    def _apply_record(self, record: Dict, location: Tuple[int, int, int]):
+        """Apply a replayed record to the index"""
+        doc_id = record.get('id')
+        previous = self._index.get(doc_id)
+        if previous:
+            self._dead_bytes += previous[2]
+
+        if record.get('deleted'):
+            self._index.pop(doc_id, None)
+            self._dead_bytes += location[2]
+        else:
+            self._index[doc_id] = location
+
+    def _migrate_legacy_file(self, legacy_file: str):
+        """Import a legacy single-file JSON database once"""
+        marker = os.path.join(self.directory, self.MIGRATION_MARKER)
+        if os.path.exists(marker) or not os.path.exists(legacy_file):
+            return
+
+        try:
+            with open(legacy_file, 'r') as f:
+                documents = json.load(f)
+        except ValueError as e:
+            print(f"⚠️ Could not migrate {legacy_file}: {e}")
+            return
+
+        records = []
+        for doc in documents:
+            if isinstance(doc, dict) and doc.get('id'):
+                records.append((doc['id'], doc))
+        self.put_many(records)
+
+        with open(marker, 'w') as f:
+            f.write(f"{legacy_file}\n{len(records)}\n")
+
+        if records:
+            print(f"📦 Migrated {len(records)} documents from {legacy_file}")
+
+    # ----------------------------------------------------------------- writes
+
+    def _append(self, records: List[Dict]) -> List[Tuple[int, int, int]]:
+        """Append encoded records to the active segment (caller holds the lock)"""
+        payload = [
+            (json.dumps(record, separators=(',', ':'), default=str) + '\n').encode('utf-8')
+            for record in records
+        ]
+
+        if self._segment_bytes[self._active_segment] >= self.max_segment_bytes:
+            self._roll_segment()
+
+        locations = []
+        offset = self._segment_bytes[self._active_segment]
+        for line in payload:
+            locations.append((self._active_segment, offset, len(line)))
+            offset += len(line)
+
+        self._writer.write(b''.join(payload))
+        self._writer.flush()
+        self._segment_bytes[self._active_segment] = offset
+        return locations
+
+    def _roll_segment(self):
+        """Seal the active segment and start a new one"""
+        self._writer.close()
+        self._active_segment += 1
+        self._segment_bytes[self._active_segment] = 0
+        self._writer = open(self._segment_path(self._active_segment), 'ab')
+
+    def put(self, doc_id: str, document: Dict):
+        """Store a document, superseding any earlier version"""
+        self.put_many([(doc_id, document)])
+
+    def put_many(self, items: List[Tuple[str, Dict]]):
+        """Store several documents with a single append"""
+        if not items:
+            return
+
+        with self._lock:
+            locations = self._append([{'id': doc_id, 'doc': doc} for doc_id, doc in items])
+            for (doc_id, _), location in zip(items, locations):
+                previous = self._index.get(doc_id)
+                if previous:
+                    self._dead_bytes += previous[2]
+                self._index[doc_id] = location
+
+        self._maybe_compact()
+
+    def delete(self, doc_id: str) -> bool:
+        """Append a tombstone for a document"""
+        return self.delete_many([doc_id]) > 0
+
+    def delete_many(self, doc_ids: List[str]) -> int:
+        """Append tombstones for several documents with a single append"""
+        with self._lock:
+            previous = [(doc_id, self._index.pop(doc_id)) for doc_id in doc_ids if doc_id in self._index]
+            if not previous:
+                return 0
+
+            locations = self._append([{'id': doc_id, 'deleted': True} for doc_id, _ in previous])
+            for (_, old_location), location in zip(previous, locations):
+                self._dead_bytes += old_location[2] + location[2]
+
+        self._maybe_compact()
+        return len(previous)
+
+    # ------------------------------------------------------------------ reads
+
+    def _read(self, location: Tuple[int, int, int]) -> Dict:
+        segment_no, offset, length = location
+        with self._lock:
+            reader = self._readers.get(segment_no)
+            if reader is None:
+                reader = open(self._segment_path(segment_no), 'rb')
+                self._readers[segment_no] = reader
+            reader.seek(offset)
+            line = reader.read(length)
+        return json.loads(line)['doc']
+
+    def get(self, doc_id: str) -> Optional[Dict]:
+        """Fetch a document by id with a single seek"""
+        with self._lock:
+            location = self._index.get(doc_id)
+            if location is None:
+                return None
+            return self._read(location)
+
+    def __contains__(self, doc_id: str) -> bool:
+        return doc_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def ids(self) -> List[str]:
+        """Live document ids in insertion order"""
+        with self._lock:
+            return list(self._index.keys())
+
+    def scan(self, reverse: bool = False) -> Iterator[Dict]:
+        """Iterate over live documents in insertion order (newest first if reverse)"""
+        ids = self.ids()
+        if reverse:
+            ids.reverse()
+
+        for doc_id in ids:
+            document = self.get(doc_id)
+            if document is not None:
+                yield document
+
+    # ------------------------------------------------------------- compaction
+
+    def stats(self) -> Dict:
+        """Storage statistics for monitoring"""
+        with self._lock:
+            total = sum(self._segment_bytes.values())
+            return {
+                'documents': len(self._index),
+                'segments': len(self._segment_bytes),
+                'total_bytes': total,
+                'dead_bytes': self._dead_bytes,
+                'compacting': bool(self._compaction_thread and self._compaction_thread.is_alive())
+            }
+
+    def _maybe_compact(self):
+        """Start background compaction when enough space is dead"""
+        with self._lock:
+            total = sum(self._segment_bytes.values())
+            if total < self.compaction_min_bytes or self._dead_bytes < total * self.compaction_ratio:
+                return
+            if self._compaction_thread and self._compaction_thread.is_alive():
+                return
+
+            self._compaction_thread = threading.Thread(target=self.compact, daemon=True)
+            self._compaction_thread.start()
+
+    def compact(self):
+        """Rewrite sealed segments so that they only hold live records.
+
+        The active segment is sealed first so compaction only reads immutable
+        files. Live records are copied, in index order, into a file that
+        replaces the lowest sealed segment, so replaying segments by number
+        still lets later writes win. Index entries are only moved if they were
+        not updated while the copy was running.
+        """
+        with self._lock:
+            self._roll_segment()
+            sealed = [no for no in sorted(self._segment_bytes) if no != self._active_segment]
+            if not sealed:
+                return
+            sealed_set = set(sealed)
+            snapshot = [(doc_id, loc) for doc_id, loc in self._index.items() if loc[0] in sealed_set]
+
+        target = sealed[0]
+        temp_path = self._segment_path(target) + '.compact'
+        moved = []
+        offset = 0
+
+        with open(temp_path, 'wb') as out:
+            for doc_id, location in snapshot:
+                segment_no, src_offset, length = location
+                with open(self._segment_path(segment_no), 'rb') as src:
+                    src.seek(src_offset)
+                    line = src.read(length)
+                out.write(line)
+                moved.append((doc_id, location, (target, offset, length)))
+                offset += length
+
+        with self._lock:
+            for reader_no in sealed:
+                reader = self._readers.pop(reader_no, None)
+                if reader:
+                    reader.close()
+
+            os.replace(temp_path, self._segment_path(target))
+            for segment_no in sealed[1:]:
+                os.remove(self._segment_path(segment_no))
+                self._segment_bytes.pop(segment_no, None)
+
+            self._segment_bytes[target] = offset
+
+            for doc_id, old_location, new_location in moved:
+                if self._index.get(doc_id) == old_location:
+                    self._index[doc_id] = new_location
+
+            live = sum(self._segment_bytes.values())
+            indexed = sum(loc[2] for loc in self._index.values())
+            self._dead_bytes = max(0, live - indexed)
+
+    def close(self):
+        """Close open file handles"""
+        with self._lock:
+            self._writer.close()
+            for reader in self._readers.values():
+                reader.close()
+            self._readers.clear()
@@ -0,0 +1,323 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import zlib
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from database.query import apply_projection, get_field, matches, sort_key
+
+class SQLiteStore:
+    """Embedded document store on sqlite3 with an FTS5 full-text index.
+
+    Frequently queried fields are copied into typed, indexed columns; the full
+    document is kept as a zlib-compressed JSON blob. Queries on those columns
+    (and sorts on them) run in SQL; any other condition is evaluated on the
+    decoded documents. title, meta_description and content.text are indexed
+    with FTS5 for ranked search.
+
+    `body_filter`, if given, is applied to each document before its body is
+    encoded (the FTS index is built from the unfiltered document).
+    """
+
+    # column -> document field path
+    HOT_COLUMNS = {
+        'id': 'id',
+        'url': 'url',
+        'canonical_url': 'canonical_url',
+        'domain': 'domain',
+        'data_type': 'search_metadata.data_type',
+        'search_id': 'search_metadata.search_id',
+        'crawl_date': 'metadata.crawl_date',
+        'trust_score': 'metadata.trust_score',
+        'inserted_at': 'inserted_at'
+    }
+    FIELD_COLUMNS = {path: column for column, path in HOT_COLUMNS.items()}
+    NATURAL_ORDER = '$natural'
+
+    # $ne stays in Python: MongoDB semantics also match documents missing the field
+    SQL_OPERATORS = {'$eq': '=', '$gt': '>', '$gte': '>=', '$lt': '<', '$lte': '<='}
+
+    COLUMN_TYPES = {'trust_score': 'REAL'}
+
+    SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS documents (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            id TEXT NOT NULL UNIQUE,
+            url TEXT,
+            canonical_url TEXT,
+            domain TEXT,
+            data_type TEXT,
+            search_id TEXT,
+            crawl_date TEXT,
+            trust_score REAL,
+            inserted_at TEXT,
+            body BLOB NOT NULL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_documents_url ON documents(url)",
+        "CREATE INDEX IF NOT EXISTS idx_documents_canonical_url ON documents(canonical_url)",
+        "CREATE INDEX IF NOT EXISTS idx_documents_domain ON documents(domain)",
+        "CREATE INDEX IF NOT EXISTS idx_documents_data_type ON documents(data_type, crawl_date)",
+        "CREATE INDEX IF NOT EXISTS idx_documents_search_id ON documents(search_id)",
+        "CREATE INDEX IF NOT EXISTS idx_documents_crawl_date ON documents(crawl_date)",
+        "CREATE INDEX IF NOT EXISTS idx_documents_inserted_at ON documents(inserted_at)",
+        """CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+            title, meta_description, text, tokenize='porter unicode61'
+        )"""
+    ]
+
+    def __init__(self, path: str, body_filter: Optional[Callable[[Dict], Dict]] = None):
+        self.path = path
+        self.body_filter = body_filter
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+
+        conn = self._connection()
+        with conn:
+            conn.execute(self.SCHEMA[0])
+            self._add_missing_columns(conn)
+            for statement in self.SCHEMA[1:]:
+                conn.execute(statement)
+
+    def _add_missing_columns(self, conn: sqlite3.Connection):
+        """Bring databases created by older versions up to the current columns"""
+        existing = {row[1] for row in conn.execute('PRAGMA table_info(documents)')}
+        for column in self.HOT_COLUMNS:
+            if column not in existing:
+                conn.execute(f"ALTER TABLE documents ADD COLUMN {column} {self.COLUMN_TYPES.get(column, 'TEXT')}")
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers run alongside the writer"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # ----------------------------------------------------------------- encoding
+
+    @staticmethod
+    def _encode(document: Dict) -> bytes:
+        return zlib.compress(json.dumps(document, separators=(',', ':'), default=str).encode('utf-8'))
+
+    @staticmethod
+    def _decode(body: bytes) -> Dict:
+        return json.loads(zlib.decompress(body))
+
+    def _row_values(self, document: Dict) -> Tuple:
+        values = []
+        for column, path in self.HOT_COLUMNS.items():
+            value = get_field(document, path)
+            if column == 'trust_score':
+                value = value if isinstance(value, (int, float)) else None
+            elif value is not None:
+                value = str(value)
+            values.append(value)
+        values.append(self._encode(self.body_filter(document) if self.body_filter else document))
+        return tuple(values)
+
+    @staticmethod
+    def _fts_values(document: Dict) -> Tuple[str, str, str]:
+        content = document.get('content')
+        text = content.get('text', '') if isinstance(content, dict) else content
+        return (
+            str(document.get('title') or ''),
+            str(document.get('meta_description') or ''),
+            str(text or '')
+        )
+
+    # ------------------------------------------------------------------ writes
+
+    def put_many(self, documents: List[Dict]):
+        """Insert or replace documents (keyed by their id) in one transaction"""
+        if not documents:
+            return
+
+        columns = list(self.HOT_COLUMNS) + ['body']
+        placeholders = ', '.join('?' for _ in columns)
+        updates = ', '.join(f'{c} = excluded.{c}' for c in columns if c != 'id')
+        upsert = (f"INSERT INTO documents ({', '.join(columns)}) VALUES ({placeholders}) "
+                  f"ON CONFLICT(id) DO UPDATE SET {updates}")
+
+        conn = self._connection()
+        with self._write_lock, conn:
+            for document in documents:
+                conn.execute(upsert, self._row_values(document))
+                seq = conn.execute('SELECT seq FROM documents WHERE id = ?', (document['id'],)).fetchone()[0]
+                fts_values = self._fts_values(document)
+                if 'content' not in document:
+                    # Stored documents re-written without their body keep the indexed text
+                    row = conn.execute('SELECT text FROM documents_fts WHERE rowid = ?', (seq,)).fetchone()
+                    if row:
+                        fts_values = fts_values[:2] + (row[0],)
+                conn.execute('DELETE FROM documents_fts WHERE rowid = ?', (seq,))
+                conn.execute(
+                    'INSERT INTO documents_fts (rowid, title, meta_description, text) VALUES (?, ?, ?, ?)',
+                    (seq,) + fts_values
+                )
+
+    def put(self, document: Dict):
+        self.put_many([document])
+
+    def delete(self, doc_id: str) -> bool:
+        return self.delete_many([doc_id]) > 0
+
+    def delete_many(self, doc_ids: List[str]) -> int:
+        """Delete documents by id in one transaction; returns how many existed"""
+        deleted = 0
+        conn = self._connection()
+        with self._write_lock, conn:
+            for doc_id in doc_ids:
+                row = conn.execute('SELECT seq FROM documents WHERE id = ?', (doc_id,)).fetchone()
+                if row is None:
+                    continue
+                conn.execute('DELETE FROM documents_fts WHERE rowid = ?', (row[0],))
+                conn.execute('DELETE FROM documents WHERE seq = ?', (row[0],))
+                deleted += 1
+        return deleted
+
+    # ------------------------------------------------------------------- reads
+
+    def get(self, doc_id: str) -> Optional[Dict]:
+        row = self._connection().execute('SELECT body FROM documents WHERE id = ?', (doc_id,)).fetchone()
+        return self._decode(row[0]) if row else None
+
+    def _split_query(self, query: Dict) -> Tuple[List[str], List, Dict]:
+        """Split a query into SQL conditions on hot columns and a residual query"""
+        clauses, params, residual = [], [], {}
+
+        for path, condition in query.items():
+            column = self.FIELD_COLUMNS.get(path)
+            if column is None:
+                residual[path] = condition
+                continue
+
+            if not isinstance(condition, dict):
+                if condition is None:
+                    clauses.append(f'{column} IS NULL')
+                else:
+                    clauses.append(f'{column} = ?')
+                    params.append(condition)
+                continue
+
+            for operator, operand in condition.items():
+                if operator in self.SQL_OPERATORS and operand is not None:
+                    clauses.append(f'{column} {self.SQL_OPERATORS[operator]} ?')
+                    params.append(operand)
+                elif operator == '$in' and None not in operand:
+                    clauses.append(f"{column} IN ({', '.join('?' for _ in operand)})")
+                    params.extend(operand)
+                else:
+                    residual.setdefault(path, {})[operator] = operand
+
+        return clauses, params, residual
+
+    def _sql_order(self, sort: Optional[List[Tuple[str, int]]]) -> Optional[str]:
+        """ORDER BY clause if every sort field is a column, else None"""
+        if not sort:
+            return 'seq'
+
+        terms = []
+        for path, direction in sort:
+            column = 'seq' if path == self.NATURAL_ORDER else self.FIELD_COLUMNS.get(path)
+            if column is None:
+                return None
+            terms.append(f"{column} {'DESC' if direction < 0 else 'ASC'}")
+        return ', '.join(terms)
+
+    def find(self, query: Optional[Dict] = None, projection: Optional[Dict] = None,
+             sort: Optional[List[Tuple[str, int]]] = None, limit: int = 0, skip: int = 0,
+             batch_size: int = 500) -> Iterator[Dict]:
+        """Lazily iterate over matching documents, pushing what it can into SQL"""
+        clauses, params, residual = self._split_query(query or {})
+        order = self._sql_order(sort)
+
+        sql = 'SELECT body FROM documents'
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        if order:
+            sql += ' ORDER BY ' + order
+
+        # skip/limit can only run in SQL when nothing is filtered or sorted afterwards
+        pushdown = order is not None and not residual
+        if pushdown and (limit or skip):
+            sql += ' LIMIT ? OFFSET ?'
+            params = params + [limit if limit else -1, skip]
+
+        cursor = self._connection().execute(sql, params)
+        cursor.arraysize = batch_size
+
+        def documents():
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    return
+                for (body,) in rows:
+                    document = self._decode(body)
+                    if residual and not matches(document, residual):
+                        continue
+                    yield document
+
+        results = documents()
+        if order is None:
+            results = iter(sorted(results, key=sort_key(sort)))
+
+        emitted = 0
+        skipped = 0 if not pushdown else skip
+        for document in results:
+            if skipped < skip:
+                skipped += 1
+                continue
+            if limit and emitted >= limit:
+                return
+            emitted += 1
+            yield apply_projection(document, projection)
+
+    @staticmethod
+    def to_match_expression(text: str) -> str:
+        """Turn free text into an FTS5 query that matches all of its words"""
+        return ' '.join(f'"{word}"' for word in re.findall(r'\w+', text))
+
+    def search(self, text: str, limit: int = 20, query: Optional[Dict] = None) -> List[Dict]:
+        """Ranked full-text search over title, meta_description and content.text.
+
+        text is an FTS5 query expression; use to_match_expression for user input.
+        """
+        clauses, params, residual = self._split_query(query or {})
+        where = ''.join(f' AND d.{clause}' for clause in clauses)
+
+        # bm25 weights: title matches count most, body text least
+        sql = (
+            "SELECT d.body, bm25(documents_fts, 10.0, 5.0, 1.0) AS rank, "
+            "snippet(documents_fts, 2, '[', ']', '…', 16) "
+            "FROM documents_fts JOIN documents d ON d.seq = documents_fts.rowid "
+            f"WHERE documents_fts MATCH ?{where} ORDER BY rank LIMIT ?"
+        )
+        rows = self._connection().execute(sql, [text] + params + [limit * 4 if residual else limit])
+
+        results = []
+        for body, rank, snippet in rows:
+            document = self._decode(body)
+            if residual and not matches(document, residual):
+                continue
+            document['search_score'] = -rank
+            document['search_snippet'] = snippet
+            results.append(document)
+            if len(results) >= limit:
+                break
+        return results
+
+    def count(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,118 @@
+import atexit
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+from config.settings import Config
+from database.async_writer import failed_documents
+
+class WriteBehindBuffer:
+    """Collects documents in memory and writes them with insert_many.
+
+    `add` assigns the document id and returns immediately; a background thread
+    flushes the buffer once it holds `max_size` documents, once the oldest
+    document is `max_age` seconds old, or on shutdown. Flush failures are
+    handed to `on_error(exception, documents)` instead of being raised in the
+    caller's thread, with only the documents that were not written.
+    """
+
+    def __init__(self, db, max_size: int = None, max_age: float = None,
+                 on_error: Optional[Callable[[Exception, List[Dict]], None]] = None):
+        self.db = db
+        self.max_size = max_size or Config.WRITE_BUFFER_MAX_SIZE
+        self.max_age = max_age or Config.WRITE_BUFFER_MAX_AGE
+        self.on_error = on_error or self._print_error
+
+        self._pending: List[Dict] = []
+        self._oldest = None
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._closed = False
+
+        self.stats = {'buffered': 0, 'written': 0, 'failed': 0, 'flushes': 0}
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def add(self, document: Dict) -> str:
+        """Queue a document for writing and return its id right away.
+
+        A page already stored with the same content keeps the stored version's
+        id (see JSONDatabase.upsert_many), so for an unchanged page the returned
+        id is never written; look such pages up by canonical_url.
+        """
+        self.db.prepare_document(document)
+
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("WriteBehindBuffer is closed")
+
+            self._pending.append(document)
+            self.stats['buffered'] += 1
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            if len(self._pending) >= self.max_size:
+                self._condition.notify()
+
+        return document['id']
+
+    def _run(self):
+        """Background flush loop"""
+        while True:
+            with self._condition:
+                while not self._closed and not self._due():
+                    timeout = None
+                    if self._oldest is not None:
+                        timeout = max(0.0, self._oldest + self.max_age - time.monotonic())
+                    self._condition.wait(timeout)
+
+                if self._closed:
+                    return
+
+            self.flush()
+
+    def _due(self) -> bool:
+        """Whether the buffer should be flushed now (caller holds the lock)"""
+        if not self._pending:
+            return False
+        if len(self._pending) >= self.max_size:
+            return True
+        return time.monotonic() - self._oldest >= self.max_age
+
+    def flush(self):
+        """Write everything buffered so far"""
+        with self._flush_lock:
+            with self._condition:
+                batch = self._pending
+                self._pending = []
+                self._oldest = None
+
+            if not batch:
+                return
+
+            try:
+                self.db.insert_many(batch, prepared=True)
+                self.stats['written'] += len(batch)
+            except Exception as e:
+                # Of a partially failed bulk write, only the documents it names
+                failed = failed_documents(e, batch)
+                self.stats['failed'] += len(failed)
+                self.stats['written'] += len(batch) - len(failed)
+                if failed:
+                    self.on_error(e, failed)
+            finally:
+                self.stats['flushes'] += 1
+
+    def close(self):
+        """Flush remaining documents and stop the background thread"""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify()
+
+        self._thread.join(timeout=5)
+        self.flush()
+
+    def _print_error(self, error: Exception, documents: List[Dict]):
+        print(f"❌ Failed to write {len(documents)} buffered documents: {error}")
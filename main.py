@@ -4,10 +4,12 @@ import argparse
 import json
 from typing import List, Dict, Optional
 from database.json_db import JSONDatabase
+from database.write_buffer import WriteBehindBuffer
 from scrapers.google_dorker import GoogleDorker
 from scrapers.duckduckgo_scraper import DuckDuckGoScraper  # New import
 from scrapers.twitter_dorker import TwitterDorker
 from scrapers.youtube_dorker import YouTubeDorker
+from scrapers.frontier import CrawlFrontier
 from scrapers.reverse_engineer import ReverseEngineer
 from utils.content_processor import ContentProcessor  # New import
 from utils.media_handler import MediaHandler  # New import
@@ -16,7 +18,8 @@ from config.settings import Config
 
 class WebScrapingSystem:
     def __init__(self):
-        self.db = JSONDatabase()
+        self.db = JSONDatabase(backend=Config.DATABASE_BACKEND)
+        self.writer = WriteBehindBuffer(self.db)
         self.scrapers = {
             'google_dork': GoogleDorker(),
             'duckduckgo': DuckDuckGoScraper(),  # New scraper
@@ -24,6 +27,8 @@ class WebScrapingSystem:
             'youtube_dork': YouTubeDorker()
         }
         self.reverse_engineer = ReverseEngineer()
+        # Shared by all engines: pages fetched recently (by any engine or run) are not fetched again
+        self.frontier = CrawlFrontier()
         
         # Initialize utility classes
         self.content_processor = ContentProcessor()
@@ -55,23 +60,38 @@ class WebScrapingSystem:
                     
                     print(f"Found {len(search_results)} results from {engine}")
                     
-                    # Process and scrape results
-                    for i, result in enumerate(search_results[:15]):  # Limit results per engine
-                        print(f"[{i+1}/{len(search_results[:15])}] Processing: {result['url']}")
-                        
-                        # Scrape the content
-                        scraped_content = self.scrapers[engine].scrape_url(result['url'])
+                    # New pages only, best first; scraped all at once, hosts are fetched concurrently
+                    results_to_scrape, new = self.frontier.select(
+                        search_results, engine, Config.FRONTIER_BATCH_SIZE, self.scrapers[engine].is_trusted_domain
+                    )
+                    print(f"{new} new, {len(search_results) - new} already fetched or queued")
+                    try:
+                        # Pages stored unchanged by an earlier run (HTTP cache hit or 304) are touched and come back as None
+                        scraped_pages = self.scrapers[engine].scrape_urls(
+                            [result['url'] for result in results_to_scrape], skip_unchanged=self.db.touch_unchanged
+                        )
+                        self.frontier.mark_fetched([r['url'] for r, page in zip(results_to_scrape, scraped_pages) if page != {}])
+                    finally:
+                        # Failed pages (all of them if scraping raised) may be found and tried again
+                        self.frontier.release([r['url'] for r in results_to_scrape])
+                    
+                    # Process scraped results
+                    for i, (result, scraped_content) in enumerate(zip(results_to_scrape, scraped_pages)):
+                        print(f"[{i+1}/{len(results_to_scrape)}] Processing: {result['url']}")
                         
-                        if scraped_content:
+                        if scraped_content is None:
+                            print("♻️ Unchanged since last run, already stored")
+                        elif scraped_content:
                             # Process content with utilities
                             processed_content = self.process_scraped_content(
                                 scraped_content, keywords, engine, result
                             )
                             
                             if processed_content:
-                                # Store in database
-                                doc_id = self.db.insert_document(processed_content)
-                                print(f"✅ Stored: {doc_id}")
+                                # Queue for storage; written in batches in the background. An unchanged
+                                # page keeps its stored version's id rather than this one
+                                doc_id = self.writer.add(processed_content)
+                                print(f"✅ Queued for storage: {doc_id}")
                                 all_results.append(processed_content)
                             else:
                                 print("❌ Content validation failed")
@@ -164,6 +184,15 @@ def main():
     
     system = WebScrapingSystem()
     
+    try:
+        run_system(system, args)
+    finally:
+        # Make sure buffered documents reach the database
+        system.writer.close()
+
+def run_system(system: WebScrapingSystem, args):
+    """Dispatch the requested CLI action"""
+    
     if args.comprehensive and args.keywords:
         # Comprehensive search using all engines
         all_engines = ['duckduckgo', 'google_dork', 'twitter_dork', 'youtube_dork']
@@ -3,18 +3,21 @@ import json
 import time
 import random
 import requests
-from typing import List, Dict, Set
+import httpx
+from typing import List, Dict, Optional, Set, Tuple
 import dns.resolver
 import whois
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse
 import builtwith
 from waybackpy import WaybackMachineCDXServerAPI
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-import undetected_chromedriver as uc
-from bs4 import BeautifulSoup
 import concurrent.futures
 import threading
+from config.settings import Config
+from scrapers.browser_pool import get_browser_pool
+from scrapers.fetch_engine import FetchedPage, get_fetch_engine
+from scrapers.html_extractor import HTMLExtractor
+from scrapers.rate_limiter import get_rate_limiter
+from scrapers.render_decision import shell_reason
 
 class OSINTReconEngine:
     def __init__(self):
@@ -22,9 +25,11 @@ class OSINTReconEngine:
         self.discovered_subdomains = set()
         self.discovered_urls = set()
         self.intelligence_data = []
-        
-        # Setup Selenium with error handling
-        self.setup_selenium()
+        self.fetcher = get_fetch_engine()  # Static HTML first, paced per host
+        self.rate_limiter = get_rate_limiter()  # Per-host spacing shared with the scrapers
+        self.extractor = HTMLExtractor()
+        # Shared warm browser contexts; launched on first use, requests-only if that fails
+        self.browser = get_browser_pool()
         
         # Indian Navy known domains for reconnaissance
         self.seed_domains = [
@@ -36,29 +41,6 @@ class OSINTReconEngine:
             'drdo.gov.in'
         ]
     
-    def setup_selenium(self):
-        """Setup Chrome driver with proper error handling"""
-        try:
-            options = uc.ChromeOptions()
-            options.add_argument('--no-sandbox')
-            options.add_argument('--disable-dev-shm-usage')
-            options.add_argument('--disable-gpu')
-            options.add_argument('--disable-web-security')
-            options.add_argument('--disable-images')
-            options.add_argument('--disable-javascript')
-            
-            # Simple user agent
-            options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-            options.add_argument('--window-size=1920,1080')
-            
-            self.driver = uc.Chrome(options=options)
-            print("✅ Selenium Chrome driver initialized successfully")
-            
-        except Exception as e:
-            print(f"❌ Selenium setup failed: {e}")
-            print("🔄 Continuing with requests-only mode...")
-            self.driver = None
-    
     def comprehensive_subdomain_enumeration(self, domain: str) -> Set[str]:
         """Enhanced subdomain discovery using multiple working methods"""
         subdomains = set()
@@ -223,78 +205,90 @@ class OSINTReconEngine:
         
         return subdomains
     
+    # Browser-like headers for target sites
+    REQUEST_HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'en-US,en;q=0.5',
+        'Upgrade-Insecure-Requests': '1',
+    }
+    
     def advanced_web_scraping(self, url: str) -> Dict:
         """Multi-method web scraping with robust fallbacks"""
-        
-        # Try Selenium first if available
-        if hasattr(self, 'driver') and self.driver is not None:
-            try:
-                return self.scrape_with_selenium(url)
-            except Exception as e:
-                print(f"⚠️ Selenium failed for {url}: {e}")
-        
-        # Fallback to requests
-        return self.scrape_with_requests(url)
+        return self.advanced_web_scraping_many([url])[0]
     
-    def scrape_with_selenium(self, url: str) -> Dict:
-        """Selenium-based web scraping"""
-        data = {
-            'url': url,
-            'title': '',
-            'content': '',
-            'links': [],
-            'media': {'images': [], 'documents': [], 'videos': []},
-            'metadata': {},
-            'scraped_successfully': False
-        }
-        
+    def advanced_web_scraping_many(self, urls: List[str]) -> List[Dict]:
+        """Static-first scraping: fetch the HTML over HTTP, render in the browser only pages that are JavaScript shells.
+        
+        With RENDER_STATIC_FIRST off every page goes straight to the browser.
+        """
+        static = self.fetch_static(urls) if Config.RENDER_STATIC_FIRST else {}
+        
+        results, shells = {}, {}
+        for url in urls:
+            if not Config.RENDER_STATIC_FIRST:
+                shells[url] = 'static-first off'
+                continue
+            if static[url] is None:
+                # A page that 404s or times out would fail in the browser too
+                results[url] = self.empty_page_data(url)
+                continue
+            final_url, html, content_type = static[url]
+            reason = shell_reason(html, content_type)
+            if reason:
+                shells[url] = reason
+            else:
+                results[url] = self.extract_page_data(url, final_url, html, rendered_by='static')
+        
+        print(f"🔍 Render decision: {len(results)} static, {len(shells)} need a browser")
+        if shells:
+            # Rendered concurrently across the browser pool's contexts, paced per host by the pool
+            for url, page in zip(shells, self.browser.render_many(list(shells), wait_until=Config.RENDER_WAIT_UNTIL)):
+                if page.ok:
+                    results[url] = self.extract_page_data(url, page.final_url, page.html, page.title, 'browser', shells[url])
+                    continue
+                print(f"⚠️ Browser failed for {url} ({shells[url]}): {page.error or page.status_code}")
+                if url not in static:
+                    results[url] = self.empty_page_data(url)
+                    continue
+                # The shell is all there is
+                final_url, html, _ = static[url]
+                results[url] = self.extract_page_data(url, final_url, html, rendered_by='static', render_reason=shells[url])
+        
+        return [results[url] for url in urls]
+    
+    def fetch_static(self, urls: List[str]) -> Dict[str, Optional[Tuple[str, str, str]]]:
+        """(final URL, HTML, content type) per URL, or None if it could not be fetched"""
+        pages = self.fetcher.fetch_many([(url, self.REQUEST_HEADERS) for url in urls])
+        
+        static = {}
+        for url, page in zip(urls, pages):
+            if page.ok:
+                static[url] = (page.final_url, page.text, page.headers.get('content-type', ''))
+            elif isinstance(page.error, httpx.ConnectError):
+                # Certificate errors and the like: plain requests does not verify TLS
+                static[url] = self.fetch_with_requests(url)
+            else:
+                print(f"❌ Failed to fetch {url}: {page.error or page.status_code}")
+                static[url] = None
+        return static
+    
+    def fetch_with_requests(self, url: str) -> Optional[Tuple[str, str, str]]:
+        """Requests-based fetch without TLS verification, paced per host and body-capped like the fetch engine"""
         try:
-            print(f"🌐 Scraping with Selenium: {url}")
-            self.driver.get(url)
-            time.sleep(3)  # Wait for page load
-            
-            # Extract basic information
-            data['title'] = self.driver.title
-            data['content'] = self.driver.find_element("tag name", "body").text[:5000]
-            data['scraped_successfully'] = True
-            
-            # Extract links
-            links = self.driver.find_elements("tag name", "a")
-            for link in links[:50]:  # Limit to first 50 links
-                href = link.get_attribute("href")
-                if href and href.startswith('http'):
-                    data['links'].append({
-                        'url': href,
-                        'text': link.text.strip()[:100]
-                    })
-            
-            # Extract images
-            images = self.driver.find_elements("tag name", "img")
-            for img in images[:20]:  # Limit to first 20 images
-                src = img.get_attribute("src")
-                if src:
-                    data['media']['images'].append({
-                        'url': src,
-                        'alt': img.get_attribute("alt") or '',
-                        'title': img.get_attribute("title") or ''
-                    })
-            
-            # Extract document links
-            document_extensions = ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx']
-            for link in data['links']:
-                if any(ext in link['url'].lower() for ext in document_extensions):
-                    data['media']['documents'].append(link)
-            
-            print(f"✅ Selenium scraped: {len(data['content'])} chars, {len(data['links'])} links")
-            
+            self.rate_limiter.wait(url)
+            started = time.perf_counter()
+            response = requests.get(url, headers=self.REQUEST_HEADERS, timeout=Config.FETCH_TIMEOUT,
+                                    verify=False, stream=True)
+            page = FetchedPage.from_requests(url, response, time.perf_counter() - started)
+            page.raise_for_status()
+            return page.final_url, page.text, page.headers.get('content-type', '')
         except Exception as e:
-            print(f"❌ Selenium scraping failed for {url}: {e}")
-        
-        return data
+            print(f"❌ Failed to fetch {url}: {e}")
+            return None
     
-    def scrape_with_requests(self, url: str) -> Dict:
-        """Reliable requests-based scraping"""
-        data = {
+    def empty_page_data(self, url: str) -> Dict:
+        return {
             'url': url,
             'title': '',
             'content': '',
@@ -303,63 +297,58 @@ class OSINTReconEngine:
             'metadata': {},
             'scraped_successfully': False
         }
+    
+    def extract_page_data(self, url: str, final_url: str, html: str, title: Optional[str] = None,
+                          rendered_by: str = 'static', render_reason: Optional[str] = None) -> Dict:
+        """Extract content, links and media from a page's HTML (fetched or rendered)"""
+        data = self.empty_page_data(url)
+        data['metadata'] = {'rendered_by': rendered_by, 'render_reason': render_reason}
         
         try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Accept-Encoding': 'gzip, deflate',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-            }
-            
-            response = requests.get(url, headers=headers, timeout=15, verify=False)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
+            content = self.extractor.extract(html, final_url, media=False)
             
             # Extract basic content
-            data['title'] = soup.title.string if soup.title else ''
-            data['content'] = soup.get_text()[:5000]
+            data['title'] = title or content['title']
+            data['content'] = content['text'][:5000]
             data['scraped_successfully'] = True
             
             # Extract links
-            for link in soup.find_all('a', href=True)[:50]:
-                href = link.get('href')
-                if href and (href.startswith('http') or href.startswith('/')):
-                    if href.startswith('/'):
-                        href = urljoin(url, href)
+            for anchor in content['anchors'][:50]:
+                if anchor['href'].startswith('http') or anchor['href'].startswith('/'):
                     data['links'].append({
-                        'url': href,
-                        'text': link.get_text().strip()[:100]
+                        'url': anchor['url'],
+                        'text': anchor['text'][:100]
                     })
             
             # Extract images
-            for img in soup.find_all('img', src=True)[:20]:
-                src = img.get('src')
-                if src:
-                    if src.startswith('/'):
-                        src = urljoin(url, src)
-                    data['media']['images'].append({
-                        'url': src,
-                        'alt': img.get('alt', ''),
-                        'title': img.get('title', '')
-                    })
+            for img in content['images'][:20]:
+                data['media']['images'].append({
+                    'url': img['url'],
+                    'alt': img['alt_text'],
+                    'title': img['caption']
+                })
             
             # Extract documents
-            document_extensions = ['.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx']
-            for link in data['links']:
-                if any(ext in link['url'].lower() for ext in document_extensions):
+            labels = self.extractor.classifier.classify_many((link['url'], '') for link in data['links'])  # By URL only
+            for link, label in zip(data['links'], labels):
+                if label['type'] == 'documents':
                     data['media']['documents'].append(link)
             
-            print(f"✅ Scraped: {len(data['content'])} chars, {len(data['links'])} links, {len(data['media']['documents'])} docs")
+            print(f"✅ Scraped ({rendered_by}): {len(data['content'])} chars, {len(data['links'])} links, {len(data['media']['documents'])} docs")
             
         except Exception as e:
             print(f"❌ Failed to scrape {url}: {e}")
         
         return data
     
+    def scrape_with_requests(self, url: str) -> Dict:
+        """Reliable requests-based scraping"""
+        static = self.fetch_with_requests(url)
+        if static is None:
+            return self.empty_page_data(url)
+        final_url, html, _ = static
+        return self.extract_page_data(url, final_url, html)
+    
     def get_technology_stack(self, url: str) -> Dict:
         """Get technology stack information"""
         try:
@@ -401,13 +390,13 @@ class OSINTReconEngine:
         all_targets = list(results['domains_discovered']) + list(results['subdomains_discovered'])
         
         print(f"\n🌐 Phase 2: Deep scraping {len(all_targets)} targets...")
-        for i, target in enumerate(all_targets[:20]):  # Limit to first 20 to avoid overwhelming
-            print(f"[{i+1}/{min(20, len(all_targets))}] Processing: {target}")
-            
-            if not target.startswith('http'):
-                target = f"https://{target}"
+        targets = [t if t.startswith('http') else f"https://{t}" for t in all_targets[:20]]  # Limit to first 20 to avoid overwhelming
+        # Fetched concurrently (paced per host by the fetch engine); only JavaScript shells go to the browser
+        scraped_pages = self.advanced_web_scraping_many(targets)
+        
+        for i, (target, scraped_data) in enumerate(zip(targets, scraped_pages)):
+            print(f"[{i+1}/{len(targets)}] Processing: {target}")
             
-            scraped_data = self.advanced_web_scraping(target)
             if scraped_data['scraped_successfully']:
                 results['urls_scraped'].append(scraped_data)
                 
@@ -436,19 +425,9 @@ class OSINTReconEngine:
                 print(f"✅ Intelligence gathered from {target}")
             else:
                 print(f"❌ Failed to gather intelligence from {target}")
-            
-            time.sleep(2)  # Rate limiting
         
         # Convert sets to lists for JSON serialization
         results['domains_discovered'] = list(results['domains_discovered'])
         results['subdomains_discovered'] = list(results['subdomains_discovered'])
         
         return results
-    
-    def __del__(self):
-        """Cleanup Selenium driver"""
-        if hasattr(self, 'driver') and self.driver:
-            try:
-                self.driver.quit()
-            except:
-                pass
@@ -2,10 +2,13 @@ import requests
 import time
 import json
 from abc import ABC, abstractmethod
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-from typing import Dict, List
+from urllib.parse import urlparse
+from typing import Callable, Dict, List, Optional, Set
 from config.settings import Config
+from .fetch_engine import FetchedPage, get_fetch_engine
+from .html_extractor import HTMLExtractor
+from .rate_limiter import get_rate_limiter
+from .retry_policy import CircuitOpenError
 
 class BaseScraper(ABC):
     def __init__(self):
@@ -13,6 +16,10 @@ class BaseScraper(ABC):
         self.session.headers.update({
             'User-Agent': Config.USER_AGENT
         })
+        # Shared by all scrapers so per-host limits hold across them
+        self.fetcher = get_fetch_engine()
+        self.rate_limiter = get_rate_limiter()  # Same buckets, for requests outside the fetch engine
+        self.extractor = HTMLExtractor()  # One parse per page for all content and media
         
         # Load trusted domains
         with open(Config.TRUST_DOMAINS_FILE, 'r') as f:
@@ -32,54 +39,42 @@ class BaseScraper(ABC):
                     return True
         return False
     
-    def make_request(self, url: str) -> requests.Response:
-        """Make HTTP request with rate limiting"""
-        time.sleep(Config.REQUEST_DELAY)
-        response = self.session.get(url, timeout=10)
-        response.raise_for_status()
-        return response
+    def make_request(self, url: str) -> FetchedPage:
+        """Make HTTP request with rate limiting (per host, in the fetch engine)"""
+        page = self.fetcher.fetch(url, headers=self.request_headers(url))
+        page.raise_for_status()
+        return page
+    
+    def request_headers(self, url: str) -> Dict:
+        """Headers for fetching a page"""
+        return {'User-Agent': Config.USER_AGENT}
+    
+    def fetch_blocking(self, url: str, headers: Dict) -> FetchedPage:
+        """Fallback fetch for pages the async client is refused, behind the same rate limit and circuit breaker"""
+        breaker = self.fetcher.breakers.get(self.fetcher.host_key(url))
+        if not breaker.allow():
+            return FetchedPage(url, error=CircuitOpenError(f"circuit open, retry in {breaker.retry_in():.0f}s"))
+        self.rate_limiter.wait(url)
+        started = time.perf_counter()
+        try:
+            page = FetchedPage.from_requests(url, self.blocking_get(url, headers), time.perf_counter() - started)
+        except Exception as e:
+            breaker.record_failure()
+            return FetchedPage(url, error=e, elapsed=time.perf_counter() - started)
+        self.fetcher.record_outcome(breaker, page)
+        return page
+    
+    def blocking_get(self, url: str, headers: Dict):
+        """The streamed GET behind fetch_blocking, with the scraper's own session"""
+        return self.session.get(url, headers=headers, timeout=Config.FETCH_TIMEOUT, stream=True)
     
     def extract_basic_content(self, html: str, url: str) -> Dict:
-        """Extract basic content from HTML"""
-        soup = BeautifulSoup(html, 'html.parser')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
-        
-        content = {
-            'title': soup.title.string if soup.title else '',
-            'meta_description': '',
-            'headings': [],
-            'text': soup.get_text().strip(),
-            'links': [],
-            'images': []
-        }
-        
-        # Extract meta description
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        if meta_desc:
-            content['meta_description'] = meta_desc.get('content', '')
-        
-        # Extract headings
-        for heading in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-            content['headings'].append(heading.get_text().strip())
-        
-        # Extract links
-        for link in soup.find_all('a', href=True):
-            full_url = urljoin(url, link['href'])
-            content['links'].append(full_url)
-        
-        # Extract images
-        for img in soup.find_all('img', src=True):
-            img_url = urljoin(url, img['src'])
-            content['images'].append({
-                'url': img_url,
-                'alt_text': img.get('alt', ''),
-                'caption': img.get('title', '')
-            })
-        
-        return content
+        """Extract basic content from HTML (title, meta description, headings, text, links, images)"""
+        return self.extractor.extract(html, url, media=False)
+    
+    def extract_content(self, html: str, url: str) -> Dict:
+        """Basic content plus media (under 'media'), from the same single pass"""
+        return self.extractor.extract(html, url)
     
     @abstractmethod
     def search(self, keywords: List[str]) -> List[Dict]:
@@ -87,6 +82,52 @@ class BaseScraper(ABC):
         pass
     
     @abstractmethod
+    def build_document(self, url: str, page: FetchedPage) -> Dict:
+        """Turn a fetched page into a document"""
+        pass
+    
+    @staticmethod
+    def stored_unchanged(urls: List[str], pages: List[FetchedPage],
+                         skip_unchanged: Optional[Callable[[Dict[str, str]], Set[str]]]) -> Set[str]:
+        """URLs of cache hits that skip_unchanged reports as stored already"""
+        cached = {url: page.body_hash for url, page in zip(urls, pages) if page.ok and page.unchanged}
+        return skip_unchanged(cached) if skip_unchanged and cached else set()
+    
+    @staticmethod
+    def with_body_hash(document: Dict, page: FetchedPage) -> Dict:
+        """Record the fetched body's hash, so a later cache hit can be matched to this document"""
+        if document:
+            document.setdefault('metadata', {})['body_hash'] = page.body_hash
+        return document
+    
     def scrape_url(self, url: str) -> Dict:
         """Scrape content from specific URL"""
-        pass
+        return self.scrape_urls([url])[0]
+    
+    def scrape_urls(self, urls: List[str],
+                    skip_unchanged: Optional[Callable[[Dict[str, str]], Set[str]]] = None) -> List[Optional[Dict]]:
+        """Scrape several URLs concurrently; one document per URL, in order ({} if scraping failed).
+        
+        skip_unchanged (JSONDatabase.touch_unchanged) is given the pages served
+        from the HTTP cache (fresh or 304 Not Modified) as {url: body hash}; the
+        ones the database already holds with that body are marked as seen again,
+        not parsed again, and come back as None.
+        """
+        pages = self.fetcher.fetch_many([(url, self.request_headers(url)) for url in urls])
+        stored = self.stored_unchanged(urls, pages, skip_unchanged)
+        
+        documents = []
+        for url, page in zip(urls, pages):
+            if url in stored:
+                documents.append(None)
+                continue
+            try:
+                if page.challenged:
+                    # Cloudflare browser challenge: retry with the scraper's blocking session
+                    page = self.fetch_blocking(url, self.request_headers(url))
+                page.raise_for_status()
+                documents.append(self.with_body_hash(self.build_document(url, page), page))
+            except Exception as e:
+                print(f"❌ Error scraping {url}: {e}")
+                documents.append({})
+        return documents
@@ -0,0 +1,347 @@
+import asyncio
+import atexit
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List, Optional
+from config.settings import Config
+from scrapers.rate_limiter import HostRateLimiter, get_rate_limiter
+
+try:
+    from playwright.async_api import async_playwright
+except ImportError:
+    async_playwright = None
+
+class BrowserPoolError(Exception):
+    """The browser pool could not start or serve a page"""
+
+class LeaseTimeout(BrowserPoolError):
+    """No browser context became free within the lease timeout"""
+
+class RenderedPage:
+    """A page rendered by a pooled browser context"""
+
+    def __init__(self, url: str, final_url: str = '', status_code: int = 0, html: str = '', title: str = '',
+                 error: Optional[Exception] = None, elapsed: float = 0.0, network_requests: Optional[List[Dict]] = None):
+        self.url = url
+        self.final_url = final_url or url
+        self.status_code = status_code
+        self.html = html
+        self.title = title
+        self.error = error
+        self.elapsed = elapsed
+        self.network_requests = network_requests or []  # XHR/fetch calls made by the page (capture_requests=True)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and (self.status_code == 0 or self.status_code < 400)
+
+    def raise_for_status(self):
+        if self.error is not None:
+            raise BrowserPoolError(f"{self.url}: {self.error}") from self.error
+        if self.status_code >= 400:
+            raise BrowserPoolError(f"{self.url}: HTTP {self.status_code}")
+
+class PooledContext:
+    """One warm browser context with its page, and how much it has been used"""
+
+    def __init__(self, context, page):
+        self.context = context
+        self.page = page
+        self.pages_rendered = 0
+
+class BrowserPool:
+    """Warm Playwright browser contexts shared by every JavaScript-rendering caller.
+
+    One headless Chromium runs `size` isolated contexts (separate cookies
+    and storage, one renderer process each), kept open between pages. Callers
+    lease a context, render, and hand it back; a context is replaced by a
+    fresh one after BROWSER_CONTEXT_MAX_PAGES pages or once its JS heap
+    exceeds BROWSER_CONTEXT_MAX_HEAP_MB. Like the fetch engine, the pool
+    runs its own event loop in a background thread: blocking callers use
+    render/render_many/with_page, and render_many spreads pages over all
+    contexts at once. The browser is launched on first use. If it dies it is
+    closed and relaunched once, and contexts that could not be replaced in
+    the meantime are recreated as soon as it is back.
+
+    Contexts render with a lightweight profile: requests for the resource
+    types in BROWSER_BLOCKED_RESOURCES (images, fonts, stylesheets, media)
+    are aborted by request interception, as nothing that reads the DOM
+    needs them.
+
+    With a limiter, every page waits for its host's turn before it leases a
+    context, so a batch for one host is spaced like static fetches rather
+    than loaded all at once.
+    """
+
+    def __init__(self, size: int = None, max_pages: int = None, max_heap_mb: float = None,
+                 lease_timeout: float = None, page_timeout: float = None,
+                 launcher: Optional[Callable[[], Awaitable]] = None, blocked_resources=None,
+                 limiter: Optional[HostRateLimiter] = None):
+        self.size = size or Config.BROWSER_POOL_SIZE
+        self.max_pages = max_pages or Config.BROWSER_CONTEXT_MAX_PAGES
+        self.max_heap_bytes = (max_heap_mb or Config.BROWSER_CONTEXT_MAX_HEAP_MB) * 1024 * 1024
+        self.lease_timeout = lease_timeout or Config.BROWSER_LEASE_TIMEOUT
+        self.page_timeout = page_timeout or Config.BROWSER_PAGE_TIMEOUT
+        self.blocked_resources = set(Config.BROWSER_BLOCKED_RESOURCES if blocked_resources is None else blocked_resources)
+        self._launcher = launcher or self._launch_chromium
+        self.limiter = limiter  # Per-host spacing; None renders without waiting
+        self._playwright = None
+        self._browser = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._relaunch_lock: Optional[asyncio.Lock] = None
+        self._lost = 0  # Contexts that could not be replaced while the browser was down
+        self._started = False
+        self._start_error: Optional[Exception] = None
+        self._start_lock = threading.Lock()
+        self.stats = {'rendered': 0, 'failures': 0, 'recycled': 0, 'lease_timeouts': 0, 'contexts': 0, 'blocked': 0,
+                      'relaunches': 0}
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='browser-pool', daemon=True)
+        self._thread.start()
+
+    def _call(self, coroutine, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+
+    # ----------------------------------------------------------------- startup
+
+    async def _launch_chromium(self):
+        if async_playwright is None:
+            raise BrowserPoolError("playwright is not installed (pip install playwright && playwright install chromium)")
+        if self._playwright is None:
+            self._playwright = await async_playwright().start()
+        return await self._playwright.chromium.launch(
+            headless=True,
+            args=['--no-sandbox', '--disable-dev-shm-usage']
+        )
+
+    async def _start(self):
+        self._browser = await self._launcher()
+        self._idle = asyncio.Queue()
+        self._relaunch_lock = asyncio.Lock()
+        for _ in range(self.size):
+            self._idle.put_nowait(await self._new_context())
+
+    def start(self) -> bool:
+        """Launch the browser and warm the contexts (once); False if that failed"""
+        with self._start_lock:
+            if not self._started and self._start_error is None:
+                try:
+                    self._call(self._start())
+                    self._started = True
+                    print(f"✅ Browser pool ready: {self.size} contexts")
+                except Exception as e:
+                    self._start_error = e
+                    print(f"❌ Browser pool unavailable: {e}")
+        return self._started
+
+    # ---------------------------------------------------------------- contexts
+
+    async def _new_context(self) -> PooledContext:
+        context = await self._browser.new_context(user_agent=Config.USER_AGENT, ignore_https_errors=True)
+        if self.blocked_resources:
+            await context.route('**/*', self._route)
+        page = await context.new_page()
+        self.stats['contexts'] += 1
+        return PooledContext(context, page)
+
+    async def _route(self, route):
+        """Request interception: abort blocked resource types, let everything else through"""
+        if route.request.resource_type in self.blocked_resources:
+            self.stats['blocked'] += 1
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _needs_recycling(self, slot: PooledContext) -> bool:
+        if slot.pages_rendered >= self.max_pages:
+            return True
+        try:
+            heap = await slot.page.evaluate('() => performance.memory ? performance.memory.usedJSHeapSize : 0')
+        except Exception:
+            return True  # Crashed or closed page
+        return heap > self.max_heap_bytes
+
+    async def _recycle(self, slot: PooledContext) -> Optional[PooledContext]:
+        """Replace a worn-out context; relaunches the browser if it has died"""
+        try:
+            await slot.context.close()
+        except Exception:
+            pass
+        self.stats['recycled'] += 1
+        browser = self._browser
+        try:
+            fresh = await self._new_context()
+        except Exception:
+            try:
+                await self._relaunch(browser)
+                fresh = await self._new_context()
+            except Exception as e:
+                self._lost += 1
+                print(f"⚠️ Browser context lost, pool shrinks by one until the browser is back: {e}")
+                return None
+        await self._refill()
+        return fresh
+
+    async def _relaunch(self, dead):
+        """Replace a dead browser once, however many slots find it dead at the same time"""
+        async with self._relaunch_lock:
+            if self._browser is not dead:
+                return  # Another slot has relaunched it already
+            try:
+                await dead.close()
+            except Exception:
+                pass
+            self._browser = await self._launcher()
+            self.stats['relaunches'] += 1
+
+    async def _refill(self):
+        """Recreate lost contexts; stops at the first one that still cannot be created"""
+        while self._lost:
+            self._lost -= 1
+            try:
+                slot = await self._new_context()
+            except Exception:
+                self._lost += 1
+                return
+            self._idle.put_nowait(slot)
+
+    async def _revive(self):
+        """Every context is lost: relaunch the browser if need be and bring them back"""
+        browser = self._browser
+        await self._refill()
+        if self._lost:
+            try:
+                await self._relaunch(browser)
+            except Exception as e:
+                print(f"⚠️ Browser relaunch failed: {e}")
+                return
+            await self._refill()
+
+    @asynccontextmanager
+    async def lease(self, timeout: Optional[float] = None):
+        """Borrow a page for the duration of the block (coroutines on the pool loop only)"""
+        if self._lost >= self.size and self._idle.empty():
+            await self._revive()  # Nothing would ever come back to the queue
+        try:
+            slot = await asyncio.wait_for(self._idle.get(), timeout or self.lease_timeout)
+        except asyncio.TimeoutError:
+            self.stats['lease_timeouts'] += 1
+            raise LeaseTimeout(f"no browser context free after {timeout or self.lease_timeout:.0f}s")
+        try:
+            yield slot.page
+        finally:
+            slot.pages_rendered += 1
+            if await self._needs_recycling(slot):
+                slot = await self._recycle(slot)
+            if slot is not None:
+                self._idle.put_nowait(slot)
+
+    # --------------------------------------------------------------- rendering
+
+    async def arender(self, url: str, wait_until: str = 'domcontentloaded', timeout: Optional[float] = None,
+                      capture_requests: bool = False) -> RenderedPage:
+        """Render one URL on a leased context; errors are returned on the page.
+
+        wait_until='networkidle' waits for DOM ready and then for the network
+        to go quiet, for at most RENDER_IDLE_TIMEOUT seconds: pages that poll
+        forever are taken as they are rather than failing. capture_requests
+        records the page's XHR/fetch calls (from network events) on
+        RenderedPage.network_requests.
+        """
+        started = time.perf_counter()
+        captured = []
+
+        def on_request(request):
+            if request.resource_type in ('xhr', 'fetch'):
+                captured.append({'url': request.url, 'method': request.method, 'resource_type': request.resource_type})
+
+        try:
+            if self.limiter is not None:
+                await self.limiter.await_turn(url)
+            async with self.lease() as page:
+                if capture_requests:
+                    page.on('request', on_request)
+                try:
+                    goto_until = 'domcontentloaded' if wait_until == 'networkidle' else wait_until
+                    response = await page.goto(url, wait_until=goto_until, timeout=(timeout or self.page_timeout) * 1000)
+                    if wait_until == 'networkidle':
+                        try:
+                            await page.wait_for_load_state('networkidle', timeout=Config.RENDER_IDLE_TIMEOUT * 1000)
+                        except Exception:
+                            pass  # Still busy: render what has loaded so far
+                    html = await page.content()
+                    title = await page.title()
+                    final_url = page.url
+                finally:
+                    if capture_requests:
+                        page.remove_listener('request', on_request)
+            self.stats['rendered'] += 1
+            return RenderedPage(url, final_url, response.status if response else 0, html, title,
+                                elapsed=time.perf_counter() - started, network_requests=captured)
+        except Exception as e:
+            self.stats['failures'] += 1
+            return RenderedPage(url, error=e, elapsed=time.perf_counter() - started)
+
+    def render(self, url: str, wait_until: str = 'domcontentloaded', timeout: Optional[float] = None,
+               capture_requests: bool = False) -> RenderedPage:
+        """Blocking render of one URL"""
+        if not self.start():
+            return RenderedPage(url, error=self._start_error)
+        return self._call(self.arender(url, wait_until, timeout, capture_requests))
+
+    def render_many(self, urls: List[str], wait_until: str = 'domcontentloaded',
+                    capture_requests: bool = False) -> List[RenderedPage]:
+        """Render URLs concurrently across the pool's contexts; pages are returned in order"""
+        if not urls:
+            return []
+        if not self.start():
+            return [RenderedPage(url, error=self._start_error) for url in urls]
+
+        async def render_all():
+            return list(await asyncio.gather(*(self.arender(url, wait_until, capture_requests=capture_requests) for url in urls)))
+        return self._call(render_all())
+
+    def with_page(self, work: Callable[[object], Awaitable], timeout: Optional[float] = None):
+        """Blocking: run `await work(page)` on a leased page and return its result"""
+        if not self.start():
+            raise BrowserPoolError(str(self._start_error))
+
+        async def run():
+            async with self.lease(timeout) as page:
+                return await work(page)
+        return self._call(run())
+
+    def pool_stats(self) -> Dict:
+        stats = dict(self.stats, size=self.size, started=self._started)
+        stats['idle'] = self._idle.qsize() if self._idle is not None else 0
+        return stats
+
+    def close(self):
+        if not self._loop.is_running():
+            return
+        if self._browser is not None:
+            try:
+                self._call(self._browser.close(), timeout=10)
+            except Exception:
+                pass
+        if self._playwright is not None:
+            try:
+                self._call(self._playwright.stop(), timeout=10)
+            except Exception:
+                pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+_pool: Optional[BrowserPool] = None
+_lock = threading.Lock()
+
+def get_browser_pool() -> BrowserPool:
+    """The process-wide browser pool, shared by every caller that renders JavaScript"""
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = BrowserPool(limiter=get_rate_limiter())
+            atexit.register(_pool.close)
+        return _pool
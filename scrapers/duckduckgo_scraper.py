@@ -1,6 +1,4 @@
 import json
-import time
-import random
 from typing import List, Dict
 from urllib.parse import quote_plus, urljoin
 from bs4 import BeautifulSoup
@@ -8,7 +6,9 @@ from fake_useragent import UserAgent
 import cloudscraper
 import requests
 from .base_scraper import BaseScraper
+from .fetch_engine import FetchedPage
 from config.settings import Config
+from utils.url_canonicalizer import canonicalize_url
 
 class DuckDuckGoScraper(BaseScraper):
     def __init__(self):
@@ -32,8 +32,8 @@ class DuckDuckGoScraper(BaseScraper):
         }
         
         try:
-            # Much shorter delay needed for DuckDuckGo
-            time.sleep(random.uniform(2, 5))
+            # Much shorter spacing needed for DuckDuckGo (Config.SEARCH_ENGINE_PACING)
+            self.rate_limiter.wait('duckduckgo')
             
             # DuckDuckGo search URL
             encoded_query = quote_plus(query)
@@ -117,58 +117,54 @@ class DuckDuckGoScraper(BaseScraper):
                 print(f"DuckDuckGo search: {query}")
                 results = self.search_duckduckgo(query, 20)
                 all_results.extend(results)
-                
-                # Short delay between queries
-                time.sleep(random.uniform(3, 6))
         
-        # Remove duplicates
+        # Remove duplicates (tracking parameters, fragments, http/https spellings of the same page)
         seen_urls = set()
         unique_results = []
         for result in all_results:
-            if result['url'] not in seen_urls:
-                seen_urls.add(result['url'])
+            canonical = canonicalize_url(result['url'])
+            if canonical not in seen_urls:
+                seen_urls.add(canonical)
                 unique_results.append(result)
         
         return unique_results
     
-    def scrape_url(self, url: str) -> Dict:
-        """Scrape content from URL found via DuckDuckGo"""
-        try:
-            headers = {
-                'User-Agent': self.ua.random,
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-                'Referer': 'https://duckduckgo.com/'
-            }
-            
-            response = self.scraper.get(url, headers=headers, timeout=15)
-            response.raise_for_status()
-            
-            content = self.extract_basic_content(response.text, url)
-            
-            return {
-                'url': url,
-                'domain': response.url.split('/')[2] if '//' in response.url else url.split('/')[2],
-                'title': content['title'],
-                'meta_description': content['meta_description'],
-                'content': {
-                    'text': content['text'][:15000],  # Limit text length
-                    'headings': content['headings'][:25],
-                    'links': content['links'][:60]
-                },
-                'media': {
-                    'images': content['images'][:40],
-                    'videos': [],
-                    'audio': []
-                },
-                'metadata': {
-                    'content_type': response.headers.get('content-type', ''),
-                    'language': 'en',
-                    'trust_score': 7.5 if self.is_trusted_domain(url) else 5.5,
-                    'scraped_via': 'duckduckgo'
-                }
-            }
+    def request_headers(self, url: str) -> Dict:
+        """Headers for pages found via DuckDuckGo"""
+        return {
+            'User-Agent': self.ua.random,
+            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Referer': 'https://duckduckgo.com/'
+        }
+    
+    def blocking_get(self, url: str, headers: Dict):
+        """Fallback through cloudscraper, which solves Cloudflare challenges"""
+        return self.scraper.get(url, headers=headers, timeout=15, stream=True)
+    
+    def build_document(self, url: str, page: FetchedPage) -> Dict:
+        """Build a document from a page found via DuckDuckGo"""
+        content = self.extract_basic_content(page.text, url)
         
-        except Exception as e:
-            print(f"Error scraping {url}: {e}")
-            return {}
+        return {
+            'url': url,
+            'domain': page.final_url.split('/')[2] if '//' in page.final_url else url.split('/')[2],
+            'title': content['title'],
+            'meta_description': content['meta_description'],
+            'content': {
+                'text': content['text'][:15000],  # Limit text length
+                'headings': content['headings'][:25],
+                'links': content['links'][:60]
+            },
+            'media': {
+                'images': content['images'][:40],
+                'videos': [],
+                'audio': []
+            },
+            'metadata': {
+                'content_type': page.headers.get('content-type', ''),
+                'language': 'en',
+                'trust_score': 7.5 if self.is_trusted_domain(url) else 5.5,
+                'scraped_via': 'duckduckgo'
+            }
+        }
@@ -0,0 +1,375 @@
+import asyncio
+import atexit
+import concurrent.futures
+import hashlib
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+import httpx
+from config.settings import Config
+from scrapers.http_cache import CachedResponse, HTTPCache
+from scrapers.rate_limiter import HostRateLimiter, get_rate_limiter
+from scrapers.retry_policy import CircuitBreakers, CircuitOpenError, RetryPolicy
+from utils.validators import parse_crawl_delay
+
+class FetchError(Exception):
+    """A fetch that failed or returned an HTTP error status"""
+
+# Non-HTML types whose bodies are parsed as text, so they get the HTML byte budget
+TEXT_TYPES = ('application/xhtml+xml', 'application/xml', 'application/json', 'application/rss+xml',
+              'application/atom+xml', 'application/ld+json')
+
+def body_budget(headers: Dict[str, str]) -> int:
+    """Bytes of a response body worth reading, decided from its headers before any body is read"""
+    content_type = headers.get('content-type', '').split(';')[0].strip().lower()
+    if not content_type or content_type.startswith('text/') or content_type in TEXT_TYPES:
+        return Config.FETCH_MAX_HTML_BYTES
+    # PDFs, images, archives...: only the start (for sniffing); the size comes from Content-Length
+    return Config.FETCH_MAX_BINARY_BYTES
+
+class FetchedPage:
+    """The parts of an HTTP response the scrapers read.
+
+    content holds at most body_budget() bytes; truncated tells whether the
+    body went on beyond that.
+    """
+
+    def __init__(self, url: str, final_url: str = '', status_code: int = 0, headers: Optional[Dict] = None,
+                 content: bytes = b'', encoding: Optional[str] = None, error: Optional[Exception] = None,
+                 elapsed: float = 0.0, from_cache: Optional[str] = None, truncated: bool = False):
+        self.url = url
+        self.final_url = final_url or url
+        self.status_code = status_code
+        self.headers = {k.lower(): v for k, v in (headers or {}).items()}
+        self.content = content
+        self.encoding = encoding
+        self.error = error
+        self.elapsed = elapsed
+        self.from_cache = from_cache  # None, 'fresh' or 'revalidated'
+        self.truncated = truncated
+
+    @classmethod
+    def from_httpx(cls, url: str, response: httpx.Response, content: bytes, truncated: bool,
+                   elapsed: float) -> 'FetchedPage':
+        """Wrap a streamed httpx response whose body was read by the engine"""
+        return cls(url, str(response.url), response.status_code, dict(response.headers),
+                   content, response.charset_encoding, elapsed=elapsed, truncated=truncated)
+
+    @classmethod
+    def from_requests(cls, url: str, response, elapsed: float) -> 'FetchedPage':
+        """Read a requests/cloudscraper response made with stream=True (used by blocking fallbacks)"""
+        budget = body_budget({k.lower(): v for k, v in response.headers.items()})
+        chunks, size, truncated = [], 0, False
+        try:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                if len(chunk) > budget - size:
+                    chunks.append(chunk[:budget - size])
+                    truncated = True
+                    break
+                chunks.append(chunk)
+                size += len(chunk)
+        finally:
+            response.close()
+        return cls(url, response.url, response.status_code, dict(response.headers),
+                   b''.join(chunks), response.encoding, elapsed=elapsed, truncated=truncated)
+
+    @classmethod
+    def from_cached(cls, cached: CachedResponse, how: str, elapsed: float = 0.0) -> 'FetchedPage':
+        return cls(cached.url, cached.final_url, cached.status_code, cached.headers,
+                   cached.content, _charset(cached.headers), elapsed=elapsed, from_cache=how)
+
+    @property
+    def text(self) -> str:
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+    @property
+    def size(self) -> Optional[int]:
+        """Body size in bytes: Content-Length when sent, else the bytes read (None if cut off without one)"""
+        try:
+            return int(self.headers['content-length'])
+        except (KeyError, ValueError):
+            return None if self.truncated else len(self.content)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and 200 <= self.status_code < 400
+
+    @property
+    def unchanged(self) -> bool:
+        """Served from the cache: the same body as an earlier fetch (which need not have been stored)"""
+        return self.from_cache is not None
+
+    @property
+    def body_hash(self) -> str:
+        """Hash of the body as fetched, stored with the document as metadata.body_hash"""
+        return hashlib.md5(self.content).hexdigest()
+
+    @property
+    def challenged(self) -> bool:
+        """Blocked by a Cloudflare browser challenge"""
+        return self.status_code in (403, 503) and 'cloudflare' in self.headers.get('server', '').lower()
+
+    def raise_for_status(self):
+        if self.error is not None:
+            raise FetchError(f"{self.url}: {self.error}") from self.error
+        if self.status_code >= 400:
+            raise FetchError(f"{self.url}: HTTP {self.status_code}")
+
+def _charset(headers: Dict[str, str]) -> Optional[str]:
+    for parameter in headers.get('content-type', '').split(';')[1:]:
+        name, _, value = parameter.strip().partition('=')
+        if name.lower() == 'charset' and value:
+            return value.strip('"')
+    return None
+
+class HostState:
+    """Per-host concurrency cap and robots.txt Crawl-delay (request spacing lives in the rate limiter)"""
+
+    def __init__(self, concurrency: int):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.crawl_delay = None
+        self.robots_task: Optional[asyncio.Task] = None
+
+class FetchEngine:
+    """Asyncio HTTP fetcher shared by all scrapers.
+
+    An event loop runs in a background thread with one pooled
+    httpx.AsyncClient. Requests are limited by a global concurrency cap and,
+    per host, by a concurrency cap plus the host's token bucket in the rate
+    limiter: the robots.txt Crawl-delay when it sets one, else min_host_delay.
+    Fetching pages from different hosts therefore overlaps, while each host
+    sees the same polite request rate as before. Blocking callers use fetch
+    and fetch_many; coroutines running on the engine loop can await afetch.
+
+    Retryable failures (429, 5xx gateway errors, dropped connections) are
+    retried with jittered exponential backoff (RetryPolicy). Failures and
+    timeouts also feed a per-host circuit breaker: once it opens, requests
+    to that host fail at once until a probe after the cooldown succeeds.
+
+    With an HTTPCache, fresh responses are served without touching the host
+    and stale ones are revalidated with a conditional request; both come back
+    with from_cache set so callers can skip re-parsing them. Cache reads and
+    writes run on a dedicated thread (one SQLite connection), so disk I/O
+    never stalls the event loop's other fetches.
+    """
+
+    def __init__(self, max_concurrency: int = None, per_host: int = None, min_host_delay: float = None,
+                 timeout: float = None, respect_crawl_delay: bool = None, transport=None,
+                 cache: Union[HTTPCache, None, bool] = True, limiter: Optional[HostRateLimiter] = None,
+                 retry: Optional[RetryPolicy] = None, breakers: Optional[CircuitBreakers] = None):
+        self.max_concurrency = max_concurrency or Config.FETCH_MAX_CONCURRENCY
+        self.per_host = per_host or Config.FETCH_PER_HOST_CONCURRENCY
+        self.min_host_delay = Config.FETCH_MIN_HOST_DELAY if min_host_delay is None else min_host_delay
+        self.timeout = timeout or Config.FETCH_TIMEOUT
+        self.respect_crawl_delay = Config.FETCH_RESPECT_CRAWL_DELAY if respect_crawl_delay is None else respect_crawl_delay
+        # Shared with blocking callers when given (see get_fetch_engine)
+        self.limiter = limiter or HostRateLimiter(self.min_host_delay, respect_crawl_delay=self.respect_crawl_delay)
+        self.retry = retry or RetryPolicy()
+        self.breakers = breakers or CircuitBreakers()
+        # True: the configured cache (if enabled); None/False: no cache
+        self.cache = HTTPCache.from_config() if cache is True else (cache or None)
+        self._cache_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='fetch-cache'
+        ) if self.cache is not None else None
+
+        self._hosts: Dict[str, HostState] = {}
+        self.stats = {'requests': 0, 'failures': 0, 'bytes': 0, 'truncated': 0, 'retries': 0, 'short_circuited': 0}
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name='fetch-engine', daemon=True)
+        self._thread.start()
+        self._client = self._call(self._start(transport))
+
+    async def _start(self, transport) -> httpx.AsyncClient:
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+        return httpx.AsyncClient(
+            headers={'User-Agent': Config.USER_AGENT}, follow_redirects=True,
+            timeout=self.timeout, limits=limits, transport=transport
+        )
+
+    def _call(self, coroutine, timeout: Optional[float] = None):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result(timeout)
+
+    # ------------------------------------------------------------------ hosts
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        parsed = urlparse(url)
+        return f'{parsed.scheme}://{parsed.netloc}'.lower()
+
+    def _host(self, url: str) -> HostState:
+        key = self.host_key(url)
+        host = self._hosts.get(key)
+        if host is None:
+            host = self._hosts[key] = HostState(self.per_host)
+            if self.respect_crawl_delay:
+                self.limiter.mark_robots_checked(key)
+                host.robots_task = asyncio.ensure_future(self._load_robots(key, host))
+        return host
+
+    async def _load_robots(self, key: str, host: HostState):
+        """Read robots.txt once per host and adopt its Crawl-delay"""
+        try:
+            async with self._semaphore:
+                response = await self._client.get(f'{key}/robots.txt', timeout=min(self.timeout, 10))
+            if response.status_code != 200:
+                return
+            crawl_delay = parse_crawl_delay(response.text.splitlines(), Config.USER_AGENT)
+            if crawl_delay:
+                host.crawl_delay = float(crawl_delay)
+                self.limiter.set_crawl_delay(key, crawl_delay)
+        except Exception:
+            pass  # No usable robots.txt: keep the default spacing
+
+    # ---------------------------------------------------------------- fetching
+
+    async def _cache_call(self, method, *args):
+        """Run an HTTPCache method on the cache thread"""
+        return await self._loop.run_in_executor(self._cache_executor, method, *args)
+
+    async def afetch(self, url: str, headers: Optional[Dict] = None, timeout: Optional[float] = None) -> FetchedPage:
+        """Fetch one URL; errors are returned on the page (see FetchedPage.raise_for_status)"""
+        cached = await self._cache_call(self.cache.lookup, url) if self.cache is not None else None
+        if cached is not None:
+            if cached.is_fresh():
+                self.cache.record_hit()
+                return FetchedPage.from_cached(cached, 'fresh')
+            headers = {**(headers or {}), **cached.validators()}
+
+        host = self._host(url)
+        if host.robots_task is not None:
+            await asyncio.shield(host.robots_task)
+
+        breaker = self.breakers.get(self.host_key(url))
+        for attempt in range(1, self.retry.attempts + 1):
+            page = await self._attempt(url, headers, timeout, host, breaker)
+            if isinstance(page.error, CircuitOpenError) or not self.retry.retryable(page):
+                break
+            if attempt == self.retry.attempts:
+                break
+            delay = self.retry.delay(attempt, page)
+            if page.status_code == 429:
+                self.limiter.backoff(url, delay)  # The whole host is asking us to slow down
+            self.stats['retries'] += 1
+            await asyncio.sleep(delay)
+
+        if page.error is not None or self.cache is None:
+            return page
+
+        if cached is not None and page.status_code == 304:
+            self.cache.record_hit(revalidated=True)
+            refreshed = await self._cache_call(self.cache.refresh, cached, page.headers)
+            return FetchedPage.from_cached(refreshed, 'revalidated', page.elapsed)
+        if cached is not None:
+            self.cache.record_miss()
+        if not page.truncated:
+            # A cut-off body would come back from the cache without its truncated flag
+            await self._cache_call(self.cache.store, url, page.final_url, page.status_code, page.headers, page.content)
+        return page
+
+    async def _attempt(self, url: str, headers: Optional[Dict], timeout: Optional[float], host: HostState,
+                       breaker) -> FetchedPage:
+        """One request to the host, within its concurrency cap, token bucket and circuit breaker"""
+        if breaker.is_open():
+            self.stats['short_circuited'] += 1
+            return FetchedPage(url, error=CircuitOpenError(f"circuit open, retry in {breaker.retry_in():.0f}s"))
+
+        async with host.semaphore:
+            if not breaker.allow():
+                self.stats['short_circuited'] += 1
+                return FetchedPage(url, error=CircuitOpenError(f"circuit open, retry in {breaker.retry_in():.0f}s"))
+            await self.limiter.await_turn(url)
+            async with self._semaphore:
+                started = time.perf_counter()
+                try:
+                    async with self._client.stream('GET', url, headers=headers, timeout=timeout or self.timeout) as response:
+                        content, truncated = await self._read_body(response)
+                except Exception as e:
+                    self.stats['failures'] += 1
+                    breaker.record_failure()
+                    return FetchedPage(url, error=e, elapsed=time.perf_counter() - started)
+
+        self.stats['requests'] += 1
+        self.stats['bytes'] += len(content)
+        self.stats['truncated'] += truncated
+        page = FetchedPage.from_httpx(url, response, content, truncated, time.perf_counter() - started)
+        self.record_outcome(breaker, page)
+        return page
+
+    def record_outcome(self, breaker, page: FetchedPage):
+        """Feed a response to the host's circuit breaker (also used by the scrapers' blocking fallbacks)"""
+        if page.status_code == 429 or page.challenged:
+            breaker.record_neutral()  # The host is up, it is just pushing back
+        elif page.status_code >= 500 and page.status_code in self.retry.statuses:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+
+    @staticmethod
+    async def _read_body(response: httpx.Response) -> Tuple[bytes, bool]:
+        """Read the body up to its byte budget; the rest is never downloaded (the connection is dropped)"""
+        budget = body_budget({k.lower(): v for k, v in response.headers.items()})
+        chunks, size = [], 0
+        async for chunk in response.aiter_bytes():
+            if len(chunk) > budget - size:
+                chunks.append(chunk[:budget - size])
+                return b''.join(chunks), True
+            chunks.append(chunk)
+            size += len(chunk)
+        return b''.join(chunks), False
+
+    async def afetch_many(self, requests: Iterable[Union[str, Tuple[str, Dict]]]) -> List[FetchedPage]:
+        tasks = []
+        for request in requests:
+            url, headers = (request, None) if isinstance(request, str) else request
+            tasks.append(self.afetch(url, headers))
+        return list(await asyncio.gather(*tasks))
+
+    def fetch(self, url: str, headers: Optional[Dict] = None, timeout: Optional[float] = None) -> FetchedPage:
+        """Blocking fetch of one URL"""
+        return self._call(self.afetch(url, headers, timeout))
+
+    def fetch_many(self, requests: Iterable[Union[str, Tuple[str, Dict]]]) -> List[FetchedPage]:
+        """Fetch URLs (or (url, headers) pairs) concurrently; pages are returned in request order"""
+        return self._call(self.afetch_many(list(requests)))
+
+    def host_delays(self) -> Dict[str, float]:
+        """Seconds between requests per host seen so far"""
+        return {key: self.limiter.bucket(key).interval for key in list(self._hosts)}
+
+    def breaker_states(self, only_tripped: bool = True) -> Dict[str, Dict]:
+        """Circuit breaker state of hosts that have failed (all hosts with only_tripped=False)"""
+        return self.breakers.states(only_tripped)
+
+    def cache_stats(self) -> Optional[Dict]:
+        """Hit rate and size of the HTTP cache, or None when caching is off"""
+        return self.cache.stats() if self.cache is not None else None
+
+    def close(self):
+        if not self._loop.is_running():
+            return
+        self._call(self._client.aclose())
+        self._call(self._loop.shutdown_asyncgens())  # Bodies abandoned at their byte cap
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        if self.cache is not None:
+            # The cache thread holds the connection afetch uses
+            try:
+                self._cache_executor.submit(self.cache.close).result()
+            except RuntimeError:
+                pass  # Interpreter exit: the executor has already stopped its thread
+            self._cache_executor.shutdown()
+
+_engine: Optional[FetchEngine] = None
+_lock = threading.Lock()
+
+def get_fetch_engine() -> FetchEngine:
+    """The process-wide fetch engine, so per-host limits hold across all scrapers"""
+    global _engine
+    with _lock:
+        if _engine is None:
+            _engine = FetchEngine(limiter=get_rate_limiter())
+            atexit.register(_engine.close)
+        return _engine
@@ -0,0 +1,244 @@
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from config.settings import Config
+from utils.url_canonicalizer import canonicalize_url
+
+class BloomFilter:
+    """Fixed-size Bloom filter; k bit positions per key by double hashing one blake2b digest"""
+
+    def __init__(self, capacity: int, error_rate: float, bits: Optional[bytearray] = None, count: int = 0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bits if bits is not None else bytearray((self.size + 7) // 8)
+        self.count = count
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def add(self, key: str):
+        for p in self._positions(key):
+            self.bits[p >> 3] |= 1 << (p & 7)
+        self.count += 1
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+class ScalableBloomFilter:
+    """Bloom filter that grows with its contents (Almeida et al., 2007).
+
+    Slices are added when the newest one reaches its capacity; each has
+    twice the capacity and half the false-positive rate of the previous
+    one, so the overall false-positive rate stays below error_rate however
+    many keys are added.
+    """
+
+    GROWTH = 2
+    TIGHTENING = 0.5
+
+    def __init__(self, initial_capacity: int, error_rate: float, slices: Optional[List[BloomFilter]] = None):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.slices = slices or []
+
+    def __contains__(self, key: str) -> bool:
+        return any(key in bloom for bloom in reversed(self.slices))
+
+    def add(self, key: str) -> bool:
+        """Add a key; returns False if it was (probably) present already"""
+        if key in self:
+            return False
+        if not self.slices or self.slices[-1].full:
+            n = len(self.slices)
+            self.slices.append(BloomFilter(
+                self.initial_capacity * self.GROWTH ** n,
+                self.error_rate * (1 - self.TIGHTENING) * self.TIGHTENING ** n
+            ))
+        self.slices[-1].add(key)
+        return True
+
+    def __len__(self) -> int:
+        return sum(bloom.count for bloom in self.slices)
+
+    def save(self, path: str):
+        """Write a JSON header line followed by each slice's bit array (atomically)"""
+        header = {
+            'initial_capacity': self.initial_capacity, 'error_rate': self.error_rate,
+            'slices': [{'capacity': b.capacity, 'error_rate': b.error_rate, 'count': b.count} for b in self.slices]
+        }
+        temp = f'{path}.tmp'
+        with open(temp, 'wb') as f:
+            f.write(json.dumps(header).encode('utf-8') + b'\n')
+            for bloom in self.slices:
+                f.write(bloom.bits)
+        os.replace(temp, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'ScalableBloomFilter':
+        with open(path, 'rb') as f:
+            header = json.loads(f.readline())
+            slices = []
+            for meta in header['slices']:
+                bloom = BloomFilter(meta['capacity'], meta['error_rate'], count=meta['count'])
+                bloom.bits = bytearray(f.read(len(bloom.bits)))
+                slices.append(bloom)
+        return cls(header['initial_capacity'], header['error_rate'], slices)
+
+class SeenURLs:
+    """Canonical URLs fetched within the freshness window, persisted as Bloom filter generations.
+
+    A Bloom filter cannot forget single keys, so the window is covered by
+    generations of window/FRONTIER_GENERATIONS seconds each: URLs go into
+    the current generation, and a generation is dropped once all of it is
+    older than the window. A URL is therefore remembered for at least the
+    window (and at most one generation longer). Up to generations + 1
+    filters are consulted per lookup, so each gets that share of error_rate
+    and the combined false-positive rate stays within it.
+    """
+
+    def __init__(self, directory: str, window: float, error_rate: float, initial_capacity: int,
+                 generations: int = None):
+        self.directory = directory
+        self.window = window
+        generations = generations or Config.FRONTIER_GENERATIONS
+        self.error_rate = error_rate / (generations + 1)  # Per generation
+        self.initial_capacity = initial_capacity
+        self.span = window / generations
+        self.filters: Dict[int, ScalableBloomFilter] = {}
+        self.dirty = set()
+        os.makedirs(directory, exist_ok=True)
+
+        for name in os.listdir(directory):
+            if name.startswith('seen-') and name.endswith('.bloom'):
+                try:
+                    self.filters[int(name[5:-6])] = ScalableBloomFilter.load(os.path.join(directory, name))
+                except (ValueError, OSError, KeyError):
+                    print(f"⚠️ Ignoring unreadable frontier file {name}")
+        self.expire()
+
+    def _generation(self, now: float) -> int:
+        return int(now // self.span * self.span)
+
+    def expire(self, now: Optional[float] = None):
+        """Drop generations that ended before the window began"""
+        now = time.time() if now is None else now
+        for start in [s for s in self.filters if s + self.span <= now - self.window]:
+            del self.filters[start]
+            self.dirty.discard(start)
+            try:
+                os.remove(os.path.join(self.directory, f'seen-{start}.bloom'))
+            except FileNotFoundError:
+                pass
+
+    def __contains__(self, canonical: str) -> bool:
+        return any(canonical in bloom for bloom in self.filters.values())
+
+    def add(self, canonical: str, now: Optional[float] = None):
+        start = self._generation(time.time() if now is None else now)
+        bloom = self.filters.get(start)
+        if bloom is None:
+            bloom = self.filters[start] = ScalableBloomFilter(self.initial_capacity, self.error_rate)
+        bloom.add(canonical)
+        self.dirty.add(start)
+
+    def save(self):
+        for start in list(self.dirty):
+            self.filters[start].save(os.path.join(self.directory, f'seen-{start}.bloom'))
+        self.dirty.clear()
+
+    def __len__(self) -> int:
+        return sum(len(bloom) for bloom in self.filters.values())
+
+class CrawlFrontier:
+    """Which search results to fetch, shared by every search engine in a sweep.
+
+    Search results are canonicalized (utils/url_canonicalizer.py) and
+    dropped if the same page was fetched within FRONTIER_FRESHNESS_HOURS,
+    even by another engine or an earlier run, or is being fetched now. The
+    rest are ranked by trust score (trusted domain, documents first) plus
+    the source's weight from FRONTIER_SOURCE_WEIGHTS. Callers report back
+    with mark_fetched (the page is remembered) or release (it may be picked
+    again, e.g. after an error).
+
+    A search scrapes only its best results: select() returns them and
+    leaves nothing of that search queued, so it cannot leak into the next
+    search's batch.
+    """
+
+    def __init__(self, directory: str = None, freshness_hours: float = None, error_rate: float = None,
+                 initial_capacity: int = None):
+        self.seen = SeenURLs(
+            directory or Config.FRONTIER_DIR,
+            (Config.FRONTIER_FRESHNESS_HOURS if freshness_hours is None else freshness_hours) * 3600,
+            error_rate or Config.FRONTIER_ERROR_RATE,
+            initial_capacity or Config.FRONTIER_INITIAL_CAPACITY
+        )
+        self._pending: Dict[str, Dict] = {}  # canonical URL -> result, while being fetched
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self.stats = {'queued': 0, 'duplicates': 0, 'recently_fetched': 0, 'fetched': 0}
+
+    @staticmethod
+    def priority(result: Dict, source: str, is_trusted: Optional[Callable[[str], bool]] = None) -> float:
+        score = 8.0 if is_trusted and is_trusted(result['url']) else 6.0  # Same scale as metadata.trust_score
+        if result.get('is_document') or result.get('priority') == 'high':
+            score += 1.0
+        return score + Config.FRONTIER_SOURCE_WEIGHTS.get(source, 0.0)
+
+    def select(self, results: Iterable[Dict], source: str, limit: int,
+               is_trusted: Optional[Callable[[str], bool]] = None) -> Tuple[List[Dict], int]:
+        """The `limit` best new results of one search, held until mark_fetched or release, and how many were new.
+
+        New results that do not make the batch are not queued: the next
+        search that finds them may take them.
+        """
+        candidates, found = [], set()
+        with self._lock:
+            for result in results:
+                canonical = canonicalize_url(result['url'])
+                if canonical in self._pending or canonical in found:
+                    self.stats['duplicates'] += 1
+                    continue
+                if canonical in self.seen:
+                    self.stats['recently_fetched'] += 1
+                    continue
+                found.add(canonical)
+                entry = dict(result, canonical_url=canonical, source=source)
+                candidates.append((-self.priority(result, source, is_trusted), next(self._counter), entry))
+
+            batch = [entry for _, _, entry in heapq.nsmallest(limit, candidates)]
+            for entry in batch:
+                self._pending[entry['canonical_url']] = entry
+            self.stats['queued'] += len(batch)
+        return batch, len(candidates)
+
+    def mark_fetched(self, urls: Iterable[str], now: Optional[float] = None):
+        """Remember pages as fetched for the freshness window and persist the filter"""
+        with self._lock:
+            for url in urls:
+                canonical = canonicalize_url(url)
+                self._pending.pop(canonical, None)
+                self.seen.add(canonical, now)
+                self.stats['fetched'] += 1
+            self.seen.expire(now)
+            self.seen.save()
+
+    def release(self, urls: Iterable[str]):
+        """Give up on pages without remembering them (they may be found and picked again)"""
+        with self._lock:
+            for url in urls:
+                self._pending.pop(canonicalize_url(url), None)
@@ -1,23 +1,15 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from .base_scraper import BaseScraper
-from typing import List, Dict
+from .browser_pool import RenderedPage, get_browser_pool
+from .fetch_engine import FetchedPage
+from .render_decision import shell_reason
+from config.settings import Config
+from typing import Callable, Dict, List, Optional, Set
 
 class GeneralWebScraper(BaseScraper):
     def __init__(self):
         super().__init__()
-        self.setup_driver()
-    
-    def setup_driver(self):
-        """Setup Selenium WebDriver for JavaScript-heavy sites"""
-        chrome_options = Options()
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        self.driver = webdriver.Chrome(options=chrome_options)
+        # Shared warm browser contexts for JavaScript-heavy sites (launched on first use)
+        self.browser = get_browser_pool()
     
     def search(self, keywords: List[str]) -> List[Dict]:
         """General web search - could integrate multiple search engines"""
@@ -25,46 +17,89 @@ class GeneralWebScraper(BaseScraper):
         # For now, return empty list
         return []
     
-    def scrape_url(self, url: str) -> Dict:
-        """Scrape JavaScript-heavy websites"""
-        try:
-            self.driver.get(url)
-            
-            # Wait for page to load
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            html = self.driver.page_source
-            content = self.extract_basic_content(html, url)
-            
-            return {
-                'url': url,
-                'domain': self.driver.current_url.split('/')[2],
-                'title': content['title'],
-                'meta_description': content['meta_description'],
-                'content': {
-                    'text': content['text'],
-                    'headings': content['headings'],
-                    'links': content['links'][:50]  # Limit links
-                },
-                'media': {
-                    'images': content['images'][:20],  # Limit images
-                    'videos': [],
-                    'audio': []
-                },
-                'metadata': {
-                    'content_type': 'text/html',
-                    'language': 'en',
-                    'trust_score': 7.0 if self.is_trusted_domain(url) else 4.0
-                }
+    def html_document(self, url: str, final_url: str, html: str, rendered_by: str) -> Dict:
+        content = self.extract_basic_content(html, url)
+        
+        return {
+            'url': url,
+            'domain': final_url.split('/')[2],
+            'title': content['title'],
+            'meta_description': content['meta_description'],
+            'content': {
+                'text': content['text'],
+                'headings': content['headings'],
+                'links': content['links'][:50]  # Limit links
+            },
+            'media': {
+                'images': content['images'][:20],  # Limit images
+                'videos': [],
+                'audio': []
+            },
+            'metadata': {
+                'content_type': 'text/html',
+                'language': 'en',
+                'trust_score': 7.0 if self.is_trusted_domain(url) else 4.0,
+                'rendered_by': rendered_by
             }
+        }
+    
+    def build_document(self, url: str, page: FetchedPage) -> Dict:
+        """Build a document from a page fetched over HTTP"""
+        return self.html_document(url, page.final_url, page.text, 'static')
+    
+    def build_rendered_document(self, url: str, page: RenderedPage) -> Dict:
+        """Build a document from a page rendered in the browser"""
+        return self.html_document(url, page.final_url, page.html, 'browser')
+    
+    def scrape_urls(self, urls: List[str],
+                    skip_unchanged: Optional[Callable[[Dict[str, str]], Set[str]]] = None) -> List[Optional[Dict]]:
+        """Scrape JavaScript-heavy websites static-first.
+        
+        Pages are fetched over HTTP like every other scraper's; only those that
+        arrive and turn out to be JavaScript shells (scrapers/render_decision.py)
+        are rendered, concurrently across the browser pool. Failed fetches
+        are not: a page that 404s or times out would fail in the browser too.
+        With RENDER_STATIC_FIRST off every page is rendered, without an HTTP
+        fetch first (so skip_unchanged does not apply).
+        """
+        documents: List[Optional[Dict]] = [None] * len(urls)
+        if not Config.RENDER_STATIC_FIRST:
+            shells = list(range(len(urls)))
+        else:
+            shells = self.fetch_static(urls, documents, skip_unchanged)
         
-        except Exception as e:
-            print(f"Error scraping {url}: {e}")
-            return {}
+        # Paced per host by the pool, like the static fetches
+        rendered = self.browser.render_many([urls[i] for i in shells], wait_until=Config.RENDER_WAIT_UNTIL)
+        for i, page in zip(shells, rendered):
+            try:
+                page.raise_for_status()
+                documents[i] = self.build_rendered_document(urls[i], page)
+            except Exception as e:
+                print(f"Error scraping {urls[i]}: {e}")
+                documents[i] = {}
+        return documents
     
-    def __del__(self):
-        """Clean up driver"""
-        if hasattr(self, 'driver'):
-            self.driver.quit()
+    def fetch_static(self, urls: List[str], documents: List[Optional[Dict]],
+                     skip_unchanged: Optional[Callable[[Dict[str, str]], Set[str]]]) -> List[int]:
+        """Fill in documents for pages fetched over HTTP; returns the indexes of JavaScript shells to render"""
+        pages = self.fetcher.fetch_many([(url, self.request_headers(url)) for url in urls])
+        stored = self.stored_unchanged(urls, pages, skip_unchanged)
+        
+        shells = []
+        for i, (url, page) in enumerate(zip(urls, pages)):
+            if url in stored:
+                continue
+            try:
+                if page.challenged:
+                    # Cloudflare browser challenge: retry with the scraper's blocking session
+                    page = self.fetch_blocking(url, self.request_headers(url))
+                page.raise_for_status()
+            except Exception as e:
+                print(f"Error scraping {url}: {e}")
+                documents[i] = {}
+                continue
+            if shell_reason(page.text, page.headers.get('content-type', '')):
+                shells.append(i)
+            else:
+                documents[i] = self.with_body_hash(self.build_document(url, page), page)
+        return shells
@@ -1,6 +1,8 @@
 import requests
 from typing import List, Dict
+from urllib.parse import urlparse
 from .base_scraper import BaseScraper
+from .fetch_engine import FetchedPage
 from config.settings import Config
 
 class GoogleScraper(BaseScraper):
@@ -45,34 +47,28 @@ class GoogleScraper(BaseScraper):
         
         return results
     
-    def scrape_url(self, url: str) -> Dict:
-        """Scrape content from URL"""
-        try:
-            response = self.make_request(url)
-            content = self.extract_basic_content(response.text, url)
-            
-            return {
-                'url': url,
-                'domain': requests.utils.urlparse(url).netloc,
-                'title': content['title'],
-                'meta_description': content['meta_description'],
-                'content': {
-                    'text': content['text'],
-                    'headings': content['headings'],
-                    'links': content['links']
-                },
-                'media': {
-                    'images': content['images'],
-                    'videos': [],
-                    'audio': []
-                },
-                'metadata': {
-                    'content_type': response.headers.get('content-type', ''),
-                    'language': 'en',  # Could be detected
-                    'trust_score': 8.0 if self.is_trusted_domain(url) else 5.0
-                }
-            }
+    def build_document(self, url: str, page: FetchedPage) -> Dict:
+        """Build a document from a fetched page"""
+        content = self.extract_basic_content(page.text, url)
         
-        except Exception as e:
-            print(f"Error scraping {url}: {e}")
-            return {}
+        return {
+            'url': url,
+            'domain': urlparse(url).netloc,
+            'title': content['title'],
+            'meta_description': content['meta_description'],
+            'content': {
+                'text': content['text'],
+                'headings': content['headings'],
+                'links': content['links']
+            },
+            'media': {
+                'images': content['images'],
+                'videos': [],
+                'audio': []
+            },
+            'metadata': {
+                'content_type': page.headers.get('content-type', ''),
+                'language': 'en',  # Could be detected
+                'trust_score': 8.0 if self.is_trusted_domain(url) else 5.0
+            }
+        }
@@ -0,0 +1,295 @@
+import re
+from typing import Dict, List, Optional, Union
+from urllib.parse import urljoin, urlparse
+from .html_parsers import ParserBackend, get_parser_backend
+from .link_classifier import DOCUMENT_KEYWORDS, MEDIA_PATTERNS, SOCIAL_PLATFORMS, LinkClassifier, get_link_classifier
+
+HEADINGS = {'h1', 'h2', 'h3', 'h4', 'h5', 'h6'}
+BACKGROUND_IMAGE = re.compile(r'background-image:\s*url\(["\']?([^"\')\s]+)["\']?\)')
+YOUTUBE_PATTERNS = [
+    re.compile(r'youtube\.com/embed/([a-zA-Z0-9_-]+)'),
+    re.compile(r'youtube\.com/watch\?v=([a-zA-Z0-9_-]+)'),
+    re.compile(r'youtu\.be/([a-zA-Z0-9_-]+)')
+]
+VIMEO_PATTERN = re.compile(r'vimeo\.com/video/(\d+)')
+CAPTION_CLASS = re.compile(r'caption|description')
+SIZE_PATTERNS = [
+    re.compile(r'(\d+\.?\d*)\s*(kb|mb|gb|bytes?)'),
+    re.compile(r'\((\d+\.?\d*)\s*(kb|mb|gb|bytes?)\)'),
+    re.compile(r'size:\s*(\d+\.?\d*)\s*(kb|mb|gb|bytes?)'),
+    re.compile(r'(\d+\.?\d*)\s*(k|m|g)b')
+]
+
+def filename_from_url(url: str) -> str:
+    """Last path segment of a URL"""
+    try:
+        filename = urlparse(url).path.split('/')[-1]
+        return filename if filename else 'unknown'
+    except Exception:
+        return 'unknown'
+
+class HTMLExtractor:
+    """Everything the scrapers take from an HTML page, in one parse and one walk of the tree.
+
+    extract() returns the basic content (title, meta description, headings,
+    text, links, anchors, images) and, with media=True, the media the Google
+    dorker reports: images with captions, CSS background images, video and
+    audio sources, YouTube/Vimeo embeds, document links and social links.
+    Elements are handled as the walk reaches them; only small neighbourhoods
+    (captions, file sizes next to a link) are looked at around them.
+
+    The parser is pluggable (scrapers/html_parsers.py, Config.HTML_PARSER):
+    selectolax, lxml or html.parser give the same result for the same page,
+    up to the blank lines the parsers keep between sections of the text,
+    unless the HTML is broken in ways the parsers repair differently (nested
+    links, content after </html>; see ParserBackend).
+    """
+
+    def __init__(self, media_patterns: Dict[str, List[str]] = None, document_keywords: List[str] = None,
+                 social_platforms: Dict[str, str] = None, backend: Union[str, ParserBackend, None] = None):
+        self.media_patterns = media_patterns or MEDIA_PATTERNS
+        self.document_keywords = document_keywords or DOCUMENT_KEYWORDS
+        self.social_platforms = social_platforms or SOCIAL_PLATFORMS
+        if media_patterns or document_keywords or social_platforms:
+            self.classifier = LinkClassifier(self.media_patterns, self.document_keywords, self.social_platforms)
+        else:
+            self.classifier = get_link_classifier()
+        self.backend = backend if isinstance(backend, ParserBackend) else get_parser_backend(backend)
+
+    def extract(self, html: str, url: str, media: bool = True) -> Dict:
+        backend = self.backend
+        document = backend.parse(html)
+
+        title, title_seen = '', False
+        meta_description = None
+        headings, texts, links, anchors, images = [], [], [], [], []
+        # Kept apart so each media list comes out in the same order as tag-by-tag extraction
+        tag_images, background_images, tag_videos, youtube, vimeo = [], [], [], [], []
+        audio, documents, social = [], [], []
+
+        for item in backend.walk(document):
+            if isinstance(item, str):
+                texts.append(item)
+                continue
+            name, attrs, node = item
+
+            if name == 'title':
+                if not title_seen:
+                    title, title_seen = backend.text(node), True
+            elif name == 'meta':
+                if meta_description is None and attrs.get('name') == 'description':
+                    meta_description = attrs.get('content', '')
+            elif name in HEADINGS:
+                headings.append(backend.text(node).strip())
+            elif name == 'a' and 'href' in attrs:
+                href = attrs['href']
+                full_url = urljoin(url, href)
+                link_text = backend.text(node).strip()
+                links.append(full_url)
+                anchors.append({'url': full_url, 'href': href, 'text': link_text})
+                if media:
+                    self._link(node, attrs, full_url, link_text, documents, social)
+            elif name == 'img' and 'src' in attrs:
+                img_url = urljoin(url, attrs['src'])
+                images.append({
+                    'url': img_url,
+                    'alt_text': attrs.get('alt', ''),
+                    'caption': attrs.get('title', '')
+                })
+                if media and attrs['src']:
+                    img_data = self.process_image_element(node, attrs, img_url)
+                    if img_data:
+                        tag_images.append(img_data)
+
+            if not media:
+                continue
+
+            if 'style' in attrs:
+                match = BACKGROUND_IMAGE.search(attrs['style'])
+                if match:
+                    background_images.append({
+                        'url': urljoin(url, match.group(1)),
+                        'type': 'background_image',
+                        'alt_text': '',
+                        'title': attrs.get('title', ''),
+                        'source_tag': 'css_background'
+                    })
+            if name in ('video', 'source') and attrs.get('src'):
+                tag_videos.append(self.process_video_element(name, attrs, urljoin(url, attrs['src'])))
+            if name in ('audio', 'source') and attrs.get('src'):
+                audio.append(self.process_audio_element(name, attrs, urljoin(url, attrs['src'])))
+            if name == 'iframe' and 'src' in attrs:
+                self._iframe(attrs, youtube, vimeo)
+
+        content = {
+            'title': title,
+            'meta_description': meta_description or '',
+            'headings': headings,
+            'text': ''.join(texts).strip(),
+            'links': links,
+            'anchors': anchors,
+            'images': images
+        }
+        if media:
+            content['media'] = {
+                'images': tag_images + background_images,
+                'videos': tag_videos + youtube + vimeo,
+                'audio': audio,
+                'documents': documents,
+                'social_media': social,
+                'external_links': []
+            }
+        return content
+
+    # ------------------------------------------------------------- elements
+
+    def _link(self, link, attrs: Dict, full_url: str, link_text: str, documents: List, social: List):
+        href = attrs['href']
+        label = self.classifier.classify(href, link_text)
+
+        if label['type'] == 'documents':
+            documents.append({
+                'url': full_url,
+                'filename': filename_from_url(full_url) or link_text,
+                'type': label['subtype'],
+                'link_text': link_text,
+                'file_size': self.estimate_file_size(link),
+                'description': self.extract_link_description(link, attrs)
+            })
+
+        if label['platform']:
+            social.append({
+                'url': href,
+                'platform': label['platform'],
+                'link_text': link_text,
+                'title': attrs.get('title', '')
+            })
+
+    def _iframe(self, attrs: Dict, youtube: List, vimeo: List):
+        src = attrs['src']
+        for pattern in YOUTUBE_PATTERNS:
+            match = pattern.search(src)
+            if match:
+                video_id = match.group(1)
+                youtube.append({
+                    'url': src,
+                    'type': 'youtube_embed',
+                    'video_id': video_id,
+                    'title': attrs.get('title', ''),
+                    'platform': 'youtube',
+                    'thumbnail': f'https://img.youtube.com/vi/{video_id}/maxresdefault.jpg'
+                })
+                break
+
+        match = VIMEO_PATTERN.search(src)
+        if match:
+            vimeo.append({
+                'url': src,
+                'type': 'vimeo_embed',
+                'video_id': match.group(1),
+                'title': attrs.get('title', ''),
+                'platform': 'vimeo'
+            })
+
+    def process_image_element(self, img_element, attrs: Dict, full_url: str) -> Optional[Dict]:
+        """Image with metadata; None for images too small to be content (icons, spacers)"""
+        width = attrs.get('width')
+        height = attrs.get('height')
+        if width and height:
+            try:
+                if int(width) < 50 or int(height) < 50:
+                    return None
+            except (ValueError, TypeError):
+                pass
+
+        return {
+            'url': full_url,
+            'type': 'image',
+            'alt_text': attrs.get('alt', ''),
+            'title': attrs.get('title', ''),
+            'width': width or '',
+            'height': height or '',
+            'caption': self.extract_image_caption(img_element),
+            'filename': filename_from_url(full_url),
+            'source_tag': 'img',
+            'class': ' '.join(attrs.get('class', '').split()),
+            'lazy_loading': attrs.get('loading') == 'lazy'
+        }
+
+    def process_video_element(self, name: str, attrs: Dict, full_url: str) -> Dict:
+        return {
+            'url': full_url,
+            'type': 'video',
+            'filename': filename_from_url(full_url),
+            'source_tag': name,
+            'controls': attrs.get('controls') is not None,
+            'autoplay': attrs.get('autoplay') is not None,
+            'poster': attrs.get('poster', '')
+        }
+
+    def process_audio_element(self, name: str, attrs: Dict, full_url: str) -> Dict:
+        return {
+            'url': full_url,
+            'type': 'audio',
+            'filename': filename_from_url(full_url),
+            'source_tag': name,
+            'controls': attrs.get('controls') is not None,
+            'autoplay': attrs.get('autoplay') is not None
+        }
+
+    def extract_image_caption(self, img_element) -> str:
+        """Caption from an enclosing figure, the next sibling or a caption-classed parent"""
+        backend = self.backend
+        figure = backend.parent(img_element, ('figure',))
+        if figure is not None:
+            caption = backend.find(figure, 'figcaption')
+            if caption is not None:
+                return backend.text(caption).strip()
+
+        sibling = backend.next_sibling(img_element)
+        if sibling and sibling[0] in ('p', 'div', 'span'):
+            text = backend.text(sibling[1]).strip()
+            if len(text) < 200:  # Likely a caption
+                return text
+
+        parent = backend.parent(img_element, ('div', 'span'), CAPTION_CLASS)
+        if parent is not None:
+            return backend.text(parent).strip()
+
+        return ''
+
+    def estimate_file_size(self, link_element) -> str:
+        """File size mentioned in the link text or its parent element"""
+        text = self.backend.text(link_element).lower()
+        parent = self.backend.parent(link_element)
+        parent_text = self.backend.text(parent).lower() if parent is not None else ''
+        combined_text = f"{text} {parent_text}"
+
+        for pattern in SIZE_PATTERNS:
+            match = pattern.search(combined_text)
+            if match:
+                return f"{match.group(1)} {match.group(2).upper()}"
+
+        return ''
+
+    def extract_link_description(self, link_element, attrs: Dict) -> str:
+        """Description for a document link: its title, the next sibling or the surrounding container"""
+        title = attrs.get('title', '')
+        if title:
+            return title
+
+        backend = self.backend
+        sibling = backend.next_sibling(link_element)
+        if sibling and sibling[0] in ('p', 'div', 'span'):
+            text = backend.text(sibling[1]).strip()
+            if len(text) < 300:  # Likely a description
+                return text
+
+        parent = backend.parent(link_element, ('div', 'td', 'li'))
+        if parent is not None:
+            link_text = backend.text(link_element)
+            description = backend.text(parent).replace(link_text, '').strip()
+            if description and len(description) < 300:
+                return description
+
+        return ''
@@ -0,0 +1,244 @@
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from bs4 import BeautifulSoup, CData, NavigableString, Tag
+from config.settings import Config
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# Elements whose content is not page text (get_text() semantics), nor walked for elements
+INVISIBLE = ('script', 'style', 'template', 'rt', 'rp')
+TEXT_TYPES = (NavigableString, CData)
+PRESERVE_WHITESPACE = ('pre', 'textarea')
+ASCII_SPACES = ' \n\t\f\r'
+
+def collapse_whitespace(text: str) -> str:
+    """A whitespace-only string becomes one newline or space, as BeautifulSoup stores it"""
+    if text.strip(ASCII_SPACES):
+        return text
+    return '\n' if '\n' in text else ' '
+
+Element = Tuple[str, Dict[str, str], object]  # (tag name, attributes, backend node)
+
+class ParserBackend(ABC):
+    """What the HTML extractor needs from a parser, for one backend.
+
+    parse() builds a document; walk() yields its content in document order:
+    visible text as str, elements as (name, attributes, node). Script, style
+    and template content is neither text nor walked, and whitespace-only
+    text outside <pre> is collapsed like BeautifulSoup does. The other
+    methods look around a node (the neighbourhood of an image or link).
+    Attribute values are plain strings: class is not split, boolean
+    attributes are ''.
+
+    On well-formed pages and the usual tag soup (unclosed <p>, <li>, <td>,
+    stray end tags) backends agree on elements and text, up to a
+    whitespace-only string between sections the HTML5 parsers move (around
+    <head> and <body>, implied <tbody>) or that html.parser splits off at a
+    stray end tag. Where the tree itself is ambiguous they do not:
+    html.parser keeps nested <a> open (the outer link's text includes the
+    inner one's) while lxml and selectolax close it, lxml drops content
+    after </html>, and selectolax ends an <h1> at a mismatched </h2> where
+    the others run on to the next block.
+    """
+
+    name = ''
+
+    @abstractmethod
+    def parse(self, html: str):
+        """This backend's document for a page"""
+        pass
+
+    @abstractmethod
+    def walk(self, document) -> Iterator[Union[str, Element]]:
+        """Visible text and elements of a document, in document order"""
+        pass
+
+    @abstractmethod
+    def text(self, node) -> str:
+        """All visible text under a node"""
+        pass
+
+    @abstractmethod
+    def parent(self, node, names: Iterable[str] = None, class_pattern: Optional[re.Pattern] = None):
+        """Nearest ancestor with one of `names` (any ancestor if None) whose class matches class_pattern"""
+        pass
+
+    @abstractmethod
+    def next_sibling(self, node) -> Optional[Tuple[str, object]]:
+        """(name, node) of the next sibling element"""
+        pass
+
+    @abstractmethod
+    def find(self, node, name: str):
+        """First descendant element called `name`"""
+        pass
+
+class SoupBackend(ParserBackend):
+    """BeautifulSoup with the standard library's html.parser: pure Python, always available"""
+
+    name = 'html.parser'
+
+    def parse(self, html: str):
+        return BeautifulSoup(html, 'html.parser', multi_valued_attributes=None)
+
+    def walk(self, document):
+        stack = [iter(document.contents)]
+        while stack:
+            for node in stack[-1]:
+                if isinstance(node, Tag):
+                    yield node.name, node.attrs, node
+                    if node.name not in INVISIBLE:
+                        stack.append(iter(node.contents))
+                        break
+                elif type(node) in TEXT_TYPES:
+                    yield str(node)
+            else:
+                stack.pop()
+
+    def text(self, node) -> str:
+        return node.get_text()
+
+    def parent(self, node, names=None, class_pattern=None):
+        for parent in node.parents:
+            if parent.name == '[document]':
+                return None
+            if (names is None or parent.name in names) and \
+                    (class_pattern is None or class_pattern.search(parent.get('class', ''))):
+                return parent
+        return None
+
+    def next_sibling(self, node):
+        sibling = node.find_next_sibling()
+        return (sibling.name, sibling) if sibling is not None else None
+
+    def find(self, node, name: str):
+        return node.find(name)
+
+class LxmlBackend(ParserBackend):
+    """lxml.html (libxml2): C parser, tree walked without building Python objects per text node"""
+
+    name = 'lxml'
+
+    def __init__(self):
+        self.parser = lxml.html.HTMLParser(encoding='utf-8', remove_comments=True, remove_pis=True)
+
+    def parse(self, html: str):
+        try:
+            root = lxml.html.document_fromstring(html.encode('utf-8', 'replace'), parser=self.parser)
+        except (etree.ParserError, ValueError):
+            return None  # Empty document
+        for element in list(root.iter(*INVISIBLE)):
+            element.clear(keep_tail=True)  # Emptied rather than removed, so its tail is not merged
+        return root
+
+    def walk(self, document):
+        if document is None:
+            return
+        preformatted = 0
+        for event, element in etree.iterwalk(document, events=('start', 'end')):
+            if event == 'start':
+                yield element.tag, element.attrib, element
+                if element.tag in PRESERVE_WHITESPACE:
+                    preformatted += 1
+                if element.text:
+                    yield element.text if preformatted else collapse_whitespace(element.text)
+            else:
+                if element.tag in PRESERVE_WHITESPACE:
+                    preformatted -= 1
+                if element.tail and element is not document:
+                    yield element.tail if preformatted else collapse_whitespace(element.tail)
+
+    def text(self, node) -> str:
+        if node.tag in PRESERVE_WHITESPACE:
+            return ''.join(node.itertext())
+        return ''.join(map(collapse_whitespace, node.itertext()))
+
+    def parent(self, node, names=None, class_pattern=None):
+        for parent in node.iterancestors():
+            if (names is None or parent.tag in names) and \
+                    (class_pattern is None or class_pattern.search(parent.get('class', ''))):
+                return parent
+        return None
+
+    def next_sibling(self, node):
+        sibling = node.getnext()
+        return (sibling.tag, sibling) if sibling is not None else None
+
+    def find(self, node, name: str):
+        return next(node.iterdescendants(name), None)
+
+class LexborBackend(ParserBackend):
+    """selectolax's lexbor: HTML5-conformant C parser, the fastest of the three"""
+
+    name = 'selectolax'
+
+    def parse(self, html: str):
+        tree = LexborHTMLParser(html)
+        tree.strip_tags(list(INVISIBLE))
+        return tree
+
+    def walk(self, document):
+        if document.root is None:
+            return
+        for node in document.root.traverse(include_text=True):
+            tag = node.tag
+            if tag == '-text':
+                text = node.text_content
+                yield text if node.parent.tag in PRESERVE_WHITESPACE else collapse_whitespace(text)
+            elif not tag.startswith('-'):
+                yield tag, self.attributes(node), node
+
+    @staticmethod
+    def attributes(node) -> Dict[str, str]:
+        return {key: '' if value is None else value for key, value in node.attributes.items()}
+
+    def text(self, node) -> str:
+        if node.tag in PRESERVE_WHITESPACE:
+            return node.text(deep=True)
+        return ''.join(collapse_whitespace(child.text_content)
+                       for child in node.traverse(include_text=True) if child.tag == '-text')
+
+    def parent(self, node, names=None, class_pattern=None):
+        parent = node.parent
+        while parent is not None and not parent.tag.startswith('-'):
+            if (names is None or parent.tag in names) and \
+                    (class_pattern is None or class_pattern.search(parent.attributes.get('class') or '')):
+                return parent
+            parent = parent.parent
+        return None
+
+    def next_sibling(self, node):
+        sibling = node.next
+        while sibling is not None and sibling.tag.startswith('-'):
+            sibling = sibling.next
+        return (sibling.tag, sibling) if sibling is not None else None
+
+    def find(self, node, name: str):
+        return node.css_first(name)
+
+BACKENDS = {'selectolax': LexborBackend, 'lxml': LxmlBackend, 'html.parser': SoupBackend}
+
+def available_backends() -> List[str]:
+    """Installed backends, fastest first"""
+    installed = {'selectolax': LexborHTMLParser is not None, 'lxml': lxml is not None, 'html.parser': True}
+    return [name for name in BACKENDS if installed[name]]
+
+def get_parser_backend(name: str = None) -> ParserBackend:
+    """The configured backend (Config.HTML_PARSER); 'auto' or an uninstalled one picks the fastest installed"""
+    name = name or Config.HTML_PARSER
+    available = available_backends()
+    if name not in available:
+        if name != 'auto':
+            print(f"⚠️ HTML parser '{name}' is not installed, using {available[0]}")
+        name = available[0]
+    return BACKENDS[name]()
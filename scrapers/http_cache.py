@@ -0,0 +1,250 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from config.settings import Config
+
+def parse_cache_control(value: str) -> Dict[str, Optional[str]]:
+    """Cache-Control directives, lower-cased: {'max-age': '600', 'no-cache': None, ...}"""
+    directives = {}
+    for part in value.split(','):
+        name, _, argument = part.strip().partition('=')
+        if name:
+            directives[name.lower()] = argument.strip('"') if argument else None
+    return directives
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+def freshness_lifetime(headers: Dict[str, str], now: float, heuristic_max: float) -> Optional[float]:
+    """Seconds a response stays fresh, 0 if it must be revalidated, None if it must not be stored"""
+    directives = parse_cache_control(headers.get('cache-control', ''))
+    if 'no-store' in directives or headers.get('vary', '').strip() == '*':
+        return None
+    if 'no-cache' in directives:
+        return 0
+
+    for name in ('s-maxage', 'max-age'):
+        if directives.get(name):
+            try:
+                return max(0, int(directives[name]))
+            except ValueError:
+                return 0
+
+    date = _http_date(headers.get('date')) or now
+    expires = _http_date(headers.get('expires'))
+    if headers.get('expires') is not None:
+        # An invalid Expires (e.g. "0") means already expired
+        return max(0, expires - date) if expires else 0
+
+    last_modified = _http_date(headers.get('last-modified'))
+    if last_modified and last_modified < date:
+        # Heuristic freshness (RFC 9111 4.2.2): a tenth of the time since the last change
+        return min((date - last_modified) / 10, heuristic_max)
+    return 0
+
+class CachedResponse:
+    """A stored response as read back from the cache"""
+
+    __slots__ = ('url', 'final_url', 'status_code', 'headers', 'content', 'expires_at')
+
+    def __init__(self, url, final_url, status_code, headers, content, expires_at):
+        self.url = url
+        self.final_url = final_url
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+        self.expires_at = expires_at
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return self.expires_at > (now or time.time())
+
+    def validators(self) -> Dict[str, str]:
+        """Conditional request headers for revalidating this response"""
+        conditions = {}
+        if self.headers.get('etag'):
+            conditions['If-None-Match'] = self.headers['etag']
+        if self.headers.get('last-modified'):
+            conditions['If-Modified-Since'] = self.headers['last-modified']
+        return conditions
+
+class HTTPCache:
+    """On-disk HTTP response cache for GET requests, keyed by URL.
+
+    Entries live in one SQLite file: an index row per URL (validators,
+    expiry, size, last access) plus the zlib-compressed body. Freshness
+    follows Cache-Control (max-age, no-cache, no-store), Expires and the
+    Last-Modified heuristic; stale entries with an ETag or Last-Modified are
+    revalidated with a conditional request. The total body size is bounded
+    and the least recently used entries are evicted first. Vary is not
+    tracked (the scrapers rotate User-Agent on every request), except that
+    'Vary: *' responses are not stored.
+    """
+
+    SCHEMA = [
+        """CREATE TABLE IF NOT EXISTS responses (
+            url TEXT PRIMARY KEY,
+            final_url TEXT,
+            status INTEGER,
+            headers TEXT,
+            body BLOB,
+            size INTEGER,
+            stored_at REAL,
+            expires_at REAL,
+            last_access REAL
+        )""",
+        "CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses(last_access)"
+    ]
+
+    def __init__(self, path: str, max_bytes: int = None, heuristic_max: float = None):
+        self.path = path
+        self.max_bytes = max_bytes or Config.HTTP_CACHE_MAX_BYTES
+        self.heuristic_max = Config.HTTP_CACHE_HEURISTIC_MAX if heuristic_max is None else heuristic_max
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'revalidated': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+        conn = self._connection()
+        with conn:
+            for statement in self.SCHEMA:
+                conn.execute(statement)
+        self._size = conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    @classmethod
+    def from_config(cls) -> Optional['HTTPCache']:
+        if not Config.HTTP_CACHE_ENABLED:
+            return None
+        return cls(Config.HTTP_CACHE_PATH)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    # ------------------------------------------------------------------- reads
+
+    def lookup(self, url: str) -> Optional[CachedResponse]:
+        """Stored response for a URL (fresh or stale); counts a miss if there is none"""
+        conn = self._connection()
+        row = conn.execute(
+            'SELECT final_url, status, headers, body, expires_at FROM responses WHERE url = ?', (url,)
+        ).fetchone()
+        if row is None:
+            self._count('misses')
+            return None
+
+        with self._lock, conn:
+            conn.execute('UPDATE responses SET last_access = ? WHERE url = ?', (time.time(), url))
+        final_url, status, headers, body, expires_at = row
+        return CachedResponse(url, final_url, status, json.loads(headers), zlib.decompress(body), expires_at)
+
+    def record_hit(self, revalidated: bool = False):
+        self._count('revalidated' if revalidated else 'hits')
+
+    def record_miss(self):
+        """A stored response that had to be downloaded again in full"""
+        self._count('misses')
+
+    # ------------------------------------------------------------------ writes
+
+    def store(self, url: str, final_url: str, status_code: int, headers: Dict[str, str], content: bytes) -> bool:
+        """Store a 200 response if its headers allow it; returns whether it was stored"""
+        if status_code != 200:
+            return False
+        now = time.time()
+        lifetime = freshness_lifetime(headers, now, self.heuristic_max)
+        if lifetime is None:
+            return False
+        if lifetime == 0 and not (headers.get('etag') or headers.get('last-modified')):
+            return False  # Could never be used without a full download
+
+        body = zlib.compress(content, 6)
+        if len(body) > self.max_bytes:
+            return False
+        # The body is stored decoded, so its transfer headers no longer apply
+        headers = {k: v for k, v in headers.items() if k not in ('content-length', 'content-encoding')}
+
+        conn = self._connection()
+        with self._lock, conn:
+            previous = conn.execute('SELECT size FROM responses WHERE url = ?', (url,)).fetchone()
+            conn.execute(
+                'INSERT OR REPLACE INTO responses '
+                '(url, final_url, status, headers, body, size, stored_at, expires_at, last_access) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, final_url, status_code, json.dumps(headers), body, len(body), now, now + lifetime, now)
+            )
+            self._size += len(body) - (previous[0] if previous else 0)
+            self.counters['stores'] += 1
+            if self._size > self.max_bytes:
+                self._evict(conn)
+        return True
+
+    def refresh(self, cached: CachedResponse, headers: Dict[str, str]) -> CachedResponse:
+        """Apply the headers of a 304 Not Modified to a stored response and renew its freshness"""
+        merged = dict(cached.headers)
+        merged.update({k: v for k, v in headers.items() if k not in ('content-length', 'content-encoding')})
+        now = time.time()
+        lifetime = freshness_lifetime(merged, now, self.heuristic_max) or 0
+
+        conn = self._connection()
+        with self._lock, conn:
+            conn.execute(
+                'UPDATE responses SET headers = ?, expires_at = ?, last_access = ? WHERE url = ?',
+                (json.dumps(merged), now + lifetime, now, cached.url)
+            )
+        cached.headers = merged
+        cached.expires_at = now + lifetime
+        return cached
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Drop least recently used entries until the cache is at 90% of its bound"""
+        target = self.max_bytes * 0.9
+        rows = conn.execute('SELECT url, size FROM responses ORDER BY last_access').fetchall()
+        for url, size in rows:
+            if self._size <= target:
+                break
+            conn.execute('DELETE FROM responses WHERE url = ?', (url,))
+            self._size -= size
+            self.counters['evictions'] += 1
+
+    # ------------------------------------------------------------------- stats
+
+    def stats(self) -> Dict:
+        """Counters since start, hit rate and current size"""
+        with self._lock:
+            stats = dict(self.counters)
+            size = self._size
+        lookups = stats['hits'] + stats['revalidated'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['revalidated']) / lookups, 3) if lookups else None
+        stats['fresh_hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else None
+        stats['size_bytes'] = size
+        stats['max_bytes'] = self.max_bytes
+        stats['entries'] = self._connection().execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+        return stats
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,170 @@
+import re
+import threading
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Media file extensions by kind
+MEDIA_PATTERNS = {
+    'documents': ['.pdf', '.doc', '.docx', '.ppt', '.pptx', '.xls', '.xlsx', '.txt', '.rtf', '.odt'],
+    'images': ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.svg', '.tiff', '.ico'],
+    'videos': ['.mp4', '.avi', '.mkv', '.mov', '.wmv', '.flv', '.webm', '.m4v', '.3gp'],
+    'audio': ['.mp3', '.wav', '.aac', '.ogg', '.m4a', '.flac', '.wma', '.opus']
+}
+
+# Link text that marks a document link without a document extension
+DOCUMENT_KEYWORDS = [
+    'download', 'pdf', 'document', 'report', 'whitepaper', 'manual',
+    'specification', 'datasheet', 'brochure', 'guide', 'handbook'
+]
+
+SOCIAL_PLATFORMS = {
+    'twitter.com': 'twitter',
+    'x.com': 'twitter',
+    'facebook.com': 'facebook',
+    'linkedin.com': 'linkedin',
+    'instagram.com': 'instagram',
+    'youtube.com': 'youtube',
+    'tiktok.com': 'tiktok'
+}
+
+# Video pages that are not files, after extensions and document keywords
+VIDEO_PAGES = [
+    ('youtube.com/watch', 'youtube_video'),
+    ('youtu.be/', 'youtube_video'),
+    ('vimeo.com/', 'vimeo_video')
+]
+
+EXTENSION, KEYWORD, VIDEO_PAGE, PLATFORM = range(4)
+SEPARATOR = '\x00'  # Between URL and link text in the scanned string; in no pattern
+
+Link = Union[str, Tuple[str, Optional[str]]]
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """Regex matching the longest of `words`, factored by common prefix so each position costs one character test"""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def pattern(node: Dict) -> str:
+        branches = [re.escape(char) + pattern(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        group = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{group})?' if '' in node else group
+
+    return pattern(trie)
+
+class LinkClassifier:
+    """Labels links by media type, document type and social platform in one scan.
+
+    All extensions, document keywords, video page patterns and platform
+    domains are compiled into one matcher that reports overlapping matches
+    too (youtube.com inside youtube.com/watch, the keyword pdf inside .pdf):
+    an Aho-Corasick automaton when pyahocorasick is installed, else a
+    prefix-factored regex inside a lookahead. The URL and link text are
+    scanned together; each match counts for the part it falls in.
+
+    classify() returns {'type', 'subtype', 'platform'}:
+      - an extension in the URL or link text: type is its MEDIA_PATTERNS
+        kind and subtype the extension ('documents', 'pdf'); documents come
+        first, then images, videos and audio, each in table order
+      - otherwise a document keyword in the link text, or in the URL when
+        no text is given: ('documents', 'document'). A keyword in the link
+        text also outranks image, video and audio extensions
+      - otherwise a YouTube watch or Vimeo page URL: ('videos', 'youtube_video')
+      - platform: the first SOCIAL_PLATFORMS domain in the URL
+    Anything else is labelled None.
+    """
+
+    def __init__(self, media_patterns: Dict[str, List[str]] = None, document_keywords: List[str] = None,
+                 social_platforms: Dict[str, str] = None):
+        media_patterns = media_patterns or MEDIA_PATTERNS
+        document_keywords = document_keywords or DOCUMENT_KEYWORDS
+        social_platforms = social_platforms or SOCIAL_PLATFORMS
+
+        # pattern -> [(role, rank, label)]; lower rank wins within a role
+        roles: Dict[str, List[Tuple[int, int, Tuple]]] = {}
+        rank = 0
+        for kind, extensions in media_patterns.items():
+            for ext in extensions:
+                roles.setdefault(ext.lower(), []).append((EXTENSION, rank, (kind, ext.replace('.', ''))))
+                rank += 1
+        for keyword in document_keywords:
+            roles.setdefault(keyword.lower(), []).append((KEYWORD, 0, ('documents', 'document')))
+        for rank, (pattern, subtype) in enumerate(VIDEO_PAGES):
+            roles.setdefault(pattern, []).append((VIDEO_PAGE, rank, ('videos', subtype)))
+        for rank, (domain, platform) in enumerate(social_platforms.items()):
+            roles.setdefault(domain.lower(), []).append((PLATFORM, rank, platform))
+
+        if ahocorasick is not None:
+            self.automaton = ahocorasick.Automaton()
+            for pattern, pattern_roles in roles.items():
+                self.automaton.add_word(pattern, (len(pattern) - 1, pattern_roles))
+            self.automaton.make_automaton()
+        else:
+            # The regex captures only the longest pattern at a position, so it also carries
+            # the roles of the patterns it starts with (.docx is an extension of its own, though)
+            self.roles = {pattern: [role for prefix in roles if pattern.startswith(prefix)
+                                    for role in roles[prefix] if prefix == pattern or role[0] != EXTENSION]
+                          for pattern in roles}
+            self.pattern = re.compile('(?=(' + trie_pattern(self.roles) + '))')
+
+    def matches(self, scanned: str) -> Iterator[Tuple[int, int, List]]:
+        """(start, length, roles) of every pattern occurrence, overlapping ones included"""
+        if ahocorasick is not None:
+            for end, (last, roles) in self.automaton.iter(scanned):
+                yield end - last, last + 1, roles
+        else:
+            for match in self.pattern.finditer(scanned):
+                pattern = match.group(1)
+                yield match.start(), len(pattern), self.roles[pattern]
+
+    def classify(self, url: str, text: Optional[str] = None) -> Dict[str, Optional[str]]:
+        """Type, subtype and platform of a link from its URL and (optional) link text"""
+        scanned = url.lower() if text is None else f"{url.lower()}{SEPARATOR}{text.lower()}"
+        keyword_from = 0 if text is None else len(url)
+
+        extensions = {}  # start -> (length, rank, label): .docx, not the .doc in it
+        keyword = video = platform = None
+        for start, length, roles in self.matches(scanned):
+            for role, rank, label in roles:
+                if role == EXTENSION:
+                    if start not in extensions or length > extensions[start][0]:
+                        extensions[start] = (length, rank, label)
+                elif role == KEYWORD:
+                    if start >= keyword_from:
+                        keyword = label
+                elif start < len(url):
+                    if role == VIDEO_PAGE:
+                        if video is None or rank < video[0]:
+                            video = (rank, label)
+                    elif platform is None or rank < platform[0]:
+                        platform = (rank, label)
+
+        extension = min(extensions.values(), key=lambda found: found[1])[2] if extensions else None
+        if keyword and text is not None and not (extension and extension[0] == 'documents'):
+            extension = None  # Link text that names a document outranks the URL's other media extensions
+        kind, subtype = extension or keyword or (video and video[1]) or (None, None)
+        return {'type': kind, 'subtype': subtype, 'platform': platform and platform[1]}
+
+    def classify_many(self, links: Iterable[Link]) -> List[Dict[str, Optional[str]]]:
+        """Labels for a list of URLs or (url, link text) pairs, in order"""
+        return [self.classify(link) if isinstance(link, str) else self.classify(*link) for link in links]
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+def get_link_classifier() -> LinkClassifier:
+    """The classifier for the default tables, compiled once per process"""
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            _classifier = LinkClassifier()
+        return _classifier
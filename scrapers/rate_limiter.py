@@ -0,0 +1,150 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlparse
+from config.settings import Config
+from utils.validators import ContentValidator
+
+class TokenBucket:
+    """Token bucket: `burst` requests at once, then one per `interval` seconds.
+
+    reserve() never blocks: it takes a token (going into debt when none is
+    left) and returns how long the caller has to wait for it, so blocking
+    threads and coroutines can share one bucket. With burst=1 this is plain
+    spacing of `interval` between requests.
+    """
+
+    def __init__(self, interval: float, burst: int = 1, jitter: float = 0.0):
+        self.interval = interval
+        self.burst = max(1, burst)
+        self.jitter = jitter  # Up to this many extra seconds per request, at random
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.hold_until = 0.0  # Set by backoff()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if self.interval > 0:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) / self.interval)
+        else:
+            self.tokens = float(self.burst)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Take a token; returns the seconds to wait before using it"""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            held = max(0.0, self.hold_until - now)
+            if self.interval <= 0:
+                return held
+            self.tokens -= 1
+            wait = held + (-self.tokens * self.interval if self.tokens < 0 else 0.0)
+            if self.jitter:
+                # Random extra spacing is charged to the next request
+                self.tokens -= random.uniform(0, self.jitter) / self.interval
+            return wait
+
+    def set_interval(self, interval: float):
+        with self.lock:
+            self._refill(time.monotonic())
+            self.interval = interval
+
+    def backoff(self, seconds: float):
+        """Push the next request back by at least `seconds` (e.g. after a 429)"""
+        with self.lock:
+            self.hold_until = max(self.hold_until, time.monotonic() + seconds)
+
+class HostRateLimiter:
+    """One token bucket per host, shared by every scraper in the process.
+
+    Hosts get `default_delay` seconds between requests, or the Crawl-delay
+    from their robots.txt when it is longer (capped at
+    FETCH_MAX_CRAWL_DELAY). Requests to different hosts never wait for each
+    other. Search engines are not limited per host but by a named key (see
+    Config.SEARCH_ENGINE_PACING), so all Google domains share one bucket.
+    """
+
+    def __init__(self, default_delay: float = None, burst: int = None, respect_crawl_delay: bool = None,
+                 validator: Optional[ContentValidator] = None):
+        self.default_delay = Config.FETCH_MIN_HOST_DELAY if default_delay is None else default_delay
+        self.burst = burst or Config.HOST_BURST
+        self.respect_crawl_delay = Config.FETCH_RESPECT_CRAWL_DELAY if respect_crawl_delay is None else respect_crawl_delay
+        self.validator = validator or ContentValidator()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._robots_checked = set()
+        self._lock = threading.Lock()
+
+        for key, (low, high) in Config.SEARCH_ENGINE_PACING.items():
+            self._buckets[key] = TokenBucket(low, 1, jitter=high - low)
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        """scheme://host[:port] of a URL; anything without '://' is taken as a named key"""
+        if '://' not in url:
+            return url
+        parsed = urlparse(url)
+        return f'{parsed.scheme}://{parsed.netloc}'.lower()
+
+    def bucket(self, url: str) -> TokenBucket:
+        key = self.host_key(url)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.default_delay, self.burst)
+            return bucket
+
+    def set_crawl_delay(self, url: str, crawl_delay: Optional[float]):
+        """Adopt a robots.txt Crawl-delay when it is longer than the default spacing"""
+        if crawl_delay:
+            self.bucket(url).set_interval(max(self.default_delay, min(float(crawl_delay), Config.FETCH_MAX_CRAWL_DELAY)))
+
+    def learn_robots(self, url: str):
+        """Read a host's robots.txt once (blocking, through ContentValidator) and adopt its Crawl-delay"""
+        key = self.host_key(url)
+        with self._lock:
+            if key in self._robots_checked or '://' not in key:
+                return
+            self._robots_checked.add(key)
+        self.set_crawl_delay(url, self.validator.crawl_delay(url, Config.USER_AGENT))
+
+    def mark_robots_checked(self, url: str):
+        """robots.txt for this host was read elsewhere (the async fetch engine)"""
+        with self._lock:
+            self._robots_checked.add(self.host_key(url))
+
+    def wait(self, url: str):
+        """Block until the host (or named key) may receive another request"""
+        if self.respect_crawl_delay:
+            self.learn_robots(url)
+        delay = self.bucket(url).reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def await_turn(self, url: str):
+        """Coroutine version of wait; robots.txt is the caller's job (it would block the loop)"""
+        delay = self.bucket(url).reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def backoff(self, url: str, seconds: float):
+        """Hold off the host (or named key) after it pushed back, without blocking the caller"""
+        self.bucket(url).backoff(seconds)
+
+    def delays(self) -> Dict[str, float]:
+        """Seconds between requests per host or key seen so far"""
+        with self._lock:
+            return {key: bucket.interval for key, bucket in self._buckets.items()}
+
+_limiter: Optional[HostRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter() -> HostRateLimiter:
+    """The process-wide limiter, so every scraper and the fetch engine share per-host budgets"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = HostRateLimiter()
+        return _limiter
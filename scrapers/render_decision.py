@@ -0,0 +1,51 @@
+import re
+from typing import Optional
+from config.settings import Config
+
+# Mount points and state blobs of client-side frameworks (React, Vue, Next, Nuxt, Angular, Gatsby, Svelte)
+FRAMEWORK_MARKERS = re.compile(
+    r'id=["\'](?:root|app|__next|__nuxt|___gatsby|svelte)["\']|<app-root\b|\bng-app\b|\bng-version=|'
+    r'data-reactroot|data-server-rendered|window\.__(?:NUXT|INITIAL_STATE|APOLLO_STATE|PRELOADED_STATE)__',
+    re.IGNORECASE
+)
+NOSCRIPT_WARNING = re.compile(
+    r'<noscript[^>]*>(?:(?!</noscript).)*?(?:enable|requires?|turn on|need)\w*\s+(?:your\s+)?javascript',
+    re.IGNORECASE | re.DOTALL
+)
+_INVISIBLE = re.compile(r'<(script|style|noscript|template|svg)\b.*?</\1\s*>|<!--.*?-->', re.IGNORECASE | re.DOTALL)
+_TAG = re.compile(r'<[^>]*>')
+_BODY = re.compile(r'<body\b[^>]*>(.*)', re.IGNORECASE | re.DOTALL)
+
+def visible_text_length(html: str) -> int:
+    """Characters of text a reader would see, without scripts, styles and markup"""
+    text = _TAG.sub(' ', _INVISIBLE.sub(' ', html))
+    return len(' '.join(text.split()))
+
+def shell_reason(html: str, content_type: str = 'text/html', min_text: int = None) -> Optional[str]:
+    """Why a statically fetched page looks like a JavaScript shell that needs a browser, or None.
+
+    Only HTML with scripts can be escalated (a browser adds nothing to a page
+    without them). It is a shell when its body has no visible text, or less
+    than RENDER_MIN_TEXT_CHARS together with a framework mount point, a
+    "please enable JavaScript" <noscript>, or scripts in the body.
+    """
+    if content_type and 'html' not in content_type.lower():
+        return None
+    if '<script' not in html.lower():
+        return None
+    min_text = Config.RENDER_MIN_TEXT_CHARS if min_text is None else min_text
+
+    body = _BODY.search(html)
+    body_html = body.group(1) if body else html
+    text = visible_text_length(body_html)
+    if text == 0:
+        return 'empty body'
+    if text >= min_text:
+        return None
+    if FRAMEWORK_MARKERS.search(html):
+        return 'framework root'
+    if NOSCRIPT_WARNING.search(html):
+        return 'noscript warning'
+    if '<script' in body_html.lower():
+        return 'little text'
+    return None
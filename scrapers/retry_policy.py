@@ -0,0 +1,144 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+import httpx
+from config.settings import Config
+
+class CircuitOpenError(Exception):
+    """A request that was not sent because the host's circuit breaker is open"""
+
+class RetryPolicy:
+    """Which failed fetches to retry, and how long to wait before each retry.
+
+    Retryable: FETCH_RETRY_STATUSES (429 and 5xx gateway errors) and
+    connection errors. Timeouts are not retried, since each one already
+    costs a full FETCH_TIMEOUT; they count against the host's circuit
+    breaker instead. Waits grow exponentially with full jitter and honour a
+    Retry-After header, capped at FETCH_RETRY_MAX_DELAY.
+    """
+
+    def __init__(self, attempts: int = None, base_delay: float = None, max_delay: float = None, statuses=None):
+        self.attempts = max(1, attempts or Config.FETCH_RETRY_ATTEMPTS)
+        self.base_delay = Config.FETCH_RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = Config.FETCH_RETRY_MAX_DELAY if max_delay is None else max_delay
+        self.statuses = set(statuses or Config.FETCH_RETRY_STATUSES)
+
+    def retryable(self, page) -> bool:
+        if page.error is not None:
+            return isinstance(page.error, httpx.TransportError) and not isinstance(page.error, httpx.TimeoutException)
+        return page.status_code in self.statuses and not page.challenged
+
+    def delay(self, attempt: int, page=None) -> float:
+        """Seconds before retry number `attempt` (1 for the first retry)"""
+        retry_after = _retry_after(page.headers.get('retry-after')) if page is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+def _retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+class CircuitBreaker:
+    """Per-host breaker: closed -> open after `threshold` consecutive failures -> half-open after `cooldown`.
+
+    While open, requests fail at once without touching the network. After
+    the cooldown one probe request is let through (half-open): success closes
+    the breaker, failure opens it again for another cooldown.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opened_count = 0
+        self.probing = False
+        self.lock = threading.Lock()
+
+    def _refresh(self, now: float):
+        if self.state == self.OPEN and now - self.opened_at >= self.cooldown:
+            self.state = self.HALF_OPEN
+            self.probing = False
+
+    def is_open(self) -> bool:
+        """Open, and not yet due for a probe (cheap check before queueing a request)"""
+        with self.lock:
+            self._refresh(time.monotonic())
+            return self.state == self.OPEN
+
+    def allow(self) -> bool:
+        """May a request go out now? In half-open state only the first caller (the probe) may"""
+        with self.lock:
+            self._refresh(time.monotonic())
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state, self.failures, self.probing = self.CLOSED, 0, False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                if self.state != self.OPEN:
+                    self.opened_count += 1
+                self.state, self.opened_at, self.probing = self.OPEN, time.monotonic(), False
+
+    def record_neutral(self):
+        """Neither success nor failure (e.g. 429): a half-open probe may be sent again"""
+        with self.lock:
+            self.probing = False
+
+    def retry_in(self) -> float:
+        with self.lock:
+            return max(0.0, self.opened_at + self.cooldown - time.monotonic()) if self.state == self.OPEN else 0.0
+
+    def snapshot(self) -> Dict:
+        retry_in = self.retry_in()
+        with self.lock:
+            return {'state': self.state, 'failures': self.failures, 'times_opened': self.opened_count,
+                    'retry_in': round(retry_in, 1)}
+
+class CircuitBreakers:
+    """Circuit breakers by host key"""
+
+    def __init__(self, threshold: int = None, cooldown: float = None):
+        self.threshold = threshold or Config.BREAKER_FAILURE_THRESHOLD
+        self.cooldown = Config.BREAKER_COOLDOWN if cooldown is None else cooldown
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(key)
+            if breaker is None:
+                breaker = self._breakers[key] = CircuitBreaker(self.threshold, self.cooldown)
+            return breaker
+
+    def states(self, only_tripped: bool = False) -> Dict[str, Dict]:
+        """Breaker state per host; only_tripped leaves out hosts that never failed"""
+        with self._lock:
+            breakers = list(self._breakers.items())
+        states = {key: breaker.snapshot() for key, breaker in breakers}
+        if only_tripped:
+            states = {k: v for k, v in states.items() if v['state'] != CircuitBreaker.CLOSED or v['failures'] or v['times_opened']}
+        return states
@@ -1,58 +1,56 @@
-from playwright.sync_api import sync_playwright
 import json
 import re
 from typing import Dict, List
 from config.settings import Config
+from .browser_pool import get_browser_pool
 
 class ReverseEngineer:
+    # Strings in page source that look like API endpoints
+    API_PATTERNS = [
+        r'["\']([^"\']*api[^"\']*)["\']',
+        r'["\']([^"\']*\.json[^"\']*)["\']',
+        r'["\']([^"\']*graphql[^"\']*)["\']',
+        r'["\']([^"\']*rest[^"\']*)["\']',
+        r'fetch\(["\']([^"\']+)["\']',
+    ]
+    
     def __init__(self):
-        self.playwright = None
-        self.browser = None
-        self.page = None
-        self.setup_browser()
+        # Shared warm browser contexts (launched on first use)
+        self.browser = get_browser_pool()
     
-    def setup_browser(self):
-        """Setup Playwright browser"""
-        self.playwright = sync_playwright().start()
-        self.browser = self.playwright.chromium.launch(
-            headless=True,
-            args=['--no-sandbox', '--disable-dev-shm-usage']
-        )
-        self.page = self.browser.new_page()
+    def extract_api_endpoints(self, page_source: str) -> List[str]:
+        """Potential API endpoints referenced in a page's source"""
+        endpoints = []
+        for pattern in self.API_PATTERNS:
+            matches = re.findall(pattern, page_source, re.IGNORECASE)
+            endpoints.extend(matches)
+        
+        return list(set(endpoints))
     
     def find_api_endpoints(self, url: str) -> List[str]:
         """Find potential API endpoints from page source"""
-        try:
-            self.page.goto(url)
-            page_source = self.page.content()
-            
-            # Same regex patterns as before
-            api_patterns = [
-                r'["\']([^"\']*api[^"\']*)["\']',
-                r'["\']([^"\']*\.json[^"\']*)["\']',
-                r'["\']([^"\']*graphql[^"\']*)["\']',
-                r'["\']([^"\']*rest[^"\']*)["\']',
-                r'fetch\(["\']([^"\']+)["\']',
-            ]
-            
-            endpoints = []
-            for pattern in api_patterns:
-                matches = re.findall(pattern, page_source, re.IGNORECASE)
-                endpoints.extend(matches)
-            
-            return list(set(endpoints))
+        return self.reverse_engineer_sites([url]).get(url, [])
+    
+    def reverse_engineer_sites(self, urls: List[str]) -> Dict[str, List[str]]:
+        """API endpoints per site; the sites are rendered concurrently.
         
-        except Exception as e:
-            print(f"Error finding API endpoints for {url}: {e}")
-            return []
+        Endpoints the page actually called (XHR/fetch requests seen on the
+        network while it loaded) come first, then strings in the page source
+        that look like endpoints. Images, fonts and stylesheets are not
+        downloaded (BROWSER_BLOCKED_RESOURCES).
+        """
+        results = {}
+        pages = self.browser.render_many(urls, wait_until='networkidle', capture_requests=True)
+        for url, page in zip(urls, pages):
+            if page.error is not None:
+                print(f"Error finding API endpoints for {url}: {page.error}")
+                results[url] = []
+                continue
+            called = [request['url'] for request in page.network_requests]
+            results[url] = list(dict.fromkeys(called + self.extract_api_endpoints(page.html)))
+            print(f"🔍 {url}: {len(set(called))} API calls observed, {len(results[url])} potential endpoints")
+        return results
     
     def cleanup(self):
-        """Clean up browser resources"""
-        if self.browser:
-            self.browser.close()
-        if self.playwright:
-            self.playwright.stop()
-    
-    def __del__(self):
-        """Ensure cleanup on deletion"""
-        self.cleanup()
+        """Nothing to release: the shared browser pool is closed at exit"""
+        pass
@@ -1,4 +1,5 @@
 from typing import List, Dict
+from .fetch_engine import FetchedPage
 from .google_dorker import GoogleDorker
 
 class TwitterDorker(GoogleDorker):
@@ -25,16 +26,16 @@ class TwitterDorker(GoogleDorker):
         
         return all_results
     
+    def build_document(self, url: str, page: FetchedPage) -> Dict:
+        """Page document plus Twitter-specific metadata"""
+        base_data = super().build_document(url, page)
+        base_data['social_platform'] = 'twitter'
+        base_data['tweet_id'] = self.extract_tweet_id(url)
+        return base_data
+    
     def extract_tweet_data(self, url: str) -> Dict:
         """Extract tweet-specific data"""
-        base_data = self.scrape_url(url)
-        
-        if base_data:
-            # Add Twitter-specific metadata
-            base_data['social_platform'] = 'twitter'
-            base_data['tweet_id'] = self.extract_tweet_id(url)
-            
-        return base_data
+        return self.scrape_url(url)
     
     def extract_tweet_id(self, url: str) -> str:
         """Extract tweet ID from URL"""
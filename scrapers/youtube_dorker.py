@@ -1,4 +1,5 @@
 from typing import List, Dict
+from .fetch_engine import FetchedPage
 from .google_dorker import GoogleDorker
 
 class YouTubeDorker(GoogleDorker):
@@ -25,16 +26,16 @@ class YouTubeDorker(GoogleDorker):
         
         return all_results
     
+    def build_document(self, url: str, page: FetchedPage) -> Dict:
+        """Page document plus YouTube-specific metadata"""
+        base_data = super().build_document(url, page)
+        base_data['social_platform'] = 'youtube'
+        base_data['video_id'] = self.extract_video_id(url)
+        return base_data
+    
     def extract_video_data(self, url: str) -> Dict:
         """Extract YouTube video-specific data"""
-        base_data = self.scrape_url(url)
-        
-        if base_data:
-            # Add YouTube-specific metadata
-            base_data['social_platform'] = 'youtube'
-            base_data['video_id'] = self.extract_video_id(url)
-            
-        return base_data
+        return self.scrape_url(url)
     
     def extract_video_id(self, url: str) -> str:
         """Extract video ID from YouTube URL"""
@@ -0,0 +1,833 @@
+import json
+import sqlite3
+import threading
+import pytest
+from pymongo.errors import BulkWriteError
+from config.settings import Config
+from database.blob_store import BLOB_REF, ContentBlobs, LocalBlobStore
+from database.compression import FieldCompressor, LazyFields, is_compressed
+from database.json_db import JSONDatabase, LATEST_ONLY
+from database.query import apply_projection, matches, sort_key
+from database.segment_store import SegmentStore
+from database.sqlite_store import SQLiteStore
+from utils.url_canonicalizer import canonicalize_url
+
+@pytest.fixture(autouse=True)
+def blob_dir(tmp_path, monkeypatch):
+    # Page bodies written by JSONDatabase go to a per-test directory
+    monkeypatch.setattr(Config, 'BLOB_DIR', str(tmp_path / 'blobs'))
+
+class TestSegmentStore:
+    def test_put_and_get(self, tmp_path):
+        store = SegmentStore(str(tmp_path / 'segments'))
+        store.put('a', {'id': 'a', 'title': 'First'})
+        store.put('b', {'id': 'b', 'title': 'Second'})
+
+        assert store.get('a')['title'] == 'First'
+        assert store.get('missing') is None
+        assert [doc['id'] for doc in store.scan()] == ['a', 'b']
+
+    def test_update_and_delete_survive_reopen(self, tmp_path):
+        directory = str(tmp_path / 'segments')
+        store = SegmentStore(directory)
+        store.put('a', {'id': 'a', 'title': 'Old'})
+        store.put('b', {'id': 'b', 'title': 'Gone'})
+        store.put('a', {'id': 'a', 'title': 'New'})
+        store.delete('b')
+        store.close()
+
+        reopened = SegmentStore(directory)
+        assert reopened.get('a')['title'] == 'New'
+        assert 'b' not in reopened
+        assert len(reopened) == 1
+
+    def test_compaction_keeps_latest_versions(self, tmp_path):
+        directory = str(tmp_path / 'segments')
+        store = SegmentStore(directory, max_segment_bytes=64, compaction_min_bytes=10 ** 9)
+        for i in range(20):
+            store.put(f'doc{i % 5}', {'id': f'doc{i % 5}', 'version': i})
+        store.compact()
+
+        assert store.stats()['dead_bytes'] == 0
+        assert store.get('doc4')['version'] == 19
+        store.close()
+
+        reopened = SegmentStore(directory)
+        assert sorted(d['version'] for d in reopened.scan()) == [15, 16, 17, 18, 19]
+
+    def test_legacy_file_migration(self, tmp_path):
+        legacy = tmp_path / 'scraped_content.json'
+        legacy.write_text(json.dumps([{'id': 'x', 'url': 'https://example.gov'}]))
+
+        store = SegmentStore(str(tmp_path / 'segments'), legacy_file=str(legacy))
+        assert store.get('x')['url'] == 'https://example.gov'
+        store.close()
+
+        # Migration only runs once
+        again = SegmentStore(str(tmp_path / 'segments'), legacy_file=str(legacy))
+        assert len(again) == 1
+
+class RecordingDatabase:
+    """Minimal stand-in for JSONDatabase that records insert_many batches"""
+    def __init__(self, fail=False, reject=()):
+        self.batches = []
+        self.fail = fail
+        self.reject = set(reject)  # Ids whose inserts fail in an unordered bulk write
+        self.counter = 0
+
+    def write_error(self, index, document):
+        return {'index': index, 'code': 2, 'errmsg': 'document too large', 'op': dict(document)}
+
+    def prepare_document(self, document):
+        self.counter += 1
+        document['id'] = f'doc{self.counter}'
+        return document
+
+    def insert_many(self, documents, prepared=False):
+        if self.fail:
+            raise IOError('storage offline')
+        rejected = [(i, d) for i, d in enumerate(documents) if d['id'] in self.reject]
+        self.batches.append([d for d in documents if d['id'] not in self.reject])
+        if rejected:
+            raise BulkWriteError({'writeErrors': [self.write_error(i, d) for i, d in rejected], 'writeConcernErrors': []})
+        return [d['id'] for d in documents]
+
+class TestWriteBehindBuffer:
+    def test_flushes_on_size_and_close(self):
+        from database.write_buffer import WriteBehindBuffer
+        db = RecordingDatabase()
+        buffer = WriteBehindBuffer(db, max_size=2, max_age=60)
+
+        ids = [buffer.add({'url': f'https://example.gov/{i}'}) for i in range(3)]
+        buffer.close()
+
+        assert ids == ['doc1', 'doc2', 'doc3']
+        assert sum(len(batch) for batch in db.batches) == 3
+
+    def test_flush_errors_go_to_callback(self):
+        from database.write_buffer import WriteBehindBuffer
+        errors = []
+        buffer = WriteBehindBuffer(RecordingDatabase(fail=True), max_size=10, max_age=60,
+                                   on_error=lambda e, docs: errors.append((str(e), len(docs))))
+        buffer.add({'url': 'https://example.gov'})
+        buffer.close()
+
+        assert errors == [('storage offline', 1)]
+
+    def test_partial_bulk_failure_reports_only_failed_documents(self):
+        from database.write_buffer import WriteBehindBuffer
+        errors = []
+        buffer = WriteBehindBuffer(RecordingDatabase(reject={'doc2'}), max_size=10, max_age=60,
+                                   on_error=lambda e, docs: errors.append([d['id'] for d in docs]))
+        for i in range(3):
+            buffer.add({'url': f'https://example.gov/{i}'})
+        buffer.close()
+
+        assert errors == [['doc2']]
+        assert buffer.stats['written'] == 2 and buffer.stats['failed'] == 1
+
+class RacingDatabase(RecordingDatabase):
+    """Rejected ids collide with what is stored: doc1 on id_unique (an earlier attempt wrote it),
+    the others on canonical_url_latest (another writer stored the page first)"""
+    def write_error(self, index, document):
+        index_name, key = ('id_unique', 'id') if document['id'] == 'doc1' else ('canonical_url_latest', 'canonical_url')
+        return {'index': index, 'code': 11000, 'keyPattern': {key: 1}, 'op': dict(document),
+                'errmsg': f'E11000 duplicate key error collection: web_content index: {index_name}'}
+
+class StallingDatabase(RecordingDatabase):
+    """RecordingDatabase whose writes wait on an event or fail a few times first"""
+    def __init__(self, transient_failures=0, error='database is locked'):
+        super().__init__()
+        self.transient_failures = transient_failures
+        self.error = error
+        self.released = threading.Event()
+        self.released.set()
+
+    def insert_many(self, documents, prepared=False):
+        self.released.wait()
+        if self.transient_failures:
+            self.transient_failures -= 1
+            raise sqlite3.OperationalError(self.error)
+        return super().insert_many(documents, prepared)
+
+class TestAsyncDocumentWriter:
+    def test_backpressure_when_queue_full(self):
+        from database.async_writer import AsyncDocumentWriter
+        db = StallingDatabase()
+        db.released.clear()
+        writer = AsyncDocumentWriter(db, queue_size=2, batch_size=1, max_age=0.01, concurrency=1)
+
+        for i in range(3):
+            writer.add({'url': f'https://example.gov/{i}'})
+        with pytest.raises(TimeoutError):
+            writer.add({'url': 'https://example.gov/overflow'}, timeout=0.2)
+        assert writer.stats['queue_depth'] == 2
+
+        db.released.set()
+        assert writer.flush(timeout=5)
+        writer.close()
+        assert sum(len(batch) for batch in db.batches) == 3
+
+    def test_transient_errors_are_retried(self):
+        from database.async_writer import AsyncDocumentWriter
+        errors = []
+        db = StallingDatabase(transient_failures=2)
+        writer = AsyncDocumentWriter(db, batch_size=10, max_age=0.01, max_retry_delay=0.01,
+                                     on_error=lambda e, docs: errors.append(e))
+        writer.add({'url': 'https://example.gov'})
+        assert writer.flush(timeout=5)
+
+        stats = writer.stats
+        writer.close()
+        assert errors == []
+        assert stats['written'] == 1 and stats['retries'] == 2
+        assert stats['write_latency_ms']['p50'] is not None
+
+    def test_other_sqlite_errors_are_not_retried(self):
+        from database.async_writer import AsyncDocumentWriter
+        errors = []
+        db = StallingDatabase(transient_failures=1, error='no such table: documents')
+        writer = AsyncDocumentWriter(db, batch_size=10, max_age=0.01, max_retry_delay=0.01,
+                                     on_error=lambda e, docs: errors.append((e, docs)))
+        writer.add({'url': 'https://example.gov'})
+        assert writer.flush(timeout=5)
+
+        stats = writer.stats
+        writer.close()
+        assert [str(e) for e, _ in errors] == ['no such table: documents']
+        assert [doc['url'] for doc in errors[0][1]] == ['https://example.gov']
+        assert stats['retries'] == 0 and stats['written'] == 0
+
+    def test_only_duplicate_ids_count_as_written(self):
+        from database.async_writer import AsyncDocumentWriter
+        errors = []
+        writer = AsyncDocumentWriter(RacingDatabase(reject={'doc1', 'doc2'}), batch_size=10, max_age=0.01,
+                                     on_error=lambda e, docs: errors.append([d['id'] for d in docs]))
+        for i in range(3):
+            writer.add({'url': f'https://example.gov/{i}'})
+        assert writer.flush(timeout=5)
+
+        stats = writer.stats
+        writer.close()
+        assert errors == [['doc2']]  # A new version lost to a concurrent writer is not silently dropped
+        assert stats['written'] == 2 and stats['failed'] == 1
+
+class TestPoolMetrics:
+    def test_checkout_wait_and_open_connections(self):
+        from database.connection import PoolMetrics
+        metrics = PoolMetrics()
+        metrics.connection_created(None)
+        metrics.connection_check_out_started(None)
+        metrics.connection_checked_out(None)
+        metrics.connection_check_out_started(None)
+        metrics.connection_check_out_failed(None)
+
+        stats = metrics.snapshot()
+        assert stats['checkouts'] == 1 and stats['checkout_failures'] == 1
+        assert stats['checked_out'] == 1 and stats['open_connections'] == 1
+        assert stats['checkout_wait_ms']['p50'] >= 0
+
+        metrics.connection_checked_in(None)
+        assert metrics.snapshot()['checked_out'] == 0
+
+class IndexedCollection:
+    """Just enough of a pymongo Collection for database/indexes.py"""
+    def __init__(self, existing=None, conflicts=(), ops=None):
+        self.indexes = {'_id_': {'key': [('_id', 1)]}, **(existing or {})}
+        self.conflicts = set(conflicts)  # Index names whose creation fails
+        self.ops = ops or {}
+        self.dropped, self.batches = [], []
+
+    def index_information(self):
+        return {name: dict(info) for name, info in self.indexes.items()}
+
+    def drop_index(self, name):
+        self.dropped.append(name)
+        del self.indexes[name]
+
+    def create_indexes(self, models):
+        from pymongo.errors import OperationFailure
+        names = [model.document['name'] for model in models]
+        self.batches.append(names)
+        if self.conflicts.intersection(names):
+            raise OperationFailure('Index with name: url already exists with different options', code=85)
+        for model in models:
+            self.indexes[model.document['name']] = {'key': list(model.document['key'].items())}
+        return names
+
+    def aggregate(self, pipeline):
+        return [{'name': name, 'accesses': {'ops': self.ops.get(name, 0)}} for name in self.indexes]
+
+    def find(self, query=None, projection=None):
+        collection = self
+
+        class Cursor:
+            def __init__(self):
+                self.sort_keys = None
+
+            def sort(self, keys):
+                self.sort_keys = keys
+                return self
+
+            def limit(self, count):
+                return self
+
+            def explain(self):
+                field = (self.sort_keys or list(query.items()))[0][0]
+                index = next((name for name, info in collection.indexes.items() if info['key'][0][0] == field), None)
+                scan = {'stage': 'IXSCAN', 'indexName': index} if index else {'stage': 'COLLSCAN'}
+                return {'queryPlanner': {'winningPlan': {'stage': 'FETCH', 'inputStage': scan}},
+                        'executionStats': {'totalDocsExamined': 1, 'totalKeysExamined': 1, 'nReturned': 1}}
+        return Cursor()
+
+class TestIndexes:
+    def test_missing_indexes_are_created_in_one_batch(self):
+        from database.indexes import INDEX_MANIFEST, ensure_indexes, find_missing_indexes
+        collection = IndexedCollection()
+        assert len(find_missing_indexes(collection)) == len(INDEX_MANIFEST)
+
+        assert ensure_indexes(collection) == [spec['name'] for spec in INDEX_MANIFEST]
+        assert len(collection.batches) == 1
+        assert find_missing_indexes(collection) == []
+
+    def test_retired_indexes_are_dropped(self):
+        from database.indexes import ensure_indexes
+        collection = IndexedCollection({'url_unique': {'key': [('url', 1)], 'unique': True}})
+        ensure_indexes(collection)
+        assert collection.dropped == ['url_unique']
+        assert 'url_unique' not in collection.indexes and 'url' in collection.indexes
+
+    def test_one_bad_index_does_not_block_the_others(self):
+        from database.indexes import INDEX_MANIFEST, ensure_indexes, find_missing_indexes
+        collection = IndexedCollection(conflicts={'url'})
+        created = ensure_indexes(collection)
+
+        assert created == [spec['name'] for spec in INDEX_MANIFEST if spec['name'] != 'url']
+        assert len(collection.batches) == 1 + len(INDEX_MANIFEST)  # The failed batch, then one at a time
+        assert find_missing_indexes(collection) == ['url']
+
+    def test_check_reports_missing_unused_and_scans(self, monkeypatch, capsys):
+        import sys
+        from types import SimpleNamespace
+        from database import indexes
+        collection = IndexedCollection(ops={'id_unique': 5})
+        indexes.ensure_indexes(collection)
+        del collection.indexes['domain']
+        monkeypatch.setattr(indexes, 'get_client', lambda url: {Config.DATABASE_NAME: SimpleNamespace(web_content=collection)})
+        monkeypatch.setattr(sys, 'argv', ['indexes.py', 'check'])
+
+        indexes.main()
+        missing, unused, plans = capsys.readouterr().out.split('\n\n', 2)
+        assert missing.splitlines()[1:] == ['  • domain']
+        assert '  • id_unique' not in unused and '  • url' in unused and '_id_' not in unused
+        assert 'documents by domain ⚠️ COLLSCAN' in plans
+        assert '/api/graph-data ✅' in plans and 'IXSCAN (crawl_date_recent)' in plans
+
+class TestQueryHelpers:
+    document = {
+        'id': 'a',
+        'domain': 'example.gov',
+        'search_metadata': {'data_type': 'traditional_scraping', 'keywords': ['navy', 'fleet']},
+        'metadata': {'trust_score': 8.0},
+        'content': {'text': 'long body'}
+    }
+
+    def test_matches_dotted_paths_and_operators(self):
+        assert matches(self.document, {'search_metadata.data_type': 'traditional_scraping'})
+        assert matches(self.document, {'search_metadata.keywords': 'navy'})
+        assert matches(self.document, {'metadata.trust_score': {'$gte': 7, '$lt': 9}})
+        assert not matches(self.document, {'metadata.language': {'$exists': True}})
+        assert not matches(self.document, {'domain': {'$in': ['other.gov']}})
+
+    def test_projection(self):
+        included = apply_projection(self.document, {'_id': 0, 'id': 1, 'metadata.trust_score': 1})
+        assert included == {'id': 'a', 'metadata': {'trust_score': 8.0}}
+
+        excluded = apply_projection(self.document, {'content.text': 0})
+        assert excluded['content'] == {}
+        assert self.document['content']['text'] == 'long body'
+
+    def test_sort_key_descending(self):
+        docs = [{'score': 1}, {'score': None}, {'score': 3}]
+        ordered = sorted(docs, key=sort_key([('score', -1)]))
+        assert [d['score'] for d in ordered] == [3, 1, None]
+
+class TestSQLiteStore:
+    def make_store(self, tmp_path):
+        store = SQLiteStore(str(tmp_path / 'content.db'))
+        store.put_many([
+            {
+                'id': str(i),
+                'url': f'https://site{i}.gov/page',
+                'domain': 'navy.gov' if i % 2 else 'other.gov',
+                'title': 'Fleet exercise report' if i == 3 else f'Page {i}',
+                'content': {'text': 'submarine operations' if i % 2 else 'weather'},
+                'metadata': {'crawl_date': f'2024-01-{i + 1:02d}', 'trust_score': float(i)}
+            }
+            for i in range(6)
+        ])
+        return store
+
+    def test_indexed_query_with_sort_and_limit(self, tmp_path):
+        store = self.make_store(tmp_path)
+        docs = store.find({'domain': 'navy.gov'}, sort=[('metadata.crawl_date', -1)], limit=2)
+        assert [d['id'] for d in docs] == ['5', '3']
+
+    def test_residual_query_and_projection(self, tmp_path):
+        store = self.make_store(tmp_path)
+        docs = list(store.find({'content.text': 'weather'}, projection={'id': 1}))
+        assert docs == [{'id': '0'}, {'id': '2'}, {'id': '4'}]
+
+    def test_full_text_search_ranks_title_matches_first(self, tmp_path):
+        store = self.make_store(tmp_path)
+        results = store.search(store.to_match_expression('fleet submarine'))
+        assert [d['id'] for d in results] == ['3']
+
+        results = store.search(store.to_match_expression('submarine'))
+        assert {d['id'] for d in results} == {'1', '3', '5'}
+
+class TestDocumentRecords:
+    def test_normalizes_scraper_media_shapes(self):
+        from database.models import SCHEMA_VERSION, normalize_document
+        document = normalize_document({
+            'url': 'https://example.gov/a', 'content': {'text': 'Hi', 'links': [{'url': 'https://x.gov', 'text': 'x'}]},
+            'media': {
+                'images': [{'url': 'https://example.gov/1.jpg', 'alt': 'ship'}, {'alt': 'no url'}],
+                'videos': ['https://example.gov/v.mp4'],
+                'documents': [{'url': 'https://example.gov/r.pdf', 'text': 'Report'}]
+            },
+            'content_analysis': {'summary': 'kept'}
+        })
+
+        assert document['domain'] == 'example.gov'
+        assert document['content']['links'] == ['https://x.gov']
+        assert document['media']['images'] == [{
+            'url': 'https://example.gov/1.jpg', 'alt_text': 'ship', 'title': '', 'caption': '',
+            'type': 'image', 'width': '', 'height': '', 'filename': ''
+        }]
+        assert document['media']['videos'][0]['url'] == 'https://example.gov/v.mp4'
+        assert document['media']['documents'][0]['filename'] == 'Report'
+        assert document['content_analysis'] == {'summary': 'kept'}
+        assert document['schema_version'] == SCHEMA_VERSION
+
+    def test_extracted_media_survives_normalization(self):
+        from database.models import normalize_document
+        from scrapers.html_extractor import HTMLExtractor
+        html = """<html><body><p>Fleet review</p>
+            <img src="/ship.jpg" alt="Ship" class="hero wide" loading="lazy" width="800" height="600">
+            <video src="/review.mp4" poster="/poster.jpg" controls></video>
+            <audio src="/anthem.mp3" autoplay></audio>
+            <a href="/report.pdf">Annual report (2.5 MB)</a>
+            <a href="https://twitter.com/navy">Follow us</a></body></html>"""
+        media = HTMLExtractor(backend='html.parser').extract(html, 'https://example.gov/news')['media']
+        media['documents'].append({'url': 'https://example.gov/plan.pdf', 'type': 'pdf', 'file_size': 12345,
+                                   'is_direct_download': True})
+
+        document = normalize_document({'url': 'https://example.gov/news', 'content': {'text': 'Fleet review'},
+                                       'media': json.loads(json.dumps(media))})
+
+        for name, items in media.items():
+            stored = document['media'][name]
+            assert len(stored) == len(items)
+            for item, normalized in zip(items, stored):
+                assert {k: normalized[k] for k in item} == item
+        assert document['media']['images'][0]['lazy_loading'] is True
+        assert document['media']['videos'][0]['poster'] == '/poster.jpg'
+        assert document['media']['documents'][-1]['file_size'] == 12345
+        assert document['media']['external_links'] == []
+
+    def test_invalid_documents_rejected(self):
+        from database.models import WebContentModel, WebContentRecord
+        with pytest.raises(ValueError):
+            WebContentRecord.from_document({'url': 'https://example.gov', 'metadata': {'trust_score': 'high'}})
+        assert not WebContentModel().validate_document({'domain': 'example.gov', 'content': {}})
+
+class TestUrlCanonicalizer:
+    def test_equivalent_spellings_match(self):
+        expected = canonicalize_url('https://example.gov/reports?b=2&a=1')
+        assert canonicalize_url('http://WWW.example.gov:80/reports/?a=1&b=2#top') == expected
+        assert canonicalize_url('https://example.gov//reports?utm_source=x&a=1&b=2&fbclid=y') == expected
+
+    def test_distinct_pages_stay_distinct(self):
+        assert canonicalize_url('https://example.gov/a?id=1') != canonicalize_url('https://example.gov/a?id=2')
+        assert canonicalize_url('https://example.gov:8443/a') != canonicalize_url('https://example.gov/a')
+
+class TestUpsertByUrl:
+    @pytest.fixture
+    def db(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(Config, 'SQLITE_PATH', str(tmp_path / 'content.db'))
+        database = JSONDatabase(backend='sqlite')
+        yield database
+        database.close()
+
+    def page(self, url, text):
+        return {'url': url, 'title': 'Page', 'content': {'text': text}}
+
+    def test_unchanged_page_is_not_duplicated(self, db):
+        first = db.insert_document(self.page('https://example.gov/a', 'Hello world'))
+        second = db.insert_document(self.page('http://www.example.gov/a/?utm_source=x', 'Hello   WORLD'))
+
+        assert first == second
+        assert db.sqlite.count() == 1
+        assert db.get_document(first)['seen_count'] == 2
+
+    def test_changed_page_creates_linked_version(self, db):
+        first = db.insert_document(self.page('https://example.gov/a', 'Old text'))
+        second = db.insert_document(self.page('https://example.gov/a', 'New text'))
+
+        old, new = db.get_document(first), db.get_document(second)
+        assert old['is_latest'] is False and old['superseded_by'] == second
+        assert new['version'] == 2 and new['previous_version_id'] == first
+        assert [doc['id'] for doc in db.find_documents(LATEST_ONLY)] == [second]
+
+    def test_duplicates_within_one_batch(self, db):
+        results = db.upsert_many([
+            db.prepare_document(self.page('https://example.gov/a', 'Same')),
+            db.prepare_document(self.page('https://example.gov/a', 'Same')),
+            db.prepare_document(self.page('https://example.gov/b', 'Other'))
+        ])
+
+        assert [status for _, status in results] == ['inserted', 'unchanged', 'inserted']
+        assert results[0][0] == results[1][0]
+        assert db.sqlite.count() == 2
+
+    def test_cache_hits_are_touched_only_when_stored_with_the_same_body(self, db):
+        stored = self.page('https://example.gov/a', 'Hello world')
+        stored['metadata'] = {'body_hash': 'v1'}
+        doc_id = db.insert_document(stored)
+        db.insert_document(self.page('https://example.gov/b', 'Stored without a body hash'))
+
+        touched = db.touch_unchanged({'http://www.example.gov/a/': 'v1', 'https://example.gov/b': 'v1',
+                                      'https://example.gov/c': 'v1'})
+        assert touched == {'http://www.example.gov/a/'}
+        assert db.get_document(doc_id)['seen_count'] == 2
+        assert db.touch_unchanged({'https://example.gov/a': 'v2'}) == set()
+
+class FakeCollection:
+    """Just enough of a pymongo Collection for version writes: unordered bulk_write, update_one and find"""
+    def __init__(self):
+        self.docs = {}
+        self.reject = set()  # Ids whose inserts fail
+
+    def bulk_write(self, operations, ordered=True):
+        from pymongo import InsertOne
+        errors = []
+        for index, operation in enumerate(operations):
+            if isinstance(operation, InsertOne):
+                doc = operation._doc
+                if doc['id'] in self.reject:
+                    errors.append({'index': index, 'code': 2, 'errmsg': 'document too large', 'op': doc})
+                else:
+                    self.docs[doc['id']] = json.loads(json.dumps(doc))
+                continue
+            self.update(operation._filter, operation._doc)
+        if errors:
+            raise BulkWriteError({'writeErrors': errors, 'writeConcernErrors': []})
+
+    def update(self, query, update, limit=None):
+        modified = 0
+        for doc in self.docs.values():
+            if modified == limit:
+                break
+            if matches(doc, query):
+                doc.update(update.get('$set', {}))
+                for field, step in update.get('$inc', {}).items():
+                    doc[field] = doc.get(field, 0) + step
+                for field in update.get('$unset', {}):
+                    doc.pop(field, None)
+                modified += 1
+        return modified
+
+    def update_one(self, query, update):
+        from types import SimpleNamespace
+        return SimpleNamespace(modified_count=self.update(query, update, limit=1))
+
+    def find(self, query=None, projection=None):
+        return [apply_projection(dict(doc), projection) for doc in self.docs.values() if matches(doc, query)]
+
+class TestMongoVersionWrites:
+    @pytest.fixture
+    def db(self):
+        database = JSONDatabase.__new__(JSONDatabase)
+        database.backend, database.use_mongodb = 'mongodb', True
+        database.collection = FakeCollection()
+        database.compressor = FieldCompressor(enabled=False)
+        database.blobs = None
+        database._upsert_lock = threading.Lock()
+        return database
+
+    def page(self, text):
+        return {'url': 'https://example.gov/a', 'title': 'Page', 'content': {'text': text}}
+
+    def test_failed_insert_leaves_the_old_version_latest(self, db):
+        old_id = db.insert_document(self.page('Old text'))
+        new = db.prepare_document(self.page('New text'))
+        db.collection.reject.add(new['id'])
+
+        with pytest.raises(BulkWriteError):
+            db.insert_many([new], prepared=True)
+        old = db.collection.docs[old_id]
+        assert old['is_latest'] is True and 'superseded_by' not in old
+
+    def test_retried_touch_counts_the_visit_once(self, db):
+        doc_id = db.insert_document(self.page('Same text'))
+        again = db.prepare_document(self.page('Same text'))
+        db.insert_many([again], prepared=True)
+        db.insert_many([again], prepared=True)  # The writer retrying a batch that had landed
+        assert db.collection.docs[doc_id]['seen_count'] == 2
+
+        db.insert_document(self.page('Same text'))  # A later crawl
+        assert db.collection.docs[doc_id]['seen_count'] == 3
+
+    def test_update_finds_the_document_by_id(self, db):
+        doc_id = db.insert_document(self.page('Old text'))
+        assert db.update_document(doc_id, {'title': 'Renamed'}) is True
+        assert db.collection.docs[doc_id]['title'] == 'Renamed'
+        assert db.update_document('missing', {'title': 'Renamed'}) is False
+
+class TestFieldCompressor:
+    def document(self):
+        return {
+            'id': 'a', 'title': 'Report',
+            'content': {'text': 'naval procurement report ' * 200, 'headings': ['Intro'], 'links': []}
+        }
+
+    def test_large_fields_compressed_small_fields_kept(self):
+        compressor = FieldCompressor(min_bytes=256, binary=False)
+        original = self.document()
+        stored = compressor.compress_document(original)
+
+        assert is_compressed(stored['content']['text'])
+        assert stored['content']['headings'] == ['Intro']
+        assert not is_compressed(original['content']['text'])
+        assert len(json.dumps(stored)) < len(json.dumps(original)) / 5
+
+    def test_decompression_is_lazy(self):
+        compressor = FieldCompressor(min_bytes=256, binary=False)
+        document = compressor.expand_document(json.loads(json.dumps(compressor.compress_document(self.document()))))
+
+        assert isinstance(document['content'], LazyFields)
+        assert is_compressed(dict.__getitem__(document['content'], 'text'))
+        assert document['content'].get('text').startswith('naval procurement')
+        assert json.loads(json.dumps(document)) == self.document()
+
+    def test_file_backend_round_trip(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(Config, 'SEGMENTS_DIR', str(tmp_path / 'segments'))
+        monkeypatch.setattr(Config, 'DATA_DIR', str(tmp_path))
+        db = JSONDatabase(backend='file')
+        doc_id = db.insert_document(self.document())
+
+        assert db.get_document(doc_id)['content']['text'] == self.document()['content']['text']
+        assert [doc['title'] for doc in db.find_documents({'title': 'Report'}, projection={'title': 1})] == ['Report']
+        db.close()
+
+class TestParquetExport:
+    def test_incremental_export_and_latest_versions(self, tmp_path, monkeypatch):
+        pytest.importorskip('pyarrow')
+        from database.parquet_export import ParquetExporter, load_metadata, summarize
+        monkeypatch.setattr(Config, 'SQLITE_PATH', str(tmp_path / 'content.db'))
+        db = JSONDatabase(backend='sqlite')
+        exporter = ParquetExporter(db, directory=str(tmp_path / 'parquet'))
+
+        def page(path, text, images):
+            return {'url': f'https://example.gov/{path}', 'domain': 'example.gov', 'content': {'text': text},
+                    'metadata': {'trust_score': 8.0, 'media_count': {'images': images}},
+                    'search_metadata': {'data_type': 'traditional_scraping', 'keywords': ['navy']}}
+
+        db.insert_many([page('a', 'one', 2), page('b', 'two', 3)])
+        assert exporter.export() == 2
+        assert exporter.export() == 0
+
+        db.insert_document(page('a', 'one, edited', 5))
+        assert exporter.export() == 1
+
+        frame = load_metadata(str(tmp_path / 'parquet'))
+        assert sorted(frame['images']) == [3, 5]
+        assert len(load_metadata(str(tmp_path / 'parquet'), latest_only=False)) == 3
+
+        summary = summarize(frame)
+        assert summary['media_totals']['images'] == 8
+        assert summary['top_domains'] == {'example.gov': 2}
+        db.close()
+
+    def test_late_writes_behind_the_mark_are_exported(self, tmp_path, monkeypatch):
+        pytest.importorskip('pyarrow')
+        from database.parquet_export import ParquetExporter, load_metadata
+        monkeypatch.setattr(Config, 'SQLITE_PATH', str(tmp_path / 'content.db'))
+        db = JSONDatabase(backend='sqlite')
+        exporter = ParquetExporter(db, directory=str(tmp_path / 'parquet'))
+
+        # Queued first (older crawl_date), written after a newer document was written and exported
+        late = db.prepare_document({'url': 'https://example.gov/late', 'content': {'text': 'late'}})
+        db.insert_document({'url': 'https://example.gov/early', 'content': {'text': 'early'}})
+        assert exporter.export() == 1
+        db.insert_many([late], prepared=True)
+        assert exporter.export() == 1
+
+        # A write stamped just before the previous run's mark is caught by the lag window
+        stale = db.prepare_document({'url': 'https://example.gov/stale', 'content': {'text': 'stale'}})
+        stale['inserted_at'] = '2000-01-01T00:00:00'
+        exporter.lag = 10 ** 10
+        db.insert_many([stale], prepared=True)
+        assert exporter.export() == 1 and exporter.export() == 0
+
+        assert sorted(load_metadata(str(tmp_path / 'parquet'))['url']) == [
+            'https://example.gov/early', 'https://example.gov/late', 'https://example.gov/stale']
+        db.close()
+
+class TestRetention:
+    def test_archive_keeps_rollups_and_restores(self, tmp_path, monkeypatch):
+        from datetime import datetime
+        from database.retention import RetentionManager, RollupStore
+        monkeypatch.setattr(Config, 'SQLITE_PATH', str(tmp_path / 'content.db'))
+        db = JSONDatabase(backend='sqlite')
+
+        def page(path, crawl_date, images):
+            document = db.prepare_document({
+                'url': f'https://example.gov/{path}', 'domain': 'example.gov', 'content': {'text': path},
+                'metadata': {'trust_score': 6.0, 'media_count': {'images': images}},
+                'search_metadata': {'data_type': 'traditional_scraping'}
+            })
+            document['metadata']['crawl_date'] = crawl_date
+            return document
+
+        pages = [
+            page('old-1', '2024-01-10T08:00:00', 2), page('old-2', '2024-01-10T09:00:00', 3),
+            page('feb', '2024-02-01T10:00:00', 1), page('recent', '2024-06-28T10:00:00', 4)
+        ]
+        for doc_id, document in zip(db.insert_many(pages, prepared=True), pages):
+            db.update_document(doc_id, {'last_seen': document['metadata']['crawl_date']})  # Not recrawled since
+
+        manager = RetentionManager(db, hot_days=30, archive_dir=str(tmp_path / 'archive'),
+                                   rollups=RollupStore(db, str(tmp_path / 'rollups.json')))
+        result = manager.archive(now=datetime(2024, 7, 1))
+
+        assert result['archived'] == 3
+        assert manager.archived_months() == ['2024-01', '2024-02']
+        assert [doc['url'] for doc in db.find_documents()] == ['https://example.gov/recent']
+
+        january = manager.rollups.query(until='2024-01-31')
+        assert len(january) == 1
+        assert (january[0]['documents'], january[0]['images'], january[0]['final']) == (2, 5, True)
+        assert january[0]['avg_trust'] == 6.0
+
+        # A second run finds nothing to archive and leaves the final roll-ups alone
+        assert manager.archive(now=datetime(2024, 7, 1))['archived'] == 0
+        assert manager.rollups.query(until='2024-01-31')[0]['documents'] == 2
+
+        assert manager.restore('2024-01') == 2
+        archived_id = next(manager.iter_archive('2024-01'))['id']
+        assert db.get_document(archived_id)['domain'] == 'example.gov'
+        db.close()
+
+    def test_pages_seen_again_stay_hot(self, tmp_path, monkeypatch):
+        from datetime import datetime
+        from database.retention import RetentionManager, RollupStore
+        monkeypatch.setattr(Config, 'SQLITE_PATH', str(tmp_path / 'content.db'))
+        db = JSONDatabase(backend='sqlite')
+
+        def crawl(path, text, crawl_date):
+            document = db.prepare_document({'url': f'https://example.gov/{path}', 'domain': 'example.gov',
+                                            'content': {'text': text}})
+            document['metadata']['crawl_date'] = crawl_date
+            return db.insert_many([document], prepared=True)[0]
+
+        # Crawled in January, recrawled unchanged ever since (last_seen is now)
+        steady = crawl('steady', 'same text', '2024-01-10T08:00:00')
+        old = crawl('edited', 'first text', '2024-01-10T09:00:00')
+        new = crawl('edited', 'second text', '2024-01-11T09:00:00')
+        db.update_document(new, {'last_seen': '2024-06-30T09:00:00'})
+
+        manager = RetentionManager(db, hot_days=30, archive_dir=str(tmp_path / 'archive'),
+                                   rollups=RollupStore(db, str(tmp_path / 'rollups.json')))
+        result = manager.archive(now=datetime(2024, 7, 1))
+
+        assert result['archived'] == 1
+        assert [doc['id'] for doc in manager.iter_archive('2024-01')] == [old]
+        assert sorted(doc['id'] for doc in db.find_documents()) == sorted([steady, new])
+        # The superseded version is not counted as another page of its day
+        assert {r['day']: r['documents'] for r in manager.rollups.query()} == {'2024-01-10': 1, '2024-01-11': 1}
+        db.close()
+
+class CountingBlobStore(LocalBlobStore):
+    def __init__(self, directory):
+        super().__init__(directory)
+        self.reads = 0
+
+    def get(self, key):
+        self.reads += 1
+        return super().get(key)
+
+class TestContentBlobs:
+    def page(self, path, text):
+        return {'url': f'https://example.gov/{path}', 'title': f'Report {path}', 'domain': 'example.gov',
+                'content': {'text': text, 'headings': ['Budget'], 'links': ['https://example.gov/x']},
+                'metadata': {'trust_score': 7.0}}
+
+    @pytest.mark.parametrize('backend', ['file', 'sqlite'])
+    def test_body_is_fetched_only_on_request(self, backend, tmp_path, monkeypatch):
+        monkeypatch.setattr(Config, 'SQLITE_PATH', str(tmp_path / 'content.db'))
+        monkeypatch.setattr(Config, 'SEGMENTS_DIR', str(tmp_path / 'segments'))
+        monkeypatch.setattr(Config, 'DATA_DIR', str(tmp_path))
+        db = JSONDatabase(backend=backend)
+        store = db.blobs.store = CountingBlobStore(str(tmp_path / 'blobs'))
+
+        text = 'naval procurement report ' * 100
+        doc_id = db.insert_document(self.page('a', text))
+        db.insert_document(self.page('mirror', text))
+
+        raw = db.sqlite.get(doc_id) if backend == 'sqlite' else db.store.get(doc_id)
+        assert 'content' not in raw and raw[BLOB_REF]['bytes'] > 2000
+        # Identical bodies share one blob
+        assert len(list(store.keys())) == 1
+
+        metadata = list(db.find_documents({}, projection={'_id': 0, 'title': 1, 'metadata.trust_score': 1}))
+        assert metadata[0] == {'title': 'Report a', 'metadata': {'trust_score': 7.0}}
+        assert store.reads == 0
+
+        texts = list(db.find_documents({'id': doc_id}, projection={'content.text': 1}))
+        assert texts[0]['content'] == {'text': text}
+        assert db.get_document(doc_id)['content']['headings'] == ['Budget']
+        assert [doc['id'] for doc in db.search_text('procurement')][:1] == [doc_id]
+        db.close()
+
+    def test_blobs_take_over_from_the_field_compressor(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(Config, 'SEGMENTS_DIR', str(tmp_path / 'segments'))
+        monkeypatch.setattr(Config, 'DATA_DIR', str(tmp_path))
+        monkeypatch.setattr(Config, 'BLOB_DIR', str(tmp_path / 'blobs'))
+        monkeypatch.setattr(Config, 'CONTENT_BLOBS', False)
+        db = JSONDatabase(backend='file')
+        old_id = db.insert_document(self.page('old', 'fleet exercise ' * 100))
+        assert is_compressed(db.store.get(old_id)['content']['text'])
+        db.close()
+
+        monkeypatch.setattr(Config, 'CONTENT_BLOBS', True)
+        db = JSONDatabase(backend='file')
+        large = db.insert_document(self.page('large', 'harbour trials ' * 100))
+        small = db.insert_document(self.page('small', 'Short note'))
+
+        assert BLOB_REF in db.store.get(large)
+        assert db.store.get(small)['content']['text'] == 'Short note'  # Under BLOB_MIN_BYTES: inline and plain
+        assert db.get_document(old_id)['content']['text'].startswith('fleet exercise')
+        db.close()
+
+    def test_migrate_and_collect_garbage(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(Config, 'SQLITE_PATH', str(tmp_path / 'content.db'))
+        monkeypatch.setattr(Config, 'CONTENT_BLOBS', False)
+        db = JSONDatabase(backend='sqlite')
+        doc_id = db.insert_document(self.page('a', 'coastal command exercise ' * 100))
+        db.close()
+
+        monkeypatch.setattr(Config, 'CONTENT_BLOBS', True)
+        db = JSONDatabase(backend='sqlite')
+        assert 'content' in db.sqlite.get(doc_id)
+        assert db.move_content_to_blobs() == 1
+        assert BLOB_REF in db.sqlite.get(doc_id)
+        assert db.get_document(doc_id)['content']['text'].startswith('coastal command')
+        assert [doc['id'] for doc in db.search_text('coastal')] == [doc_id]
+
+        orphan = ContentBlobs(db.blobs.store).split_document({'content': {'text': 'orphan ' * 200}})
+        assert db.collect_unreferenced_blobs(grace_seconds=0) == 1
+        assert db.blobs.store.get(orphan[BLOB_REF]['sha256']) is None
+        assert db.get_document(doc_id)['content']['headings'] == ['Budget']
+        db.close()
@@ -1,7 +1,31 @@
+import asyncio
+import os
+import threading
+import time
+import httpx
 import pytest
+from config.settings import Config
+from scrapers.browser_pool import BrowserPool, LeaseTimeout
+from scrapers.fetch_engine import FetchEngine
+from scrapers.frontier import CrawlFrontier, ScalableBloomFilter, SeenURLs
+from scrapers.html_extractor import HTMLExtractor
+from scrapers.html_parsers import available_backends, get_parser_backend
+from scrapers import link_classifier
+from scrapers.link_classifier import LinkClassifier, get_link_classifier
+from scrapers.http_cache import HTTPCache
+from scrapers.rate_limiter import HostRateLimiter, TokenBucket
+from scrapers.render_decision import shell_reason
+from scrapers.retry_policy import CircuitBreakers, CircuitOpenError, RetryPolicy
+from scrapers.reverse_engineer import ReverseEngineer
 from scrapers.google_scraper import GoogleScraper
 from scrapers.general_scraper import GeneralWebScraper
 from database.json_db import JSONDatabase
+from utils.validators import ContentValidator, RobotsFile, parse_crawl_delay
+
+@pytest.fixture(autouse=True)
+def http_cache_path(tmp_path, monkeypatch):
+    """Keep the fetch engine's HTTP cache out of data/"""
+    monkeypatch.setattr(Config, 'HTTP_CACHE_PATH', str(tmp_path / 'http_cache.db'))
 
 class TestScrapers:
     def test_google_scraper_init(self):
@@ -17,6 +41,749 @@ class TestScrapers:
         db = JSONDatabase(use_mongodb=False)
         assert db is not None
 
+class TestFetchEngine:
+    def slow_transport(self, robots=None, delay=0.2):
+        """Every page takes `delay` seconds; robots maps host -> robots.txt body"""
+        requests = []
+
+        async def handler(request):
+            requests.append((request.url.host, time.monotonic()))
+            if request.url.path == '/robots.txt':
+                body = (robots or {}).get(request.url.host)
+                return httpx.Response(200 if body else 404, text=body or '')
+            await asyncio.sleep(delay)
+            return httpx.Response(200, text=f'<html><title>{request.url.host}</title></html>',
+                                  headers={'content-type': 'text/html'})
+
+        return httpx.MockTransport(handler), requests
+
+    def test_hosts_are_fetched_concurrently(self):
+        transport, _ = self.slow_transport()
+        engine = FetchEngine(max_concurrency=8, per_host=2, min_host_delay=0, transport=transport)
+        urls = [f'https://site{i}.gov/page' for i in range(6)]
+
+        started = time.monotonic()
+        pages = engine.fetch_many(urls)
+        elapsed = time.monotonic() - started
+        engine.close()
+
+        assert [page.url for page in pages] == urls
+        assert all(page.ok and 'site' in page.text for page in pages)
+        assert elapsed < 0.2 * 3
+
+    def test_crawl_delay_spaces_requests_to_one_host(self):
+        transport, requests = self.slow_transport({'slow.gov': 'User-agent: *\nCrawl-delay: 0.3\n'}, delay=0)
+        engine = FetchEngine(per_host=4, min_host_delay=0, transport=transport)
+        engine.fetch_many(['https://slow.gov/a', 'https://slow.gov/b', 'https://fast.gov/a', 'https://fast.gov/b'])
+        engine.close()
+
+        slow = [at for host, at in requests[1:] if host == 'slow.gov']
+        fast = [at for host, at in requests[1:] if host == 'fast.gov']
+        assert engine.host_delays()['https://slow.gov'] == 0.3
+        assert slow[1] - slow[0] >= 0.29
+        assert abs(fast[1] - fast[0]) < 0.1
+
+    def test_errors_are_returned_per_page(self):
+        def handler(request):
+            if request.url.path == '/missing':
+                return httpx.Response(404)
+            raise httpx.ConnectError('refused', request=request)
+
+        engine = FetchEngine(min_host_delay=0, respect_crawl_delay=False, transport=httpx.MockTransport(handler))
+        missing, refused = engine.fetch_many(['https://a.gov/missing', 'https://b.gov/x'])
+        engine.close()
+
+        assert missing.status_code == 404 and not missing.ok
+        assert refused.error is not None
+        with pytest.raises(Exception):
+            refused.raise_for_status()
+
+    def test_large_bodies_are_cut_off_while_streaming(self, monkeypatch):
+        monkeypatch.setattr(Config, 'FETCH_MAX_HTML_BYTES', 100_000)
+        monkeypatch.setattr(Config, 'FETCH_MAX_BINARY_BYTES', 1000)
+        sent = []
+
+        async def chunks():
+            for _ in range(50):
+                sent.append(1)
+                yield b'x' * 64 * 1024
+
+        def handler(request):
+            content_type = 'application/pdf' if request.url.path.endswith('.pdf') else 'text/html'
+            return httpx.Response(200, content=chunks(),
+                                  headers={'content-type': content_type, 'content-length': str(50 * 64 * 1024)})
+
+        engine = FetchEngine(min_host_delay=0, respect_crawl_delay=False, transport=httpx.MockTransport(handler), cache=None)
+        pdf = engine.fetch('https://a.gov/report.pdf')
+        html = engine.fetch('https://b.gov/page')
+        engine.close()
+
+        assert len(pdf.content) == 1000 and pdf.truncated
+        assert pdf.size == 50 * 64 * 1024
+        assert len(html.content) == 100_000 and html.truncated
+        assert len(sent) < 10  # The rest of both bodies was never read
+
+class TestRetries:
+    def engine(self, handler, attempts=3, threshold=3, cooldown=60):
+        return FetchEngine(min_host_delay=0, respect_crawl_delay=False, transport=httpx.MockTransport(handler),
+                           cache=None, retry=RetryPolicy(attempts, base_delay=0.01),
+                           breakers=CircuitBreakers(threshold, cooldown))
+
+    def test_gateway_errors_are_retried(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(503 if len(calls) < 3 else 200, text='ok')
+
+        engine = self.engine(handler)
+        page = engine.fetch('https://a.gov/page')
+        engine.close()
+
+        assert page.ok and len(calls) == 3
+        assert engine.stats['retries'] == 2
+
+    def test_retry_after_is_honoured(self):
+        calls = []
+
+        def handler(request):
+            calls.append(time.monotonic())
+            return httpx.Response(429, headers={'retry-after': '0.3'}) if len(calls) == 1 else httpx.Response(200)
+
+        engine = self.engine(handler)
+        assert engine.fetch('https://a.gov/page').ok
+        engine.close()
+        assert calls[1] - calls[0] >= 0.29
+
+    def test_dead_host_fails_fast_until_a_probe_succeeds(self):
+        calls = []
+        alive = {'value': False}
+
+        def handler(request):
+            calls.append(request.url.host)
+            if request.url.host == 'dead.gov' and not alive['value']:
+                raise httpx.ConnectError('refused', request=request)
+            return httpx.Response(200)
+
+        engine = self.engine(handler, attempts=1, threshold=3, cooldown=0.3)
+        pages = engine.fetch_many([f'https://dead.gov/{i}' for i in range(3)])
+        assert all(page.error is not None for page in pages)
+        assert engine.breaker_states()['https://dead.gov']['state'] == 'open'
+
+        calls.clear()
+        pages = engine.fetch_many([f'https://dead.gov/{i}' for i in range(5)] + ['https://alive.gov/'])
+        assert all(isinstance(page.error, CircuitOpenError) for page in pages[:5]) and pages[5].ok
+        assert calls == ['alive.gov']
+
+        time.sleep(0.35)
+        alive['value'] = True
+        assert engine.fetch('https://dead.gov/probe').ok
+        assert engine.breaker_states(only_tripped=False)['https://dead.gov']['state'] == 'closed'
+        engine.close()
+
+    def test_timeouts_are_not_retried_but_trip_the_breaker(self):
+        calls = []
+
+        def handler(request):
+            calls.append(1)
+            raise httpx.ReadTimeout('slow', request=request)
+
+        engine = self.engine(handler, attempts=3, threshold=2)
+        engine.fetch_many(['https://slow.gov/a', 'https://slow.gov/b', 'https://slow.gov/c'])
+        engine.close()
+
+        assert len(calls) == 2
+        assert engine.stats['short_circuited'] == 1
+
+    def test_blocking_fallback_is_paced_and_short_circuited(self):
+        scraper = GeneralWebScraper()
+        scraper.fetcher = self.engine(lambda request: httpx.Response(200), threshold=2)
+        waited, sent = [], []
+        scraper.rate_limiter = HostRateLimiter(default_delay=0, respect_crawl_delay=False)
+        scraper.rate_limiter.wait = waited.append
+
+        def refused(url, headers):
+            sent.append(url)
+            raise ConnectionError('refused')
+
+        scraper.blocking_get = refused
+        pages = [scraper.fetch_blocking(f'https://dead.gov/{i}', {}) for i in range(4)]
+        scraper.fetcher.close()
+
+        assert sent == waited == ['https://dead.gov/0', 'https://dead.gov/1']
+        assert all(isinstance(page.error, CircuitOpenError) for page in pages[2:])
+        assert scraper.fetcher.breaker_states()['https://dead.gov']['state'] == 'open'
+
+class TestRateLimiter:
+    class Robots:
+        """Stands in for ContentValidator; records which hosts had robots.txt read"""
+        def __init__(self, delays):
+            self.delays, self.read = delays, []
+
+        def crawl_delay(self, url, user_agent='*'):
+            self.read.append(url)
+            return self.delays.get(HostRateLimiter.host_key(url))
+
+    def test_bucket_allows_a_burst_then_spaces_requests(self):
+        bucket = TokenBucket(0.5, burst=2)
+        waits = [bucket.reserve() for _ in range(4)]
+        assert waits[0] == waits[1] == 0
+        assert waits[2] == pytest.approx(0.5, abs=0.05)
+        assert waits[3] == pytest.approx(1.0, abs=0.05)
+
+    def test_hosts_do_not_wait_for_each_other(self):
+        limiter = HostRateLimiter(default_delay=0.2, burst=1, respect_crawl_delay=False)
+        started = time.monotonic()
+        for i in range(5):
+            limiter.wait(f'https://site{i}.gov/page')
+        assert time.monotonic() - started < 0.1
+
+        limiter.wait('https://site0.gov/other')
+        assert time.monotonic() - started >= 0.19
+
+    def test_crawl_delay_from_robots_is_read_once(self):
+        robots = self.Robots({'https://slow.gov': 30})
+        limiter = HostRateLimiter(default_delay=1.0, burst=1, validator=robots)
+        limiter.learn_robots('https://slow.gov/a')
+        limiter.learn_robots('https://slow.gov/b')
+        limiter.learn_robots('https://fast.gov/a')
+
+        assert robots.read == ['https://slow.gov/a', 'https://fast.gov/a']
+        assert limiter.bucket('https://slow.gov').interval == 30
+        assert limiter.bucket('https://fast.gov').interval == 1.0
+
+    def test_blocking_path_reads_fractional_crawl_delay(self):
+        validator = ContentValidator()
+        robots = RobotsFile()
+        robots.parse(['User-agent: *', 'Disallow: /private', 'Crawl-delay: 1.5'])
+        validator.robots_cache['https://slow.gov/robots.txt'] = robots
+
+        # Same answer as the fetch engine's parser; RobotFileParser alone drops non-integer delays
+        assert validator.crawl_delay('https://slow.gov/a') == parse_crawl_delay(robots.lines, '*') == 1.5
+        limiter = HostRateLimiter(default_delay=1.0, burst=1, validator=validator)
+        limiter.learn_robots('https://slow.gov/a')
+        assert limiter.bucket('https://slow.gov').interval == 1.5
+
+    def test_backoff_holds_the_next_request(self):
+        limiter = HostRateLimiter(default_delay=0, burst=1, respect_crawl_delay=False)
+        limiter.backoff('search', 0.5)
+        assert limiter.bucket('search').reserve() == pytest.approx(0.5, abs=0.05)
+
+class TestHTMLExtractor:
+    PAGE = """<html><head><title>Fleet review</title><meta name="description" content="Annual review">
+    <script>var tracking = 'not text';</script><style>p { color: red }</style></head><body>
+    <h1>Fleet review 2024</h1><div class="hero" style="background-image: url('/img/hero.jpg')"></div>
+    <figure><img src="/img/ship.jpg" width="640" height="360" alt="INS Vikrant"><figcaption>At sea</figcaption></figure>
+    <img src="/img/icon.png" width="16" height="16">
+    <ul><li><a href="/docs/review.pdf">Full report</a> (2.5 MB)</li></ul>
+    <iframe src="https://www.youtube.com/embed/abc123" title="Parade"></iframe>
+    <video controls><source src="/media/parade.mp4"></video>
+    <a href="https://twitter.com/indiannavy">Follow us</a></body></html>"""
+    MALFORMED = """<html><head><title>Notice</title></head><body><h1>Tender notice</h1>
+    <p>Bids close soon<p>Read the <a href=/docs/tender.pdf>full tender</a></b> (1.2 MB)
+    <ul><li>Lot one<li>Lot two <img src=/img/lot.jpg alt=Lot></ul>
+    <table><tr><td>Vessel<td><a href="https://twitter.com/navy">Follow</a></table>
+    <div><span>Unclosed block</div></i></body></html>"""
+
+    def test_one_pass_finds_content_and_media(self):
+        content = HTMLExtractor().extract(self.PAGE, 'https://navy.gov.in/news/1')
+        media = content['media']
+
+        assert content['title'] == 'Fleet review' and content['meta_description'] == 'Annual review'
+        assert content['headings'] == ['Fleet review 2024']
+        assert 'At sea' in content['text'] and 'tracking' not in content['text'] and 'color' not in content['text']
+        assert content['links'] == ['https://navy.gov.in/docs/review.pdf', 'https://twitter.com/indiannavy']
+        assert len(content['images']) == 2
+
+        assert [i['url'] for i in media['images']] == ['https://navy.gov.in/img/ship.jpg', 'https://navy.gov.in/img/hero.jpg']
+        assert media['images'][0]['caption'] == 'At sea'
+        assert media['documents'][0]['type'] == 'pdf' and media['documents'][0]['file_size'] == '2.5 MB'
+        assert [v['type'] for v in media['videos']] == ['video', 'youtube_embed']
+        assert media['social_media'][0]['platform'] == 'twitter'
+
+    def test_basic_extraction_skips_media(self):
+        content = HTMLExtractor().extract(self.PAGE, 'https://navy.gov.in/news/1', media=False)
+        assert 'media' not in content
+        assert content['anchors'][0] == {'url': 'https://navy.gov.in/docs/review.pdf', 'href': '/docs/review.pdf',
+                                         'text': 'Full report'}
+
+    @pytest.mark.parametrize('backend', available_backends())
+    @pytest.mark.parametrize('page', ['PAGE', 'MALFORMED'])
+    def test_backends_give_the_same_result(self, backend, page):
+        html = getattr(self, page)
+        reference = HTMLExtractor(backend='html.parser').extract(html, 'https://navy.gov.in/news/1')
+        assert HTMLExtractor(backend=backend).extract(html, 'https://navy.gov.in/news/1') == reference
+
+    def test_missing_backend_falls_back_to_installed_one(self):
+        assert get_parser_backend('no-such-parser').name == available_backends()[0]
+        assert available_backends()[-1] == 'html.parser'
+
+class TestLinkClassifier:
+    LINKS = [
+        ('https://navy.gov.in/docs/plan.docx', 'Fleet plan'),
+        ('https://navy.gov.in/gallery/ship.jpg', 'Download brochure'),
+        ('https://navy.gov.in/gallery/ship.jpg', ''),
+        'https://navy.gov.in/manuals/index',
+        'https://www.youtube.com/watch?v=abc123',
+        ('https://twitter.com/indiannavy', 'Follow us'),
+        ('https://navy.gov.in/about', 'About')
+    ]
+
+    def test_labels_links_in_one_scan(self):
+        labels = get_link_classifier().classify_many(self.LINKS)
+
+        assert [(label['type'], label['subtype']) for label in labels] == [
+            ('documents', 'docx'),  # Not the .doc inside it
+            ('documents', 'document'),  # Link text outranks the image extension
+            ('images', 'jpg'),
+            ('documents', 'document'),  # No link text: keywords are looked for in the URL
+            ('videos', 'youtube_video'),
+            (None, None),
+            (None, None)
+        ]
+        assert [label['platform'] for label in labels] == [None, None, None, None, 'youtube', 'twitter', None]
+
+    def test_regex_fallback_matches_aho_corasick(self, monkeypatch):
+        expected = LinkClassifier().classify_many(self.LINKS)
+        monkeypatch.setattr(link_classifier, 'ahocorasick', None)
+        assert LinkClassifier().classify_many(self.LINKS) == expected
+
+class TestHTTPCache:
+    def origin(self, headers):
+        """A host serving one page with the given response headers; answers If-None-Match with 304"""
+        requests = []
+
+        def handler(request):
+            requests.append(dict(request.headers))
+            if 'ETag' in headers and request.headers.get('if-none-match') == headers['ETag']:
+                return httpx.Response(304, headers=headers)
+            return httpx.Response(200, text='<html>report</html>', headers={'content-type': 'text/html', **headers})
+
+        return httpx.MockTransport(handler), requests
+
+    def engine(self, transport, tmp_path, **cache_options):
+        cache = HTTPCache(str(tmp_path / 'cache.db'), **cache_options)
+        return FetchEngine(min_host_delay=0, respect_crawl_delay=False, transport=transport, cache=cache)
+
+    def test_etag_is_revalidated_with_304(self, tmp_path):
+        transport, requests = self.origin({'ETag': '"v1"', 'Cache-Control': 'no-cache'})
+        engine = self.engine(transport, tmp_path)
+        first = engine.fetch('https://a.gov/report')
+        second = engine.fetch('https://a.gov/report')
+        stats = engine.cache_stats()
+        engine.close()
+
+        assert first.from_cache is None and not first.unchanged
+        assert second.from_cache == 'revalidated' and second.unchanged
+        assert second.text == '<html>report</html>' and second.status_code == 200
+        assert requests[1]['if-none-match'] == '"v1"'
+        assert stats['revalidated'] == 1 and stats['misses'] == 1 and stats['hit_rate'] == 0.5
+
+    def test_fresh_response_skips_the_network(self, tmp_path):
+        transport, requests = self.origin({'Cache-Control': 'max-age=600'})
+        engine = self.engine(transport, tmp_path)
+        engine.fetch('https://a.gov/report')
+        page = engine.fetch('https://a.gov/report')
+        engine.close()
+
+        assert page.from_cache == 'fresh' and page.ok
+        assert len(requests) == 1
+
+    def test_no_store_is_not_cached(self, tmp_path):
+        transport, requests = self.origin({'Cache-Control': 'no-store', 'ETag': '"v1"'})
+        engine = self.engine(transport, tmp_path)
+        engine.fetch('https://a.gov/report')
+        page = engine.fetch('https://a.gov/report')
+        engine.close()
+
+        assert page.from_cache is None
+        assert 'if-none-match' not in requests[1]
+
+    def test_cache_io_stays_off_the_event_loop(self, tmp_path, monkeypatch):
+        transport, _ = self.origin({'ETag': '"v1"', 'Cache-Control': 'no-cache'})
+        engine = self.engine(transport, tmp_path)
+        threads = []
+        for name in ('lookup', 'store', 'refresh'):
+            method = getattr(engine.cache, name)
+
+            def recorded(*args, method=method):
+                threads.append(threading.current_thread().name)
+                return method(*args)
+
+            monkeypatch.setattr(engine.cache, name, recorded)
+        engine.fetch('https://a.gov/report')
+        engine.fetch('https://a.gov/report')
+        engine.close()
+
+        assert len(threads) == 4  # lookup, store, lookup, refresh
+        assert all(name.startswith('fetch-cache') for name in threads)
+
+    def test_cache_hits_are_skipped_only_if_stored(self, tmp_path):
+        transport, _ = self.origin({'Cache-Control': 'max-age=600'})
+        scraper = GeneralWebScraper()
+        scraper.fetcher = self.engine(transport, tmp_path)
+        stored = {}
+
+        def touch_unchanged(body_hashes):
+            return {url for url, body_hash in body_hashes.items() if stored.get(url) == body_hash}
+
+        first = scraper.scrape_urls(['https://a.gov/report'], skip_unchanged=touch_unchanged)[0]
+        # Served from the cache, but the first document never reached the database
+        assert scraper.scrape_urls(['https://a.gov/report'], skip_unchanged=touch_unchanged)[0] == first
+
+        stored['https://a.gov/report'] = first['metadata']['body_hash']
+        assert scraper.scrape_urls(['https://a.gov/report'], skip_unchanged=touch_unchanged) == [None]
+        scraper.fetcher.close()
+
+    def test_least_recently_used_entries_are_evicted(self, tmp_path):
+        cache = HTTPCache(str(tmp_path / 'cache.db'), max_bytes=2500)
+        headers = {'cache-control': 'max-age=600'}
+        for name in ('a', 'b', 'c'):
+            # Incompressible bodies of roughly 1000 bytes each
+            cache.store(f'https://a.gov/{name}', f'https://a.gov/{name}', 200, headers, os.urandom(1000))
+            time.sleep(0.01)
+            if name == 'b':
+                cache.lookup('https://a.gov/a')  # 'a' is now more recent than 'b'
+
+        assert cache.lookup('https://a.gov/b') is None
+        assert cache.lookup('https://a.gov/a') is not None
+        assert cache.stats()['evictions'] == 1
+        assert cache.stats()['size_bytes'] <= 2500
+
+class TestCrawlFrontier:
+    def test_spellings_of_one_page_are_queued_once(self, tmp_path):
+        frontier = CrawlFrontier(str(tmp_path))
+        batch, new = frontier.select([
+            {'url': 'https://www.example.gov/report/?utm_source=x'},
+            {'url': 'http://example.gov/report#section-2'},
+            {'url': 'https://example.gov/other'}
+        ], 'duckduckgo', 5)
+        assert new == 2 and len(batch) == 2
+        assert frontier.select([{'url': 'https://example.gov/report'}], 'google_dork', 5) == ([], 0)
+
+    def test_batches_are_ordered_by_trust_and_source(self, tmp_path):
+        frontier = CrawlFrontier(str(tmp_path))
+        trusted = lambda url: '.gov' in url
+        batch, _ = frontier.select([{'url': 'https://blog.com/a'}, {'url': 'https://blog.com/b.pdf', 'is_document': True},
+                                    {'url': 'https://site.gov/a'}], 'duckduckgo', 2, trusted)
+
+        assert batch == [dict(url='https://site.gov/a', canonical_url='https://site.gov/a', source='duckduckgo'),
+                         dict(url='https://blog.com/b.pdf', is_document=True,
+                              canonical_url='https://blog.com/b.pdf', source='duckduckgo')]
+        assert CrawlFrontier.priority({'url': 'https://blog.com/a'}, 'google_dork') > \
+            CrawlFrontier.priority({'url': 'https://blog.com/a'}, 'duckduckgo')
+
+    def test_fetched_pages_are_skipped_across_runs_until_the_window_ends(self, tmp_path):
+        frontier = CrawlFrontier(str(tmp_path), freshness_hours=1)
+        frontier.select([{'url': 'https://site.gov/a'}, {'url': 'https://site.gov/b'}], 'duckduckgo', 2)
+        frontier.mark_fetched(['https://site.gov/a'])
+        frontier.release(['https://site.gov/b'])  # Failed: may be tried again
+
+        later_run = CrawlFrontier(str(tmp_path), freshness_hours=1)
+        batch, new = later_run.select([{'url': 'http://site.gov/a/'}, {'url': 'https://site.gov/b'}], 'google_dork', 5)
+        assert [r['url'] for r in batch] == ['https://site.gov/b'] and new == 1
+
+        later_run.seen.expire(now=time.time() + 2 * 3600)
+        assert later_run.select([{'url': 'https://site.gov/a'}], 'google_dork', 5)[1] == 1
+
+    def test_each_search_gets_only_its_own_results(self, tmp_path):
+        frontier = CrawlFrontier(str(tmp_path))
+        batch, new = frontier.select([{'url': f'https://site.gov/{i}'} for i in range(5)]
+                                     + [{'url': 'http://site.gov/0/'}], 'duckduckgo', 2)
+        assert (len(batch), new) == (2, 5)
+        frontier.release([r['url'] for r in batch])
+
+        # The three results not selected last time do not leak into the next search
+        batch, new = frontier.select([{'url': 'https://other.gov/x'}], 'google_dork', 5)
+        assert [r['url'] for r in batch] == ['https://other.gov/x']
+        assert frontier.select([{'url': 'https://site.gov/3'}], 'google_dork', 5)[1] == 1
+
+    def test_selected_results_are_held_until_released(self, tmp_path):
+        frontier = CrawlFrontier(str(tmp_path))
+        batch, _ = frontier.select([{'url': 'https://site.gov/a'}], 'duckduckgo', 5)
+        assert frontier.select([{'url': 'https://site.gov/a'}], 'google_dork', 5) == ([], 0)
+
+        frontier.release([r['url'] for r in batch])  # E.g. scraping raised
+        assert frontier.select([{'url': 'https://site.gov/a'}], 'google_dork', 5)[1] == 1
+
+    def test_generations_share_the_error_rate(self, tmp_path):
+        seen = SeenURLs(str(tmp_path), window=3600, error_rate=0.01, initial_capacity=100, generations=4)
+        seen.add('https://site.gov/a', now=0)
+        assert seen.filters[0].error_rate == pytest.approx(0.01 / 5)
+
+    def test_bloom_filter_grows_within_its_error_rate(self, tmp_path):
+        bloom = ScalableBloomFilter(1000, 0.01)
+        for i in range(10000):
+            bloom.add(f'https://site.gov/page/{i}')
+        assert len(bloom.slices) > 1
+        assert all(f'https://site.gov/page/{i}' in bloom for i in range(10000))
+        false_positives = sum(f'https://other.gov/{i}' in bloom for i in range(10000))
+        assert false_positives < 100
+
+        bloom.save(str(tmp_path / 'seen.bloom'))
+        assert 'https://site.gov/page/42' in ScalableBloomFilter.load(str(tmp_path / 'seen.bloom'))
+
+class TestBrowserPool:
+    class Browser:
+        """Stands in for Playwright's Browser: every page takes `delay` seconds, heap grows `heap_step` per page.
+
+        Each page load also requests `subresources` ((url, resource type) pairs) through the context's route
+        handler; the ones let through are recorded in `loaded`.
+        """
+        def __init__(self, delay=0.2, heap_step=0, subresources=()):
+            self.delay, self.heap_step, self.subresources = delay, heap_step, subresources
+            self.contexts, self.closed, self.loaded = [], [], []
+            self.crashed = self.shut = False
+
+        async def new_context(self, **options):
+            browser = self
+            if self.crashed:
+                raise RuntimeError('Target closed')
+
+            class Request:
+                method = 'GET'
+
+                def __init__(self, url, resource_type):
+                    self.url, self.resource_type = url, resource_type
+
+            class Route:
+                def __init__(self, request):
+                    self.request = request
+
+                async def abort(self):
+                    pass
+
+                async def continue_(self):
+                    browser.loaded.append(self.request.url)
+
+            class Page:
+                url, heap = 'about:blank', 0
+
+                def __init__(self, context):
+                    self.context, self.listeners = context, []
+
+                def on(self, event, listener):
+                    self.listeners.append(listener)
+
+                def remove_listener(self, event, listener):
+                    self.listeners.remove(listener)
+
+                async def goto(self, url, **options):
+                    await asyncio.sleep(browser.delay)
+                    for sub_url, resource_type in browser.subresources:
+                        request = Request(sub_url, resource_type)
+                        for listener in self.listeners:
+                            listener(request)
+                        if self.context.handler:
+                            await self.context.handler(Route(request))
+                        else:
+                            browser.loaded.append(sub_url)
+                    self.url, self.heap = url, self.heap + browser.heap_step
+                    return type('Response', (), {'status': 200})()
+
+                async def content(self):
+                    return f'<html><body>{self.url}</body></html>'
+
+                async def title(self):
+                    return self.url
+
+                async def evaluate(self, script):
+                    if browser.crashed:
+                        raise RuntimeError('Target closed')
+                    return self.heap
+
+                async def wait_for_load_state(self, state, **options):
+                    pass
+
+            class Context:
+                handler = None
+
+                async def route(self, pattern, handler):
+                    self.handler = handler
+
+                async def new_page(self):
+                    return Page(self)
+
+                async def close(self):
+                    browser.closed.append(self)
+
+            context = Context()
+            self.contexts.append(context)
+            return context
+
+        async def close(self):
+            self.shut = True
+
+    def pool(self, browser, **options):
+        async def launcher():
+            return browser
+        return BrowserPool(launcher=launcher, **options)
+
+    def test_pages_render_concurrently_across_contexts(self):
+        pool = self.pool(self.Browser(delay=0.2), size=4)
+        urls = [f'https://site{i}.gov/' for i in range(8)]
+        started = time.monotonic()
+        pages = pool.render_many(urls)
+        elapsed = time.monotonic() - started
+        pool.close()
+
+        assert [p.url for p in pages] == urls
+        assert all(p.ok and p.html.endswith(f'{p.url}</body></html>') for p in pages)
+        assert elapsed < 0.7  # Two rounds of four, not eight pages in a row
+
+    def test_renders_are_paced_per_host(self):
+        limiter = HostRateLimiter(default_delay=0.2, burst=1, respect_crawl_delay=False)
+        pool = self.pool(self.Browser(delay=0), size=4, limiter=limiter)
+        started = time.monotonic()
+        pool.render_many(['https://other.gov/'] + [f'https://site.gov/{i}' for i in range(3)])
+        elapsed = time.monotonic() - started
+        pool.close()
+
+        assert 0.4 <= elapsed < 0.7  # site.gov's three pages 0.2s apart, other.gov alongside
+
+    def test_contexts_are_recycled_after_max_pages(self):
+        browser = self.Browser(delay=0)
+        pool = self.pool(browser, size=1, max_pages=3)
+        pool.render_many([f'https://site.gov/{i}' for i in range(7)])
+        stats = pool.pool_stats()
+        pool.close()
+
+        assert stats['recycled'] == 2
+        assert len(browser.contexts) == 3 and len(browser.closed) == 2
+        assert stats['idle'] == 1
+
+    def test_contexts_are_recycled_when_their_heap_grows(self):
+        browser = self.Browser(delay=0, heap_step=100 * 1024 * 1024)
+        pool = self.pool(browser, size=1, max_pages=50, max_heap_mb=250)
+        pool.render_many([f'https://site.gov/{i}' for i in range(3)])
+        assert pool.pool_stats()['recycled'] == 1  # Third page crossed 250MB
+        pool.close()
+
+    def relaunching_pool(self, size):
+        """A pool whose launcher starts a new Browser each time, or fails while down['value'] is set"""
+        launched, down = [], {'value': False}
+
+        async def launcher():
+            if down['value']:
+                raise RuntimeError('cannot launch')
+            launched.append(self.Browser(delay=0.05))
+            return launched[-1]
+        return BrowserPool(launcher=launcher, size=size), launched, down
+
+    def test_crashed_browser_is_relaunched_once(self):
+        pool, launched, _ = self.relaunching_pool(size=3)
+        pool.render_many([f'https://site.gov/{i}' for i in range(3)])
+        launched[0].crashed = True
+        pages = pool.render_many([f'https://site.gov/{i}' for i in range(3, 9)])
+        stats = pool.pool_stats()
+        pool.close()
+
+        assert all(page.ok for page in pages)
+        assert len(launched) == 2 and launched[0].shut  # Three slots found it dead at once
+        assert stats['relaunches'] == 1 and stats['idle'] == 3
+
+    def test_lost_contexts_come_back_with_the_browser(self):
+        pool, launched, down = self.relaunching_pool(size=2)
+        pool.render_many(['https://site.gov/0', 'https://site.gov/1'])
+        launched[0].crashed, down['value'] = True, True
+        pool.render_many(['https://site.gov/2', 'https://site.gov/3'])
+        assert pool.pool_stats()['idle'] == 0
+
+        down['value'] = False
+        pages = pool.render_many(['https://site.gov/4', 'https://site.gov/5'])
+        stats = pool.pool_stats()
+        pool.close()
+
+        assert all(page.ok for page in pages)
+        assert len(launched) == 2 and stats['idle'] == 2
+
+    def test_lease_times_out_when_every_context_is_busy(self):
+        pool = self.pool(self.Browser(delay=0), size=1, lease_timeout=0.2)
+
+        async def hold(page):
+            return await pool.arender('https://site.gov/')  # Needs a second context
+        page = pool.with_page(hold)
+        pool.close()
+
+        assert isinstance(page.error, LeaseTimeout)
+        assert pool.stats['lease_timeouts'] == 1
+
+    def test_heavy_resources_are_blocked_and_api_calls_captured(self):
+        browser = self.Browser(delay=0, subresources=[
+            ('https://site.gov/logo.png', 'image'), ('https://fonts.example/a.woff2', 'font'),
+            ('https://site.gov/site.css', 'stylesheet'), ('https://site.gov/app.js', 'script'),
+            ('https://site.gov/api/v2/ships', 'fetch'), ('https://site.gov/graphql', 'xhr'),
+        ])
+        engineer = ReverseEngineer()
+        engineer.browser = self.pool(browser, size=1)
+        endpoints = engineer.reverse_engineer_sites(['https://site.gov/'])
+        stats = engineer.browser.pool_stats()
+        engineer.browser.close()
+
+        assert browser.loaded == ['https://site.gov/app.js', 'https://site.gov/api/v2/ships', 'https://site.gov/graphql']
+        assert stats['blocked'] == 3
+        assert endpoints['https://site.gov/'][:2] == ['https://site.gov/api/v2/ships', 'https://site.gov/graphql']
+
+class TestRenderDecision:
+    ARTICLE = '<html><head><script src="/analytics.js"></script></head><body><h1>Fleet review</h1><p>' + 'Ships sailed past. ' * 30 + '</p></body></html>'
+    REACT_SHELL = '<html><body><div id="root"></div><script src="/static/js/main.js"></script></body></html>'
+
+    def test_static_pages_are_not_escalated(self):
+        assert shell_reason(self.ARTICLE) is None
+        assert shell_reason('<html><body></body></html>') is None  # No scripts: a browser adds nothing
+        assert shell_reason(self.REACT_SHELL, content_type='application/json') is None
+
+    def test_javascript_shells_are_escalated(self):
+        assert shell_reason(self.REACT_SHELL) == 'empty body'
+        assert shell_reason('<body><div id="__next"><p>Loading...</p></div><script>boot()</script></body>') == 'framework root'
+        assert shell_reason('<body><noscript>Please enable JavaScript to view this site.</noscript>'
+                            '<p>Loading</p><script src="/app.js"></script></body>') == 'noscript warning'
+
+    def test_general_scraper_renders_only_shells(self):
+        async def handler(request):
+            if request.url.host == 'gone.gov':
+                return httpx.Response(404, text=self.REACT_SHELL, headers={'content-type': 'text/html'})
+            body = self.ARTICLE if request.url.host == 'static.gov' else self.REACT_SHELL
+            return httpx.Response(200, text=body, headers={'content-type': 'text/html'})
+
+        browser = TestBrowserPool.Browser(delay=0)
+        scraper = GeneralWebScraper()
+        scraper.fetcher = FetchEngine(min_host_delay=0, respect_crawl_delay=False, cache=None,
+                                      transport=httpx.MockTransport(handler))
+        scraper.browser = TestBrowserPool().pool(browser, size=2)
+
+        documents = scraper.scrape_urls(['https://static.gov/news', 'https://spa.gov/news', 'https://gone.gov/news'])
+        scraper.fetcher.close()
+        scraper.browser.close()
+
+        assert documents[2] == {}  # Failed fetches are not escalated to the browser
+        documents = documents[:2]
+        assert [d['metadata']['rendered_by'] for d in documents] == ['static', 'browser']
+        assert 'Fleet review' in documents[0]['content']['text']
+        assert documents[1]['content']['text'] == 'https://spa.gov/news'
+        assert len(browser.contexts) == 2 and scraper.browser.stats['rendered'] == 1
+
+    def test_static_first_can_be_turned_off(self, monkeypatch):
+        requests = []
+
+        def handler(request):
+            requests.append(request.url)
+            return httpx.Response(200, text=self.ARTICLE, headers={'content-type': 'text/html'})
+
+        monkeypatch.setattr(Config, 'RENDER_STATIC_FIRST', False)
+        browser = TestBrowserPool.Browser(delay=0)
+        scraper = GeneralWebScraper()
+        scraper.fetcher = FetchEngine(min_host_delay=0, respect_crawl_delay=False, cache=None,
+                                      transport=httpx.MockTransport(handler))
+        scraper.browser = TestBrowserPool().pool(browser, size=2)
+
+        documents = scraper.scrape_urls(['https://static.gov/news', 'https://spa.gov/news'])
+        scraper.fetcher.close()
+        scraper.browser.close()
+
+        assert [d['metadata']['rendered_by'] for d in documents] == ['browser', 'browser']
+        assert requests == []
+
 def run_tests():
     pytest.main(['-v', 'tests/'])
 
@@ -6,6 +6,7 @@ import hashlib
 from typing import Dict, List, Optional, Tuple
 import mimetypes
 from config.settings import Config
+from database.models import MediaRecord
 
 class MediaHandler:
     def __init__(self):
@@ -142,13 +143,15 @@ class MediaHandler:
         """Extract and optionally download media from scraped content"""
         media_items = []
         
+        media = MediaRecord.from_value(content.get('media'))
+        
         # Process images
-        for img in content.get('media', {}).get('images', []):
+        for img in media.images:
             media_item = {
                 'type': 'image',
-                'url': img.get('url', ''),
-                'alt_text': img.get('alt_text', ''),
-                'caption': img.get('caption', ''),
+                'url': img.url,
+                'alt_text': img.alt_text,
+                'caption': img.caption,
                 'local_path': None
             }
             
@@ -160,37 +163,22 @@ class MediaHandler:
             
             media_items.append(media_item)
         
-        # Process videos
-        for video_url in content.get('media', {}).get('videos', []):
-            media_item = {
-                'type': 'video',
-                'url': video_url,
-                'local_path': None
-            }
-            
-            if download:
-                download_result = self.download_media(video_url)
-                if download_result:
-                    media_item['local_path'] = download_result['local_path']
-                    media_item['analysis'] = download_result['analysis']
-            
-            media_items.append(media_item)
-        
-        # Process audio
-        for audio_url in content.get('media', {}).get('audio', []):
-            media_item = {
-                'type': 'audio',
-                'url': audio_url,
-                'local_path': None
-            }
-            
-            if download:
-                download_result = self.download_media(audio_url)
-                if download_result:
-                    media_item['local_path'] = download_result['local_path']
-                    media_item['analysis'] = download_result['analysis']
-            
-            media_items.append(media_item)
+        # Process videos and audio (dicts or bare URL strings, depending on the scraper)
+        for media_type, records in (('video', media.videos), ('audio', media.audio)):
+            for record in records:
+                media_item = {
+                    'type': media_type,
+                    'url': record.url,
+                    'local_path': None
+                }
+                
+                if download:
+                    download_result = self.download_media(record.url)
+                    if download_result:
+                        media_item['local_path'] = download_result['local_path']
+                        media_item['analysis'] = download_result['analysis']
+                
+                media_items.append(media_item)
         
         return media_items
     
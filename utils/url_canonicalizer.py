@@ -0,0 +1,56 @@
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that only track campaigns/clicks and never change the page
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'yclid', 'mc_cid', 'mc_eid', 'igshid',
+    '_ga', '_gl', 'ref', 'ref_src', 'ref_url', 'referrer', 'source', 'spm', 'si'
+}
+TRACKING_PREFIXES = ('utm_', 'pk_', 'hsa_', 'oly_')
+
+DEFAULT_PORTS = {'http': '80', 'https': '443'}
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so that trivially different spellings of a page compare equal.
+
+    - http and https are treated as the same page (canonical form uses https)
+    - host is lower-cased, a leading 'www.' and default ports are dropped
+    - fragments and tracking parameters (utm_*, fbclid, gclid, ...) are removed
+    - remaining query parameters are sorted
+    - trailing slashes are removed from non-root paths
+    """
+    if not url:
+        return url
+
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    if scheme not in ('http', 'https'):
+        return url
+
+    host = (parts.hostname or '').lower().rstrip('.')
+    if host.startswith('www.'):
+        host = host[4:]
+
+    try:
+        port = parts.port
+    except ValueError:
+        port = None
+    if port and str(port) not in DEFAULT_PORTS.values():
+        host = f'{host}:{port}'
+
+    path = parts.path or '/'
+    while '//' in path:
+        path = path.replace('//', '/')
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/') or '/'
+
+    params = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in TRACKING_PARAMS and not key.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query = urlencode(sorted(params), doseq=True)
+
+    return urlunsplit(('https', host, path, query, ''))
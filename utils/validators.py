@@ -5,6 +5,45 @@ import requests
 from urllib.robotparser import RobotFileParser
 import json
 
+def parse_crawl_delay(lines: List[str], user_agent: str) -> Optional[float]:
+    """Crawl-delay for user_agent from robots.txt lines, fractional seconds included (RobotFileParser drops them)"""
+    agent = user_agent.lower()
+    delays = {}
+    group, in_rules = [], False
+    for line in lines:
+        line = line.split('#', 1)[0].strip()
+        if ':' not in line:
+            continue
+        field, value = (part.strip() for part in line.split(':', 1))
+        field = field.lower()
+        if field == 'user-agent':
+            if in_rules:
+                group, in_rules = [], False
+            group.append(value.lower())
+            continue
+        in_rules = True
+        if field == 'crawl-delay':
+            try:
+                delay = float(value)
+            except ValueError:
+                continue
+            for name in group:
+                delays.setdefault(name, delay)
+
+    for name, delay in delays.items():
+        if name != '*' and name in agent:
+            return delay
+    return delays.get('*')
+
+class RobotsFile(RobotFileParser):
+    """RobotFileParser that keeps the lines it parsed, for parse_crawl_delay"""
+
+    lines: List[str] = []
+
+    def parse(self, lines):
+        self.lines = list(lines)
+        super().parse(self.lines)
+
 class ContentValidator:
     def __init__(self):
         self.robots_cache = {}
@@ -49,7 +88,7 @@ class ContentValidator:
             if robots_url in self.robots_cache:
                 rp = self.robots_cache[robots_url]
             else:
-                rp = RobotFileParser()
+                rp = RobotsFile()
                 rp.set_url(robots_url)
                 try:
                     rp.read()
@@ -64,6 +103,16 @@ class ContentValidator:
             # If there's any error, assume allowed
             return True
     
+    def crawl_delay(self, url: str, user_agent: str = '*') -> Optional[float]:
+        """Crawl-delay robots.txt sets for user_agent (None if unset or unreadable)"""
+        self.check_robots_txt(url, user_agent)  # Reads and caches robots.txt
+        parsed_url = urllib.parse.urlparse(url)
+        rp = self.robots_cache.get(f"{parsed_url.scheme}://{parsed_url.netloc}/robots.txt")
+        if rp is None:
+            return None
+        # Same parser as the fetch engine, so both honour a Crawl-delay of 0.5
+        return parse_crawl_delay(rp.lines, user_agent)
+    
     def validate_content_quality(self, content: Dict) -> Dict[str, any]:
         """Validate content quality and return score"""
         quality_score = {
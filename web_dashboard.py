@@ -3,13 +3,21 @@ from flask_socketio import SocketIO, emit, join_room, leave_room
 import json
 import threading
 import time
-from datetime import datetime
-from database.json_db import JSONDatabase
+from datetime import datetime, timedelta
+from database.json_db import JSONDatabase, LATEST_ONLY, RECENT_FIRST
+from database.async_writer import AsyncDocumentWriter
+from database.connection import pool_stats
+from database.models import canonical_media
+from database.parquet_export import ParquetExporter, load_metadata, summarize
+from database.retention import RetentionManager
+from scrapers.fetch_engine import get_fetch_engine
+from scrapers.frontier import CrawlFrontier
 from scrapers.google_dorker import GoogleDorker
 from scrapers.duckduckgo_scraper import DuckDuckGoScraper
 from scrapers.twitter_dorker import TwitterDorker
 from scrapers.youtube_dorker import YouTubeDorker
 from osint_engine.reconnaissance import OSINTReconEngine  # New import
+from config.settings import Config
 import uuid
 import io
 import base64
@@ -24,6 +32,32 @@ app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'
 socketio = SocketIO(app, cors_allowed_origins="*")
 
+# Fields each API endpoint reads; everything else (content.text, links, ...) stays in the database
+GRAPH_PROJECTION = {
+    '_id': 0, 'id': 1, 'domain': 1, 'title': 1, 'url': 1, 'keywords': 1,
+    'search_metadata.keywords': 1, 'search_metadata.data_type': 1,
+    'metadata.trust_score': 1, 'metadata.media_count': 1
+}
+MEDIA_PROJECTION = {
+    '_id': 0, 'media': 1, 'url': 1, 'title': 1, 'domain': 1, 'inserted_at': 1,
+    'search_metadata.search_engine': 1, 'schema_version': 1
+}
+STATS_PROJECTION = {
+    '_id': 0, 'domain': 1, 'search_metadata.data_type': 1, 'metadata.media_count': 1
+}
+OSINT_PROJECTION = {
+    '_id': 0, 'source': 1, 'title': 1, 'content_preview': 1, 'links_count': 1,
+    'media_count': 1, 'documents_count': 1, 'timestamp': 1
+}
+
+def recent_documents(query: dict, projection: dict, count: int) -> list:
+    """Last `count` documents matching query, oldest first, reading only those documents"""
+    docs = list(enhanced_system.db.find_documents(
+        query, projection=projection, sort=RECENT_FIRST, limit=count
+    ))
+    docs.reverse()
+    return docs
+
 # Global variables for real-time tracking
 active_searches = {}
 scraping_stats = {
@@ -34,18 +68,29 @@ scraping_stats = {
     'domains_scraped': set(),
     'keywords_searched': [],
     'osint_intelligence': 0,
-    'subdomains_discovered': 0
+    'subdomains_discovered': 0,
+    'unchanged_pages': 0  # Skipped: HTTP cache hit or 304 for a page stored with the same body
 }
 
 class AdvancedScrapingSystem:
     def __init__(self):
-        self.db = JSONDatabase(use_mongodb=True)  # Force MongoDB usage
+        self.db = JSONDatabase(backend=Config.DATABASE_BACKEND)  # MongoDB unless DATABASE_BACKEND says otherwise
+        # Scraping threads hand documents to a bounded async writer instead of blocking on the database
+        self.writer = AsyncDocumentWriter(self.db, on_error=self._report_write_error)
+        self.exporter = ParquetExporter(self.db)
+        self.exporter.start_background()  # /api/analytics reads the dataset, it never exports
+        # Documents older than HOT_RETENTION_DAYS move to the cold archive once a day
+        self.retention = RetentionManager(self.db, exporter=self.exporter)
+        if self.retention.hot_days > 0:
+            self.retention.start_background()
         self.scrapers = {
             'google_dork': GoogleDorker(),
             'duckduckgo': DuckDuckGoScraper(),
             'twitter_dork': TwitterDorker(),
             'youtube_dork': YouTubeDorker()
         }
+        # Shared by all engines and searches: pages fetched recently are not fetched again
+        self.frontier = CrawlFrontier()
         self.osint_engine = OSINTReconEngine()  # New OSINT engine
         self.active_searches = {}
     
@@ -142,25 +187,35 @@ class AdvancedScrapingSystem:
                     else:
                         search_results = self.scrapers[engine].search(keywords)
                     
-                    # Process each result
-                    for i, result in enumerate(search_results[:15]):
+                    # Skip pages any engine fetched within the freshness window; best results first
+                    results_to_scrape, _ = self.frontier.select(
+                        search_results, engine, Config.FRONTIER_BATCH_SIZE, self.scrapers[engine].is_trusted_domain
+                    )
+                    for i, result in enumerate(results_to_scrape):
                         socketio.emit('scraping_start', {
                             'search_id': search_id,
                             'url': result['url'],
                             'title': result.get('title', 'Unknown'),
                             'engine': engine,
-                            'progress': (i + 1) / len(search_results[:15]) * 100
+                            'progress': (i + 1) / len(results_to_scrape) * 100
                         })
-                        
-                        # Scrape the content
-                        if engine in ['twitter_dork']:
-                            scraped_content = self.scrapers[engine].extract_tweet_data(result['url'])
-                        elif engine in ['youtube_dork']:
-                            scraped_content = self.scrapers[engine].extract_video_data(result['url'])
-                        else:
-                            scraped_content = self.scrapers[engine].scrape_url(result['url'])
-                        
-                        if scraped_content:
+                    
+                    # Scrape the whole batch concurrently (per-host limits apply in the fetch engine)
+                    # Pages stored unchanged by an earlier sweep (HTTP cache hit or 304) are touched and come back as None
+                    try:
+                        scraped_pages = self.scrapers[engine].scrape_urls(
+                            [result['url'] for result in results_to_scrape], skip_unchanged=self.db.touch_unchanged
+                        )
+                        self.frontier.mark_fetched([r['url'] for r, page in zip(results_to_scrape, scraped_pages) if page != {}])
+                    finally:
+                        # Failed pages (all of them if scraping raised) may be found and tried again
+                        self.frontier.release([r['url'] for r in results_to_scrape])
+                    
+                    # Process each result
+                    for result, scraped_content in zip(results_to_scrape, scraped_pages):
+                        if scraped_content is None:
+                            scraping_stats['unchanged_pages'] += 1
+                        elif scraped_content:
                             # Add search metadata
                             scraped_content['search_metadata'] = {
                                 'keywords': keywords,
@@ -169,8 +224,9 @@ class AdvancedScrapingSystem:
                                 'data_type': 'traditional_scraping'
                             }
                             
-                            # Store in MongoDB
-                            doc_id = self.db.insert_document(scraped_content)
+                            # Queue for MongoDB; blocks only while the write queue is full. An unchanged
+                            # page keeps its stored version's id, so clients should key on the URL
+                            doc_id = self.writer.add(scraped_content)
                             all_results.append(scraped_content)
                             
                             # Update statistics
@@ -189,8 +245,6 @@ class AdvancedScrapingSystem:
                                 'media_count': media_count,
                                 'data_type': 'traditional'
                             })
-                        
-                        time.sleep(2)
                 
                 except Exception as e:
                     socketio.emit('search_engine_error', {
@@ -199,8 +253,20 @@ class AdvancedScrapingSystem:
                         'error': str(e)
                     })
         
+        # Results of this phase should be visible to the dashboard once it ends
+        self.writer.flush()
+        
         return all_results
     
+    def _report_write_error(self, error: Exception, documents: list):
+        """Report a failed background flush to connected clients"""
+        print(f"❌ Failed to store {len(documents)} documents: {error}")
+        socketio.emit('storage_error', {
+            'error': str(error),
+            'documents': len(documents),
+            'search_ids': list({d.get('search_metadata', {}).get('search_id') for d in documents})
+        })
+    
     def _execute_osint_reconnaissance(self, search_id: str, keywords: list):
         """Execute OSINT reconnaissance"""
         osint_results = []
@@ -224,8 +290,8 @@ class AdvancedScrapingSystem:
                     'data_type': 'osint_intelligence'
                 }
                 
-                # Store in MongoDB
-                doc_id = self.db.insert_document(intelligence_item)
+                # Queue for MongoDB
+                doc_id = self.writer.add(intelligence_item)
                 osint_results.append(intelligence_item)
                 
                 # Update statistics
@@ -256,7 +322,8 @@ class AdvancedScrapingSystem:
                 'discovery_timestamp': time.time()
             }
             
-            self.db.insert_document(subdomain_doc)
+            self.writer.add(subdomain_doc)
+            self.writer.flush()
             
             socketio.emit('osint_complete', {
                 'search_id': search_id,
@@ -373,8 +440,8 @@ def neural_graph():
 @app.route('/api/graph-data')
 def get_graph_data():
     """Get data for neural network graph (original functionality)"""
-    # Query database for recent documents (keep original logic)
-    recent_docs = enhanced_system.db.find_documents({})
+    # Query database for the 50 most recent documents, graph fields only
+    recent_docs = recent_documents(LATEST_ONLY, GRAPH_PROJECTION, 50)
     
     nodes = []
     links = []
@@ -383,7 +450,7 @@ def get_graph_data():
     domain_nodes = {}
     keyword_nodes = {}
     
-    for doc in recent_docs[-50:]:  # Last 50 documents
+    for doc in recent_docs:  # Last 50 documents
         doc_id = doc.get('id', str(uuid.uuid4()))
         domain = doc.get('domain', 'unknown')
         keywords = doc.get('keywords', []) or doc.get('search_metadata', {}).get('keywords', [])
@@ -449,8 +516,8 @@ def media_gallery():
 def get_media_data():
     """Get media data for gallery"""
     try:
-        # Query database for documents with media
-        recent_docs = enhanced_system.db.find_documents({})
+        # Stream documents with media fields only
+        recent_docs = enhanced_system.db.find_documents(LATEST_ONLY, projection=MEDIA_PROJECTION, batch_size=500)
         
         media_items = {
             'images': [],
@@ -460,103 +527,37 @@ def get_media_data():
         }
         
         for doc in recent_docs:
-            # Extract media from traditional scraping results
-            media = doc.get('media', {})
+            # Documents are stored in canonical form (database/models.py); no per-item shape checks
+            media = canonical_media(doc)
+            source = {
+                'source_url': doc.get('url', ''),
+                'source_title': doc.get('title', 'Unknown'),
+                'domain': doc.get('domain', 'unknown'),
+                'discovery_date': doc.get('inserted_at', ''),
+                'search_engine': doc.get('search_metadata', {}).get('search_engine', 'unknown')
+            }
             
-            # Process images
-            for img in media.get('images', []):
+            for img in media['images']:
                 media_items['images'].append({
-                    'url': img.get('url', ''),
-                    'alt': img.get('alt_text', img.get('alt', '')),
-                    'title': img.get('title', ''),
-                    'source_url': doc.get('url', ''),
-                    'source_title': doc.get('title', 'Unknown'),
-                    'domain': doc.get('domain', 'unknown'),
-                    'discovery_date': doc.get('inserted_at', ''),
-                    'search_engine': doc.get('search_metadata', {}).get('search_engine', 'unknown')
+                    'url': img['url'], 'alt': img['alt_text'], 'title': img['title'], **source
                 })
             
-            # Process videos
-            for video in media.get('videos', []):
-                if isinstance(video, dict):
-                    media_items['videos'].append({
-                        'url': video.get('url', ''),
-                        'title': video.get('title', ''),
-                        'type': video.get('type', 'video'),
-                        'platform': video.get('platform', 'unknown'),
-                        'thumbnail': video.get('thumbnail', ''),
-                        'source_url': doc.get('url', ''),
-                        'source_title': doc.get('title', 'Unknown'),
-                        'domain': doc.get('domain', 'unknown'),
-                        'discovery_date': doc.get('inserted_at', ''),
-                        'search_engine': doc.get('search_metadata', {}).get('search_engine', 'unknown')
-                    })
-                else:
-                    # Handle string URLs
-                    media_items['videos'].append({
-                        'url': video,
-                        'title': 'Video',
-                        'type': 'video',
-                        'platform': 'unknown',
-                        'source_url': doc.get('url', ''),
-                        'source_title': doc.get('title', 'Unknown'),
-                        'domain': doc.get('domain', 'unknown'),
-                        'discovery_date': doc.get('inserted_at', ''),
-                        'search_engine': doc.get('search_metadata', {}).get('search_engine', 'unknown')
-                    })
+            for video in media['videos']:
+                media_items['videos'].append({
+                    'url': video['url'], 'title': video['title'] or 'Video', 'type': video['type'],
+                    'platform': video['platform'], 'thumbnail': video['thumbnail'], **source
+                })
             
-            # Process documents
-            for document in media.get('documents', []):
-                if isinstance(document, dict):
-                    media_items['documents'].append({
-                        'url': document.get('url', ''),
-                        'filename': document.get('filename', document.get('text', 'Document')),
-                        'type': document.get('type', 'pdf'),
-                        'file_size': document.get('file_size', ''),
-                        'source_url': doc.get('url', ''),
-                        'source_title': doc.get('title', 'Unknown'),
-                        'domain': doc.get('domain', 'unknown'),
-                        'discovery_date': doc.get('inserted_at', ''),
-                        'search_engine': doc.get('search_metadata', {}).get('search_engine', 'unknown')
-                    })
-                else:
-                    # Handle string URLs
-                    media_items['documents'].append({
-                        'url': document,
-                        'filename': 'Document',
-                        'type': 'pdf',
-                        'source_url': doc.get('url', ''),
-                        'source_title': doc.get('title', 'Unknown'),
-                        'domain': doc.get('domain', 'unknown'),
-                        'discovery_date': doc.get('inserted_at', ''),
-                        'search_engine': doc.get('search_metadata', {}).get('search_engine', 'unknown')
-                    })
+            for document in media['documents']:
+                media_items['documents'].append({
+                    'url': document['url'], 'filename': document['filename'] or 'Document',
+                    'type': document['type'], 'file_size': document['file_size'], **source
+                })
             
-            # Process audio
-            for audio in media.get('audio', []):
-                if isinstance(audio, dict):
-                    media_items['audio'].append({
-                        'url': audio.get('url', ''),
-                        'title': audio.get('title', 'Audio'),
-                        'type': audio.get('type', 'audio'),
-                        'source_url': doc.get('url', ''),
-                        'source_title': doc.get('title', 'Unknown'),
-                        'domain': doc.get('domain', 'unknown'),
-                        'discovery_date': doc.get('inserted_at', ''),
-                        'search_engine': doc.get('search_metadata', {}).get('search_engine', 'unknown')
-                    })
-                else:
-                    # Handle string URLs
-                    media_items['audio'].append({
-                        'url': audio,
-                        'title': 'Audio',
-                        'type': 'audio',
-                        'source_url': doc.get('url', ''),
-                        'source_title': doc.get('title', 'Unknown'),
-                        'domain': doc.get('domain', 'unknown'),
-                        'discovery_date': doc.get('inserted_at', ''),
-                        'search_engine': doc.get('search_metadata', {}).get('search_engine', 'unknown')
-                    })
+            for audio in media['audio']:
+                media_items['audio'].append({
+                    'url': audio['url'], 'title': audio['title'] or 'Audio', 'type': audio['type'], **source
+                })
         
         # Limit results and sort by discovery date
         for media_type in media_items:
@@ -633,7 +634,7 @@ def start_comprehensive_search():
 def get_enhanced_stats():
     """Get enhanced statistics including OSINT data"""
     # Query MongoDB for recent statistics
-    recent_docs = enhanced_system.db.find_documents({})
+    recent_docs = list(enhanced_system.db.find_documents(LATEST_ONLY, projection=STATS_PROJECTION, batch_size=1000))
     
     stats = {
         'total_documents': len([d for d in recent_docs if d.get('search_metadata', {}).get('data_type') == 'traditional_scraping']),
@@ -651,7 +652,7 @@ def get_enhanced_stats():
 @app.route('/api/enhanced-graph-data')
 def get_enhanced_graph_data():
     """Get enhanced graph data including OSINT relationships"""
-    recent_docs = enhanced_system.db.find_documents({})
+    recent_docs = recent_documents(LATEST_ONLY, GRAPH_PROJECTION, 100)
     
     nodes = []
     links = []
@@ -661,7 +662,7 @@ def get_enhanced_graph_data():
     keyword_nodes = {}
     osint_nodes = {}
     
-    for doc in recent_docs[-100:]:  # Last 100 documents
+    for doc in recent_docs:  # Last 100 documents
         doc_id = doc.get('id', str(uuid.uuid4()))
         domain = doc.get('domain', 'unknown')
         keywords = doc.get('search_metadata', {}).get('keywords', [])
@@ -714,15 +715,74 @@ def get_enhanced_graph_data():
     
     return jsonify({'nodes': nodes, 'links': links})
 
+@app.route('/api/search')
+def search_documents():
+    """Full-text search over stored documents (ranked on the SQLite backend)"""
+    text = request.args.get('q', '').strip()
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    if not text:
+        return jsonify([])
+    
+    results = []
+    for doc in enhanced_system.db.search_text(text, limit):
+        results.append({
+            'id': doc.get('id', ''),
+            'url': doc.get('url', ''),
+            'title': doc.get('title', ''),
+            'domain': doc.get('domain', ''),
+            'snippet': doc.get('search_snippet') or doc.get('meta_description', ''),
+            'score': doc.get('search_score'),
+            'crawl_date': doc.get('metadata', {}).get('crawl_date', '')
+        })
+    
+    return jsonify(results)
+
+@app.route('/api/analytics')
+def get_analytics():
+    """Domain, media and trust aggregates computed on the Parquet metadata export"""
+    # The background export keeps the dataset within PARQUET_EXPORT_INTERVAL of the database
+    frame = load_metadata(since=request.args.get('since'))
+    return jsonify(summarize(frame, top=request.args.get('top', 20, type=int)))
+
+@app.route('/api/rollups')
+def get_rollups():
+    """Per-domain daily roll-ups; they cover archived days as well as the hot window"""
+    days = request.args.get('days', 30, type=int)
+    since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+    # Roll-ups of the hot window are refreshed on each retention run
+    return jsonify(enhanced_system.retention.rollups.query(since=since, domain=request.args.get('domain')))
+
+@app.route('/api/writer-stats')
+def get_writer_stats():
+    """Write queue depth, throughput and latency of the background writer"""
+    return jsonify(enhanced_system.writer.stats)
+
+@app.route('/api/fetch-stats')
+def get_fetch_stats():
+    """Fetch engine totals, per-host spacing and circuit breakers, HTTP cache hit rate, frontier dedup counts"""
+    engine = get_fetch_engine()
+    return jsonify({
+        'engine': engine.stats,
+        'host_delays': engine.host_delays(),
+        'circuit_breakers': engine.breaker_states(only_tripped=request.args.get('all') != '1'),
+        'http_cache': engine.cache_stats(),
+        'frontier': dict(enhanced_system.frontier.stats, remembered=len(enhanced_system.frontier.seen))
+    })
+
+@app.route('/api/db-pool-stats')
+def get_db_pool_stats():
+    """MongoDB connection pool size and checkout wait times"""
+    return jsonify(pool_stats())
+
 @app.route('/api/osint-intelligence-data')
 def get_osint_intelligence_data():
     """Get OSINT intelligence data for visualization"""
-    osint_docs = enhanced_system.db.find_documents({
+    osint_docs = recent_documents({
         'search_metadata.data_type': 'osint_intelligence'
-    })
+    }, OSINT_PROJECTION, 50)
     
     intelligence_data = []
-    for doc in osint_docs[-50:]:  # Last 50 OSINT items
+    for doc in osint_docs:  # Last 50 OSINT items
         intelligence_data.append({
             'source': doc.get('source', ''),
             'title': doc.get('title', ''),